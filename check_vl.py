@@ -4,31 +4,23 @@ os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'gestionFCP.settings')
 django.setup()
 
 from fcp_app.models import FicheSignaletique, FCP_VL_MODELS
-from django.db.models import Min, Max
+from fcp_app.repository import fund_summaries
 
-print('=== Statistiques VL ===')
-total_vl = 0
-date_min = None
-date_max = None
+# Une seule requete agregee sur la table unifiee
+summaries = fund_summaries()
 
-for nom_fcp, model_vl in FCP_VL_MODELS.items():
-    count = model_vl.objects.count()
-    total_vl += count
-    
-    if count > 0:
-        stats = model_vl.objects.aggregate(d_min=Min('date'), d_max=Max('date'))
-        if date_min is None or (stats['d_min'] and stats['d_min'] < date_min):
-            date_min = stats['d_min']
-        if date_max is None or (stats['d_max'] and stats['d_max'] > date_max):
-            date_max = stats['d_max']
+print('=== Statistiques VL ===')
+total_vl = sum(s['count'] for s in summaries.values())
+date_min = min((s['date_min'] for s in summaries.values()), default=None)
+date_max = max((s['date_max'] for s in summaries.values()), default=None)
 
 print(f'Total: {total_vl} valeurs liquidatives')
 print(f'Periode: {date_min} a {date_max}')
 
 print('')
 print('=== VL par FCP ===')
-for nom_fcp, model_vl in FCP_VL_MODELS.items():
-    count = model_vl.objects.count()
+for nom_fcp in FCP_VL_MODELS:
+    count = summaries.get(nom_fcp, {}).get('count', 0)
     print(f'  {nom_fcp}: {count} VL')
 
 print('')
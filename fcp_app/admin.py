@@ -11,7 +11,8 @@ from .models import (
     VL_FCPE_Force_PAD, VL_FCPE_Sini_Gnesigui, VL_FCPR_SenFonds,
     # Modèles de composition
     CompositionPoche, InstrumentAction, InstrumentObligation,
-    InstrumentLiquidite, InstrumentFCP
+    InstrumentLiquidite, InstrumentFCP,
+    VLDataVersion, FcpAnalyticsSnapshot, FcpRunningStats, ValeurLiquidative, ExportJob
 )
 
 
@@ -60,6 +61,25 @@ admin.site.register(VL_FCPE_Sini_Gnesigui, BaseVLAdmin)
 admin.site.register(VL_FCPR_SenFonds, BaseVLAdmin)
 
 
+# Table unifiée : lecture seule, alimentée depuis les tables VL par FCP
+@admin.register(ValeurLiquidative)
+class ValeurLiquidativeAdmin(admin.ModelAdmin):
+    list_display = ['fcp', 'date', 'valeur', 'actif_net', 'nombre_parts']
+    list_filter = ['fcp']
+    date_hierarchy = 'date'
+    ordering = ['fcp', '-date']
+    list_select_related = ['fcp']
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+    
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
 # Admin pour les séries de benchmarks
 class BaseBenchmarkAdmin(admin.ModelAdmin):
     list_display = ['date', 'valeur', 'variation_journaliere']
@@ -73,6 +93,45 @@ admin.site.register(BenchmarkObligation, BaseBenchmarkAdmin)
 admin.site.register(BenchmarkBRVM, BaseBenchmarkAdmin)
 
 
+# Versions des données VL (lecture seule, incrémentées par les signaux et les imports)
+@admin.register(VLDataVersion)
+class VLDataVersionAdmin(admin.ModelAdmin):
+    list_display = ['fcp_name', 'version', 'updated_at']
+    search_fields = ['fcp_name']
+    ordering = ['fcp_name']
+    readonly_fields = ['fcp_name', 'version', 'updated_at']
+
+
+# Instantanés de statistiques (calculés par build_analytics_snapshots)
+@admin.register(FcpAnalyticsSnapshot)
+class FcpAnalyticsSnapshotAdmin(admin.ModelAdmin):
+    list_display = ['fcp_name', 'type_snapshot', 'as_of_date', 'data_version', 'computed_at']
+    list_filter = ['type_snapshot', 'fcp_name']
+    search_fields = ['fcp_name']
+    ordering = ['fcp_name', 'type_snapshot', '-as_of_date']
+    exclude = ['payload']
+
+
+# Statistiques cumulées depuis l'origine (mises à jour par sync_vl_sharepoint)
+@admin.register(FcpRunningStats)
+class FcpRunningStatsAdmin(admin.ModelAdmin):
+    list_display = ['fcp_name', 'nb_vl', 'last_date', 'last_value', 'max_drawdown', 'data_version', 'updated_at']
+    search_fields = ['fcp_name']
+    ordering = ['fcp_name']
+
+
+@admin.register(ExportJob)
+class ExportJobAdmin(admin.ModelAdmin):
+    list_display = ['id', 'type_export', 'statut', 'progression', 'nom_fichier', 'created_at', 'finished_at']
+    list_filter = ['type_export', 'statut']
+    ordering = ['-created_at']
+    readonly_fields = [
+        'id', 'type_export', 'parametres', 'progression', 'message', 'erreur',
+        'fichier', 'nom_fichier', 'content_type', 'created_at', 'started_at', 'finished_at',
+        'worker', 'heartbeat_at'
+    ]
+
+
 # ============================================================================
 # Admin pour la Composition des FCP
 # ============================================================================
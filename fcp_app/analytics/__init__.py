@@ -0,0 +1,88 @@
+"""
+Moteur analytique vectorisé pour les valeurs liquidatives des FCP.
+
+La série d'un FCP est chargée une seule fois (VLSeries, tableaux float64)
+puis toutes les statistiques de rendement et de risque sont calculées avec
+NumPy au lieu de boucles Python sur des Decimal.
+"""
+from .constants import (
+    TRADING_DAYS_PER_YEAR,
+    RISK_FREE_RATE_ANNUAL,
+    RISK_FREE_RATE_DAILY,
+    ANNUALIZATION_FACTOR,
+    MAX_ROLLING_WINDOW,
+)
+from .series import VLSeries, load_series
+from .stats import (
+    daily_returns,
+    sample_std,
+    annualized_volatility,
+    sharpe_ratio,
+    sortino_ratio,
+    skewness_kurtosis,
+    historical_var,
+    conditional_var,
+    return_histogram,
+    tracking_error_since,
+    risk_statistics,
+    analyse_statistics,
+)
+from .drawdown import (
+    drawdown_curve,
+    max_drawdown,
+    episode_bounds,
+    drawdown_episodes,
+)
+from .downsample import (
+    MIN_POINTS,
+    lttb_indices,
+    downsample,
+)
+from .rolling import (
+    rolling_mean,
+    rolling_cov,
+    rolling_var,
+    rolling_std,
+    rolling_volatility,
+    rolling_sharpe,
+    rolling_beta,
+    rolling_count,
+)
+from .cache import (
+    get_series,
+    get_many_series,
+    aget_series,
+    aget_many_series,
+    in_thread,
+    cached_result,
+    acached_result,
+    invalidate,
+)
+from .running import (
+    RunningStats,
+    get_running_stats,
+    get_many_running_stats,
+    rebuild_running_stats,
+    append_running_stats,
+    running_scatter_statistics,
+)
+from .performance import (
+    period_starts,
+    fund_analytics,
+    factsheet_preview,
+    scatter_statistics,
+)
+from .snapshots import (
+    get_snapshot,
+    get_fund_analytics,
+    get_factsheet_preview,
+    build_snapshots,
+)
+from .correlation import (
+    CORRELATION_METHODS,
+    return_panel,
+    correlation_matrix,
+    correlation_result,
+    fund_correlations,
+    afund_correlations,
+)
@@ -0,0 +1,218 @@
+"""
+Cache des séries VL par FCP, partagé par tous les threads du processus
+
+Chaque série est conservée avec la version des données du FCP (VLDataVersion :
+compteur et horodatage de la dernière modification).
+Une requête légère sur les versions suffit à valider le cache : la série n'est
+rechargée depuis la base que si le FCP a été modifié (import, synchronisation,
+admin), y compris par un autre processus.
+Les séries sont toujours relues dans la table unifiée ValeurLiquidative, en une
+requête quel que soit le nombre de FCP : les écritures passent par les signaux
+ou par repository.vl_changed(), qui la resynchronisent avant d'invalider.
+
+Les variantes asynchrones (aget_many_series, acached_result), pour les vues
+ASGI, partagent le même cache : seules les lectures en base sont attendues
+(ORM asynchrone), les calculs NumPy passent par in_thread() pour ne pas
+bloquer la boucle d'événements.
+"""
+import threading
+
+import numpy as np
+from asgiref.sync import sync_to_async
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .series import VLSeries
+
+_lock = threading.Lock()
+_series = {}  # nom FCP -> ((version, updated_at), VLSeries)
+_results = {}  # clé -> ({nom FCP: (version, updated_at)}, résultat)
+
+
+def _versions(fcp_names):
+    from ..models import VLDataVersion
+    return {
+        name: (version, updated_at)
+        for name, version, updated_at in VLDataVersion.objects.filter(
+            fcp_name__in=fcp_names
+        ).values_list('fcp_name', 'version', 'updated_at')
+    }
+
+
+async def _aversions(fcp_names):
+    from ..models import VLDataVersion
+    return {
+        name: (version, updated_at)
+        async for name, version, updated_at in VLDataVersion.objects.filter(
+            fcp_name__in=fcp_names
+        ).values_list('fcp_name', 'version', 'updated_at')
+    }
+
+
+def in_thread(func, *args, **kwargs):
+    """
+    Attend func(*args, **kwargs) exécuté dans le pool de threads (calcul
+    NumPy sans accès à la base) : la boucle ASGI reste disponible pour les
+    autres requêtes.
+    """
+    return sync_to_async(func, thread_sensitive=False)(*args, **kwargs)
+
+
+def _series_names(fcp_names):
+    from ..models import get_vl_model
+    return [name for name in dict.fromkeys(fcp_names) if get_vl_model(name)]
+
+
+def _cached_series(names, versions):
+    """Séries en cache encore à jour : ({nom: VLSeries}, noms à relire)"""
+    result = {}
+    missing = []
+    for name in names:
+        with _lock:
+            entry = _series.get(name)
+        if entry is not None and entry[0] == versions.get(name, (0, None)):
+            result[name] = entry[1]
+        else:
+            missing.append(name)
+    return result, missing
+
+
+def _load_series(missing):
+    from ..repository import load_many_series
+    return load_many_series(missing)
+
+
+def _store_series(names, versions, result, missing, loaded):
+    for name in missing:
+        series = loaded.get(name)
+        if series is None:
+            series = VLSeries([], np.empty(0, dtype=np.float64))
+        series.values.flags.writeable = False
+        with _lock:
+            _series[name] = (versions.get(name, (0, None)), series)
+        result[name] = series
+    # Ordre des noms demandés, quel que soit l'état du cache
+    return {name: result[name] for name in names}
+
+
+def get_many_series(fcp_names):
+    """
+    Séries complètes de plusieurs FCP : {nom: VLSeries}, dans l'ordre demandé.
+    Une seule requête de versions ; seules les séries modifiées sont relues,
+    en une seule requête sur la table unifiée.
+    Les noms sans modèle VL sont ignorés. Les séries retournées sont
+    partagées et en lecture seule.
+    """
+    names = _series_names(fcp_names)
+    if not names:
+        return {}
+    versions = _versions(names)
+    result, missing = _cached_series(names, versions)
+    if not missing:
+        return result
+    # Version lue avant la série : au pire une série plus récente que sa
+    # version, rechargée à la requête suivante
+    return _store_series(names, versions, result, missing, _load_series(missing))
+
+
+async def aget_many_series(fcp_names):
+    """Variante asynchrone de get_many_series (même cache)"""
+    names = _series_names(fcp_names)
+    if not names:
+        return {}
+    versions = await _aversions(names)
+    result, missing = _cached_series(names, versions)
+    if not missing:
+        return result
+    loaded = await sync_to_async(_load_series)(missing)
+    return _store_series(names, versions, result, missing, loaded)
+
+
+def get_series(fcp_name):
+    """Série complète (mise en cache) d'un FCP, None si le FCP est inconnu"""
+    return get_many_series([fcp_name]).get(fcp_name)
+
+
+async def aget_series(fcp_name):
+    """Variante asynchrone de get_series"""
+    return (await aget_many_series([fcp_name])).get(fcp_name)
+
+
+def _cached_entry(key, versions):
+    with _lock:
+        entry = _results.get(key)
+    if entry is not None and entry[0] == versions:
+        return entry
+    return None
+
+
+def _store_result(key, versions, result):
+    with _lock:
+        _results[key] = (versions, result)
+    return result
+
+
+def cached_result(key, fcp_names, compute):
+    """
+    Résultat calculé à partir des séries de plusieurs FCP (ex: matrice de
+    corrélation), conservé tant que les versions de ces FCP sont inchangées :
+    une requête de versions, compute() n'est appelé qu'en cas de modification.
+    Le résultat retourné est partagé et ne doit pas être modifié.
+    """
+    versions = _versions(fcp_names)
+    entry = _cached_entry(key, versions)
+    if entry is not None:
+        return entry[1]
+    return _store_result(key, versions, compute())
+
+
+async def acached_result(key, fcp_names, compute):
+    """Variante asynchrone de cached_result : compute est une fonction coroutine"""
+    versions = await _aversions(fcp_names)
+    entry = _cached_entry(key, versions)
+    if entry is not None:
+        return entry[1]
+    return _store_result(key, versions, await compute())
+
+
+def invalidate(*fcp_names):
+    """
+    Signale la modification des VL des FCP donnés (tous si aucun nom) :
+    incrémente leur version et vide le cache local. Ne resynchronise pas la
+    table unifiée : après une écriture en masse, appeler repository.vl_changed()
+    (regroupé par repository.bulk_vl_changes()).
+    """
+    from ..models import VLDataVersion, FCP_VL_MODELS
+
+    names = set(fcp_names or FCP_VL_MODELS)
+
+    now = timezone.now()
+    for name in names:
+        updated = VLDataVersion.objects.filter(fcp_name=name).update(
+            version=F('version') + 1, updated_at=now
+        )
+        if not updated:
+            _, created = VLDataVersion.objects.get_or_create(fcp_name=name, defaults={'version': 1})
+            if not created:
+                VLDataVersion.objects.filter(fcp_name=name).update(version=F('version') + 1, updated_at=now)
+
+    _discard(names)
+    # En cas de lecture dans la transaction en cours, vider à nouveau après le commit
+    transaction.on_commit(lambda: _discard(names))
+
+
+def _discard(names):
+    with _lock:
+        for name in names:
+            _series.pop(name, None)
+        # Résultats dépendant d'un des FCP modifiés (sinon revalidés par les versions)
+        for key in [key for key, (versions, _) in _results.items() if names & versions.keys()]:
+            del _results[key]
+
+
+def clear():
+    """Vide le cache local du processus (sans toucher aux versions)"""
+    with _lock:
+        _series.clear()
+        _results.clear()
@@ -0,0 +1,19 @@
+"""
+Constantes financières partagées par le moteur analytique et les vues
+"""
+
+# Nombre de jours de trading par an (standard pour les marchés financiers)
+# Le marché BRVM est ouvert ~252 jours par an (hors week-ends et jours fériés)
+TRADING_DAYS_PER_YEAR = 365
+
+# Taux sans risque annuel (en %) - Taux de référence BCEAO
+RISK_FREE_RATE_ANNUAL = 3.25
+
+# Taux sans risque journalier
+RISK_FREE_RATE_DAILY = RISK_FREE_RATE_ANNUAL / TRADING_DAYS_PER_YEAR
+
+# Facteur d'annualisation pour la volatilité
+ANNUALIZATION_FACTOR = TRADING_DAYS_PER_YEAR ** 0.5
+
+# Fenêtre glissante maximale acceptée par les API (1 an de bourse)
+MAX_ROLLING_WINDOW = 252
@@ -0,0 +1,194 @@
+"""
+Matrice de corrélation des rendements quotidiens de plusieurs FCP
+
+Les rendements de tous les FCP sont alignés sur un index de dates commun
+(panel NumPy : une ligne par date, une colonne par FCP, NaN si le FCP n'a
+pas de VL ce jour-là), puis la matrice complète est calculée en une fois.
+
+- Alignement strict (défaut) : dates communes à tous les FCP, un seul
+  np.corrcoef sur le panel
+- Alignement par paire : chaque paire de FCP utilise toutes ses dates
+  communes (pairwise-complete)
+- Pearson ou Spearman (corrélation des rangs)
+"""
+import numpy as np
+
+from .cache import get_many_series, aget_many_series, cached_result, acached_result, in_thread
+from .performance import period_starts
+
+CORRELATION_METHODS = ('pearson', 'spearman')
+CORRELATION_PERIODS = ('origin', 'wtd', 'mtd', 'qtd', 'std', 'ytd')
+
+# Nombre minimum d'observations communes pour calculer une corrélation
+MIN_CORRELATION_OBSERVATIONS = 6
+
+
+def return_panel(series_by_name, period='origin', min_points=10):
+    """
+    Rendements quotidiens (%) de plusieurs FCP depuis le début de la période
+    (origin, wtd, mtd, qtd, std, ytd), alignés sur l'union de leurs dates.
+    Le rendement d'une date est calculé depuis la VL précédente du même FCP.
+    Les FCP d'au plus `min_points` VL, sans VL de référence avant la période
+    ou sans rendement sont écartés.
+    Retourne (noms, dates datetime64[D], panel float64 de forme (dates, FCP)).
+    """
+    names = []
+    columns = []
+    for name, series in series_by_name.items():
+        if len(series) <= min_points:
+            continue
+        starts = period_starts(series.last_date)
+        if period in starts:
+            ref = int(np.searchsorted(series.date_index, np.datetime64(starts[period], 'D'), side='left')) - 1
+            if ref < 0:
+                continue
+        else:
+            ref = 0
+        if len(series) - ref < 2:
+            continue
+        values = series.values[ref:]
+        names.append(name)
+        columns.append((series.date_index[ref + 1:], (values[1:] / values[:-1] - 1) * 100))
+
+    if not columns:
+        return names, np.empty(0, dtype='datetime64[D]'), np.empty((0, 0), dtype=np.float64)
+
+    dates = np.unique(np.concatenate([column_dates for column_dates, _ in columns]))
+    panel = np.full((len(dates), len(columns)), np.nan)
+    for j, (column_dates, rendements) in enumerate(columns):
+        panel[np.searchsorted(dates, column_dates), j] = rendements
+    return names, dates, panel
+
+
+def average_ranks(values):
+    """Rangs (à partir de 1) d'un tableau 1-D, rang moyen pour les ex æquo"""
+    _, inverse, counts = np.unique(values, return_inverse=True, return_counts=True)
+    return (np.cumsum(counts) - (counts - 1) / 2)[inverse]
+
+
+def _corrcoef(panel):
+    """np.corrcoef des colonnes ; 0 pour une colonne sans variance"""
+    with np.errstate(invalid='ignore', divide='ignore'):
+        matrix = np.corrcoef(panel, rowvar=False)
+    return np.nan_to_num(np.atleast_2d(matrix), nan=0.0)
+
+
+def _pairwise_pearson(panel):
+    """
+    Corrélations de Pearson sur les dates communes de chaque paire, pour
+    toutes les paires à la fois (sommes masquées en produits matriciels).
+    Retourne (matrice, nombre d'observations par paire).
+    """
+    present = (~np.isnan(panel)).astype(np.float64)
+    x = np.nan_to_num(panel)
+    counts = present.T @ present
+    # sums[i, j] : somme des rendements du FCP i aux dates où j est présent
+    sums = x.T @ present
+    squares = (x * x).T @ present
+    products = x.T @ x
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        covariance = products - sums * sums.T / counts
+        variance = squares - sums * sums / counts
+        matrix = covariance / np.sqrt(variance * variance.T)
+    matrix = np.nan_to_num(matrix, nan=0.0, posinf=0.0, neginf=0.0)
+    return np.clip(matrix, -1.0, 1.0), counts.astype(int)
+
+
+def _pairwise_spearman(panel):
+    """Corrélations de Spearman sur les dates communes de chaque paire (rangs recalculés par paire)"""
+    n = panel.shape[1]
+    present = ~np.isnan(panel)
+    matrix = np.eye(n)
+    counts = present.T.astype(int) @ present.astype(int)
+    for i in range(n):
+        for j in range(i + 1, n):
+            rows = present[:, i] & present[:, j]
+            if rows.sum() < 2:
+                continue
+            ranks = np.column_stack([average_ranks(panel[rows, i]), average_ranks(panel[rows, j])])
+            matrix[i, j] = matrix[j, i] = _corrcoef(ranks)[0, 1]
+    return matrix, counts
+
+
+def correlation_matrix(panel, method='pearson', pairwise=False):
+    """
+    Matrice de corrélation des colonnes d'un panel de rendements.
+    Retourne (matrice n x n, nombre d'observations) ; le nombre d'observations
+    est le nombre de dates communes à tous les FCP en alignement strict, le
+    plus petit nombre de dates communes d'une paire en alignement par paire.
+    Matrice vide si moins de MIN_CORRELATION_OBSERVATIONS observations ;
+    en alignement par paire, une paire sans assez d'observations vaut 0.
+    """
+    if method not in CORRELATION_METHODS:
+        raise ValueError(f"Méthode de corrélation inconnue: {method}")
+    n = panel.shape[1]
+    if n < 2:
+        return np.empty((0, 0)), 0
+
+    if not pairwise:
+        complete = panel[~np.isnan(panel).any(axis=1)]
+        if len(complete) < MIN_CORRELATION_OBSERVATIONS:
+            return np.empty((0, 0)), len(complete)
+        if method == 'spearman':
+            complete = np.column_stack([average_ranks(column) for column in complete.T])
+        return _corrcoef(complete), len(complete)
+
+    if method == 'spearman':
+        matrix, counts = _pairwise_spearman(panel)
+    else:
+        matrix, counts = _pairwise_pearson(panel)
+    off_diagonal = ~np.eye(n, dtype=bool)
+    matrix[off_diagonal & (counts < MIN_CORRELATION_OBSERVATIONS)] = 0.0
+    return matrix, int(counts[off_diagonal].min())
+
+
+def correlation_result(series_by_name, period='origin', method='pearson', pairwise=False):
+    """Réponse de api_correlation_matrix calculée sur des séries déjà chargées (sans accès à la base)"""
+    names, _, panel = return_panel(series_by_name, period)
+    matrix, nb_observations = correlation_matrix(panel, method, pairwise)
+    return {
+        'fcp_names': names,
+        'matrix': [
+            [1.0 if i == j else (round(float(corr), 3) if corr else 0) for j, corr in enumerate(row)]
+            for i, row in enumerate(matrix)
+        ],
+        'nb_observations': nb_observations,
+    }
+
+
+def fund_correlations(fcp_names, period='origin', method='pearson', pairwise=False):
+    """
+    Matrice de corrélation des FCP pour la période (réponse de
+    api_correlation_matrix) : {'fcp_names', 'matrix', 'nb_observations'}.
+    Coefficients arrondis à 3 décimales, 1.0 sur la diagonale, 0 pour un FCP
+    sans variance. Une période inconnue est traitée comme 'origin'. Mise en
+    cache par période, méthode et alignement tant que les VL des FCP ne
+    changent pas.
+    """
+    fcp_names = list(fcp_names)
+    if period not in CORRELATION_PERIODS:
+        period = 'origin'
+
+    def compute():
+        return correlation_result(get_many_series(fcp_names), period, method, pairwise)
+
+    key = ('correlation', tuple(fcp_names), period, method, pairwise)
+    return cached_result(key, fcp_names, compute)
+
+
+async def afund_correlations(fcp_names, period='origin', method='pearson', pairwise=False):
+    """
+    Variante asynchrone de fund_correlations (même cache) : séries lues par
+    l'ORM asynchrone, matrice calculée dans le pool de threads.
+    """
+    fcp_names = list(fcp_names)
+    if period not in CORRELATION_PERIODS:
+        period = 'origin'
+
+    async def compute():
+        series_by_name = await aget_many_series(fcp_names)
+        return await in_thread(correlation_result, series_by_name, period, method, pairwise)
+
+    key = ('correlation', tuple(fcp_names), period, method, pairwise)
+    return await acached_result(key, fcp_names, compute)
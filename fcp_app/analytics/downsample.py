@@ -0,0 +1,55 @@
+"""
+Réduction du nombre de points des courbes de VL (Largest-Triangle-Three-Buckets)
+
+LTTB conserve la première et la dernière VL puis, dans chaque intervalle
+de points, la VL formant le plus grand triangle avec le point retenu
+précédemment et la moyenne de l'intervalle suivant : les pics et les creux
+visibles sont conservés, contrairement à un échantillonnage à pas fixe.
+"""
+import numpy as np
+
+# Nombre minimum de points d'une courbe réduite (première, dernière et au moins une VL)
+MIN_POINTS = 3
+
+
+def lttb_indices(x, y, max_points):
+    """
+    Indices (croissants) des points retenus par LTTB pour tracer la courbe
+    (x, y) avec au plus `max_points` points. Tous les indices si la courbe
+    en compte déjà au plus `max_points`.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    n = x.size
+    if max_points < MIN_POINTS:
+        raise ValueError(f"max_points doit être >= {MIN_POINTS}")
+    if n <= max_points:
+        return np.arange(n)
+
+    # Intervalles des points intermédiaires [bounds[i], bounds[i + 1])
+    bounds = (np.arange(max_points - 1) * ((n - 2) / (max_points - 2))).astype(np.intp) + 1
+    bounds[-1] = n - 1
+    # Moyenne de chaque intervalle (dernier « intervalle » : la dernière VL)
+    counts = np.diff(bounds)
+    mean_x = np.append(np.add.reduceat(x[:-1], bounds[:-1]) / counts, x[-1])
+    mean_y = np.append(np.add.reduceat(y[:-1], bounds[:-1]) / counts, y[-1])
+
+    selected = np.empty(max_points, dtype=np.intp)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for i in range(max_points - 2):
+        start, stop = bounds[i], bounds[i + 1]
+        ax, ay = x[a], y[a]
+        # Double de l'aire du triangle (point retenu, candidat, moyenne suivante)
+        areas = np.abs((ax - mean_x[i + 1]) * (y[start:stop] - ay) - (ax - x[start:stop]) * (mean_y[i + 1] - ay))
+        a = start + int(np.argmax(areas))
+        selected[i + 1] = a
+    return selected
+
+
+def downsample(series, max_points):
+    """Série réduite à au plus `max_points` VL par LTTB (la série elle-même si elle est plus courte)"""
+    if max_points is None or len(series) <= max_points:
+        return series
+    indices = lttb_indices(series.date_index.astype(np.int64), series.values, max_points)
+    return series.take(indices)
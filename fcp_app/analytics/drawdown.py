@@ -0,0 +1,102 @@
+"""
+Drawdowns d'une série de valeurs liquidatives en une passe linéaire (NumPy)
+
+Le plus haut historique est obtenu par np.maximum.accumulate. Chaque nouveau
+plus haut strict ouvre un segment ; un segment dont la VL passe sous son
+plus haut forme un épisode de drawdown :
+
+- début : dernière VL au niveau du plus haut avant la baisse
+- creux : première VL minimum du segment
+- fin : nouveau plus haut strict (None si l'épisode est en cours)
+- profondeur (%), durée et temps de récupération en nombre de VL
+"""
+import numpy as np
+
+
+def drawdown_curve(values):
+    """Drawdown courant (%, positif) à chaque date, par rapport au plus haut historique"""
+    values = np.asarray(values, dtype=np.float64)
+    if values.size == 0:
+        return np.empty(0, dtype=np.float64)
+    peaks = np.maximum.accumulate(values)
+    return (peaks - values) / peaks * 100
+
+
+def max_drawdown(values):
+    """Perte maximale (%) depuis un plus haut"""
+    curve = drawdown_curve(values)
+    return float(curve.max()) if curve.size else 0.0
+
+
+def _first_per_segment(indices, segments):
+    """Premier indice de chaque segment : (segments, indices), indices triés"""
+    found, first = np.unique(segments[indices], return_index=True)
+    return found, indices[first]
+
+
+def episode_bounds(values):
+    """
+    Bornes des épisodes de drawdown, par ordre chronologique : tableaux
+    (début, creux, fin, profondeur %) ; fin = -1 pour un épisode en cours.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    n = values.size
+    empty = np.empty(0, dtype=np.intp)
+    if n < 2:
+        return empty, empty, empty, np.empty(0, dtype=np.float64)
+
+    peaks = np.maximum.accumulate(values)
+    # Nouveaux plus hauts stricts (la première VL ouvre le premier segment)
+    new_high = np.empty(n, dtype=bool)
+    new_high[0] = True
+    new_high[1:] = values[1:] > peaks[:-1]
+    highs = np.flatnonzero(new_high)
+    segments = np.cumsum(new_high) - 1
+
+    # Segments passés sous leur plus haut
+    below = np.flatnonzero(values < peaks)
+    if below.size == 0:
+        return empty, empty, empty, np.empty(0, dtype=np.float64)
+    episodes, first_below = _first_per_segment(below, segments)
+
+    # Creux : première VL minimum de chaque segment
+    minimums = np.minimum.reduceat(values, highs)
+    at_minimum = np.flatnonzero(values == minimums[segments])
+    minimum_segments, troughs = _first_per_segment(at_minimum, segments)
+    troughs = troughs[np.isin(minimum_segments, episodes)]
+
+    starts = first_below - 1
+    ends = np.append(highs[1:], -1)[episodes]
+    peak_values = values[highs[episodes]]
+    depths = (peak_values - values[troughs]) / peak_values * 100
+    return starts, troughs, ends, depths
+
+
+def drawdown_episodes(dates, values, limit=None):
+    """
+    Liste des épisodes de drawdown (début, creux, fin, profondeur, durée,
+    récupération), les plus profonds en premier ; les `limit` premiers si
+    précisé. Profondeurs égales à l'arrondi : ordre chronologique.
+    """
+    starts, troughs, ends, depths = episode_bounds(values)
+    starts, troughs, ends = starts.tolist(), troughs.tolist(), ends.tolist()
+    depths = [round(depth, 2) for depth in depths.tolist()]
+    # Tri stable par profondeur arrondie décroissante
+    order = sorted(range(len(depths)), key=depths.__getitem__, reverse=True)
+    if limit is not None:
+        order = order[:limit]
+
+    n = len(values)
+    episodes = []
+    for k in order:
+        start, trough, end = starts[k], troughs[k], ends[k]
+        ongoing = end < 0
+        episodes.append({
+            'start_date': dates[start].strftime('%Y-%m-%d'),
+            'trough_date': dates[trough].strftime('%Y-%m-%d'),
+            'end_date': None if ongoing else dates[end].strftime('%Y-%m-%d'),  # None : encore en cours
+            'depth': depths[k],
+            'duration': (n if ongoing else end) - start,
+            'recovery': None if ongoing else end - trough,  # None : pas encore récupéré
+        })
+    return episodes
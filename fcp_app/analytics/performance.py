@@ -0,0 +1,256 @@
+"""
+Tableaux de performances et statistiques complètes d'un FCP
+
+Calculs partagés par les vues (calcul à la volée) et par les instantanés
+précalculés (FcpAnalyticsSnapshot). Les résultats ne contiennent que des
+types JSON (str, int, float, None, list, dict).
+"""
+from datetime import timedelta
+
+import numpy as np
+
+from .stats import (
+    sample_std,
+    sharpe_ratio,
+    tracking_error_since,
+    analyse_statistics,
+)
+from .drawdown import max_drawdown
+from .constants import ANNUALIZATION_FACTOR
+
+
+def period_starts(today):
+    """Premiers jours de la semaine, du mois, du trimestre, du semestre et de l'année"""
+    quarter_month = ((today.month - 1) // 3) * 3 + 1
+    semester_month = 1 if today.month <= 6 else 7
+    return {
+        'wtd': today - timedelta(days=today.weekday()),  # Lundi de la semaine
+        'mtd': today.replace(day=1),
+        'qtd': today.replace(month=quarter_month, day=1),
+        'std': today.replace(month=semester_month, day=1),
+        'ytd': today.replace(month=1, day=1),
+    }
+
+
+def fund_analytics(series, running=None):
+    """
+    Statistiques de la page Valeurs Liquidatives pour une série complète :
+    stats, perf_calendaires, perf_glissantes, tracking_error et analyse_stats.
+    `running` : accumulateur RunningStats du FCP, s'il est à jour.
+    Dictionnaires vides si la série est vide.
+    """
+    result = {
+        'stats': {},
+        'perf_calendaires': {},
+        'perf_glissantes': {},
+        'tracking_error': {},
+        'analyse_stats': {},
+    }
+    if not len(series):
+        return result
+
+    latest_value = series.last_value
+    first_value = series.first_value
+    today = series.last_date  # Dernière date de la base (pas la date du jour)
+
+    def calc_perf(vl_ref):
+        if vl_ref is not None:
+            return round(((latest_value / vl_ref) - 1) * 100, 2)
+        return None
+
+    # VL pour différentes périodes GLISSANTES (depuis la dernière date en base)
+    vl_1d = series.value_asof(today, strict=True)
+    vl_1m = series.value_asof(today - timedelta(days=30))
+    vl_1y = series.value_asof(today - timedelta(days=365))
+
+    # Performances calendaires (To-Date) : dernière VL avant le début de chaque période
+    starts = period_starts(today)
+    perf_calendaires = {
+        key: calc_perf(series.value_asof(start, strict=True))
+        for key, start in starts.items()
+    }
+
+    # Performances glissantes
+    perf_glissantes = {
+        'perf_1m': calc_perf(vl_1m),
+        'perf_3m': calc_perf(series.value_asof(today - timedelta(days=90))),
+        'perf_6m': calc_perf(series.value_asof(today - timedelta(days=180))),
+        'perf_1y': calc_perf(vl_1y),
+        'perf_3y': calc_perf(series.value_asof(today - timedelta(days=365*3))),
+        'perf_5y': calc_perf(series.value_asof(today - timedelta(days=365*5))),
+        'origine': calc_perf(first_value),
+    }
+
+    stats = {
+        'derniere_vl': latest_value,
+        'derniere_date': series.last_date.strftime('%d/%m/%Y'),
+        'premiere_vl': first_value,
+        'premiere_date': series.first_date.strftime('%d/%m/%Y'),
+        'var_1j': calc_perf(vl_1d) or 0,
+        'var_1m': calc_perf(vl_1m) or 0,
+        'var_1y': calc_perf(vl_1y) or 0,
+        'var_ytd': perf_calendaires['ytd'] or 0,
+        'var_origine': perf_glissantes['origine'] or 0,
+        'nb_vl': len(series),
+    }
+
+    # Tracking Error (volatilité annualisée) pour différentes périodes
+    tracking_error = {key: tracking_error_since(series, start) for key, start in starts.items()}
+    tracking_error['origine'] = tracking_error_since(series, series.first_date)
+
+    # Statistiques de l'onglet Analyse
+    analyse_stats = analyse_statistics(series, running)
+    stats['volatilite'] = analyse_stats.get('volatilite_ann', 0)
+
+    result.update({
+        'stats': stats,
+        'perf_calendaires': perf_calendaires,
+        'perf_glissantes': perf_glissantes,
+        'tracking_error': tracking_error,
+        'analyse_stats': analyse_stats,
+    })
+    return result
+
+
+def fmt_perf(val):
+    """Performance formatée (+1.23% / N/A)"""
+    if val is None:
+        return 'N/A'
+    sign = '+' if val >= 0 else ''
+    return f'{sign}{val:.2f}%'
+
+
+def factsheet_preview(series, max_chart_points=50):
+    """
+    Données VL de la prévisualisation du factsheet pour une série arrêtée
+    à la fin du mois : dernière VL, performances, statistiques et courbe
+    base 100. None si la série est vide.
+    """
+    n = len(series)
+    if not n:
+        return None
+
+    latest_date = series.last_date
+    latest_value = series.last_value
+
+    def get_perf(days_back):
+        # Dernière VL antérieure (hors dernière) à la date de référence
+        if n < 2:
+            return None
+        ref = series.value_asof(latest_date - timedelta(days=days_back))
+        if ref is None:
+            return None
+        return (latest_value / ref - 1) * 100
+
+    def get_perf_since(start_date):
+        sub = series.since(start_date)
+        if len(sub) < 2:
+            return None
+        return (sub.last_value / sub.first_value - 1) * 100
+
+    starts = period_starts(latest_date)
+
+    # Statistiques
+    volatilite = None
+    sharpe = None
+    max_dd = None
+    if n > 1:
+        rendements = series.returns()
+        volatilite = sample_std(rendements) * ANNUALIZATION_FACTOR
+        sharpe = sharpe_ratio(rendements)
+        max_dd = max_drawdown(series.values)
+
+    # Courbe base 100, échantillonnée à `max_chart_points` points environ
+    step = max(1, n // max_chart_points)
+    indices = list(range(0, n, step))
+    if indices[-1] != n - 1:
+        indices.append(n - 1)
+    date_strings = series.date_strings()
+    first_value = series.first_value
+    chart_data = [
+        {'date': date_strings[i], 'value': round(float(series.values[i]) / first_value * 100, 2)}
+        for i in indices
+    ]
+
+    return {
+        'latest_vl': {
+            'date': latest_date.strftime('%d/%m/%Y'),
+            'valeur': f"{latest_value:,.4f}".replace(',', ' ')
+        },
+        'performances': {
+            'todate': {key: fmt_perf(get_perf_since(start)) for key, start in starts.items()},
+            'glissantes': {
+                '1m': fmt_perf(get_perf(30)),
+                '3m': fmt_perf(get_perf(91)),
+                '6m': fmt_perf(get_perf(182)),
+                '1y': fmt_perf(get_perf(365)),
+                '3y': fmt_perf(get_perf(365 * 3)),
+                '5y': fmt_perf(get_perf(365 * 5)),
+                'origine': fmt_perf((latest_value / first_value - 1) * 100),
+            }
+        },
+        'statistics': {
+            'volatilite': f"{volatilite:.2f}%" if volatilite else 'N/A',
+            'sharpe': f"{sharpe:.2f}" if sharpe else 'N/A',
+            'max_drawdown': f"-{max_dd:.2f}%" if max_dd else 'N/A',
+            'nb_observations': n,
+        },
+        'chart_data': chart_data,
+    }
+
+
+def scatter_statistics(series_by_name, period='origin', min_points=30):
+    """
+    Rendement et volatilité annualisée (%) de plusieurs FCP sur une période
+    (origin, wtd, mtd, qtd, std, ytd) pour le nuage rendement / risque :
+    {nom: (rendement, volatilite)}.
+
+    La VL de référence est la dernière VL avant le début de la période
+    (première VL pour origin) ; la volatilité porte sur les VL depuis cette
+    référence. Les FCP d'au plus `min_points` VL, ou sans VL de référence,
+    sont absents. Toutes les séries sont traitées ensemble : les segments
+    sont concaténés et les moyennes / variances calculées par FCP avec
+    np.bincount.
+    """
+    names = []
+    segments = []
+    for name, series in series_by_name.items():
+        if len(series) <= min_points:
+            continue
+        starts = period_starts(series.last_date)
+        if period in starts:
+            ref = int(np.searchsorted(series.date_index, np.datetime64(starts[period], 'D'), side='left')) - 1
+            if ref < 0:
+                continue
+        else:
+            ref = 0
+        names.append(name)
+        segments.append(series.values[ref:])
+    if not names:
+        return {}
+
+    lengths = np.array([len(segment) for segment in segments])
+    values = np.concatenate(segments)
+    firsts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+    lasts = firsts + lengths - 1
+    rendements = (values[lasts] / values[firsts] - 1) * 100
+
+    # Rendements quotidiens de tous les segments, sans les paires à cheval sur deux FCP
+    daily = (values[1:] / values[:-1] - 1) * 100
+    keep = np.ones(daily.size, dtype=bool)
+    keep[lasts[:-1]] = False
+    daily = daily[keep]
+
+    # Volatilité nulle avec moins de 2 rendements (comme annualized_volatility)
+    counts = lengths - 1
+    fund = np.repeat(np.arange(len(names)), counts)
+    means = np.bincount(fund, weights=daily, minlength=len(names)) / np.maximum(counts, 1)
+    squares = np.bincount(fund, weights=(daily - means[fund]) ** 2, minlength=len(names))
+    volatilites = np.where(
+        counts >= 2, np.sqrt(squares / np.maximum(counts - 1, 1)) * ANNUALIZATION_FACTOR, 0.0
+    )
+
+    return {
+        name: (float(rendement), float(volatilite))
+        for name, rendement, volatilite in zip(names, rendements, volatilites)
+    }
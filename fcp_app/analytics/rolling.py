@@ -0,0 +1,126 @@
+"""
+Statistiques sur fenêtre glissante en O(n) (sommes cumulées NumPy)
+
+Chaque somme de fenêtre est obtenue par différence de deux sommes cumulées :
+le coût ne dépend plus de la taille de la fenêtre (20, 60 ou 252 jours).
+Les séries sont centrées avant le cumul pour limiter les erreurs d'arrondi
+sur les variances (invariance par translation).
+"""
+import numpy as np
+
+from .constants import ANNUALIZATION_FACTOR, RISK_FREE_RATE_DAILY
+
+# Précision relative des calculs en float64
+EPSILON = np.finfo(np.float64).eps
+
+
+def _window_sums(x, window):
+    """Somme de chaque fenêtre [i - window + 1, i], pour i >= window - 1"""
+    cumsum = np.concatenate(([0.0], np.cumsum(x)))
+    return cumsum[window:] - cumsum[:-window]
+
+
+def _check(x, window):
+    x = np.asarray(x, dtype=np.float64)
+    if window < 1:
+        raise ValueError("La fenêtre doit être >= 1")
+    return x
+
+
+def rolling_mean(x, window):
+    """Moyenne glissante (len(x) - window + 1 valeurs)"""
+    x = _check(x, window)
+    if x.size < window:
+        return np.empty(0, dtype=np.float64)
+    shift = x.mean()
+    return _window_sums(x - shift, window) / window + shift
+
+
+def rolling_cov(x, y, window, ddof=1):
+    """Covariance glissante entre x et y"""
+    x = _check(x, window)
+    y = _check(y, window)
+    if x.size != y.size:
+        raise ValueError("Les séries doivent avoir la même longueur")
+    if x.size < window:
+        return np.empty(0, dtype=np.float64)
+    if window - ddof <= 0:
+        ddof = 0
+    xc = x - x.mean()
+    yc = y - y.mean()
+    sum_x = _window_sums(xc, window)
+    sum_y = _window_sums(yc, window)
+    sum_xy = _window_sums(xc * yc, window)
+    return (sum_xy - sum_x * sum_y / window) / (window - ddof)
+
+
+def _variance_tolerance(x, window, ddof):
+    """
+    Erreur d'arrondi absolue de chaque variance glissante. Les sommes de
+    fenêtre sont des différences de sommes cumulées : leur erreur dépend de
+    l'amplitude de ces sommes aux deux bornes de la fenêtre, pas de la
+    variance de la série complète.
+    """
+    if window - ddof <= 0:
+        ddof = 0
+    xc = x - x.mean()
+    cum_x = np.concatenate(([0.0], np.cumsum(xc)))
+    cum_xx = np.concatenate(([0.0], np.cumsum(xc * xc)))
+    sum_x = cum_x[window:] - cum_x[:-window]
+    amplitude = (
+        cum_xx[window:] + cum_xx[:-window]
+        + (np.abs(cum_x[window:]) + np.abs(cum_x[:-window])) * np.abs(sum_x) / window
+    )
+    return window * EPSILON * amplitude / (window - ddof)
+
+
+def rolling_var(x, window, ddof=1):
+    """
+    Variance glissante (non biaisée par défaut). Les valeurs inférieures à
+    l'erreur d'arrondi de leur fenêtre (résidus des fenêtres constantes)
+    sont ramenées à 0.
+    """
+    x = _check(x, window)
+    variance = rolling_cov(x, x, window, ddof=ddof)
+    if variance.size:
+        variance[variance <= _variance_tolerance(x, window, ddof)] = 0.0
+    return variance
+
+
+def rolling_std(x, window, ddof=1):
+    """Écart-type glissant (non biaisé par défaut)"""
+    return np.sqrt(rolling_var(x, window, ddof=ddof))
+
+
+def rolling_volatility(rendements, window):
+    """Volatilité annualisée glissante (%)"""
+    return rolling_std(rendements, window) * ANNUALIZATION_FACTOR
+
+
+def rolling_sharpe(rendements, window):
+    """Ratio de Sharpe annualisé glissant (0 si écart-type nul)"""
+    moyennes = rolling_mean(rendements, window)
+    ecarts_types = rolling_std(rendements, window)
+    sharpe = np.zeros_like(moyennes)
+    mask = ecarts_types > 0
+    sharpe[mask] = (moyennes[mask] - RISK_FREE_RATE_DAILY) / ecarts_types[mask] * ANNUALIZATION_FACTOR
+    return sharpe
+
+
+def rolling_beta(rendements, rendements_benchmark, window, default=1.0):
+    """Beta glissant cov(fcp, benchmark) / var(benchmark), `default` si variance nulle"""
+    covariance = rolling_cov(rendements, rendements_benchmark, window, ddof=0)
+    var_bench = rolling_var(rendements_benchmark, window, ddof=0)
+    beta = np.full_like(covariance, default)
+    mask = var_bench > 0
+    beta[mask] = covariance[mask] / var_bench[mask]
+    return beta
+
+
+def rolling_count(mask, window):
+    """Nombre de valeurs vraies dans chaque fenêtre"""
+    mask = np.asarray(mask, dtype=np.int64)
+    if mask.size < window:
+        return np.empty(0, dtype=np.int64)
+    cumsum = np.concatenate(([0], np.cumsum(mask)))
+    return cumsum[window:] - cumsum[:-window]
@@ -0,0 +1,282 @@
+"""
+Statistiques depuis l'origine mises à jour en O(1) par nouvelle VL
+
+RunningStats accumule les moments centrés des rendements quotidiens
+(moyenne, sommes des écarts puissance 2, 3 et 4, mises à jour de
+Welford / Terriberry), le plus haut et le drawdown maximum, les jours
+positifs / négatifs et la semi-variance. L'accumulateur de chaque FCP est
+enregistré dans FcpRunningStats : la synchronisation y ajoute les nouvelles
+VL sans relire l'historique, les vues le lisent tant qu'il est à jour
+(même version des VL que la base).
+"""
+from math import sqrt
+
+import numpy as np
+
+from .constants import ANNUALIZATION_FACTOR, RISK_FREE_RATE_DAILY
+from .drawdown import max_drawdown
+
+# Champs de FcpRunningStats portés par RunningStats
+RUNNING_FIELDS = (
+    'nb_vl', 'first_date', 'first_value', 'last_date', 'last_value',
+    'mean', 'm2', 'm3', 'm4',
+    'jours_positifs', 'jours_negatifs', 'neg_sumsq',
+    'rdt_min', 'rdt_max', 'vl_min', 'vl_max', 'max_drawdown',
+)
+
+
+class RunningStats:
+    """Accumulateur des statistiques depuis l'origine d'une série de VL"""
+
+    def __init__(self, **fields):
+        self.nb_vl = 0
+        self.first_date = self.first_value = None
+        self.last_date = self.last_value = None
+        self.mean = self.m2 = self.m3 = self.m4 = 0.0
+        self.jours_positifs = self.jours_negatifs = 0
+        self.neg_sumsq = 0.0
+        self.rdt_min = self.rdt_max = None
+        self.vl_min = self.vl_max = None
+        self.max_drawdown = 0.0
+        for name, value in fields.items():
+            if name not in RUNNING_FIELDS:
+                raise TypeError(f"Champ inconnu: {name}")
+            setattr(self, name, value)
+
+    @property
+    def nb_rendements(self):
+        return max(self.nb_vl - 1, 0)
+
+    @classmethod
+    def from_series(cls, series):
+        """Accumulateur d'une série complète (calcul vectorisé)"""
+        stats = cls()
+        if not len(series):
+            return stats
+        valeurs = series.values
+        stats.nb_vl = len(series)
+        stats.first_date, stats.first_value = series.first_date, series.first_value
+        stats.last_date, stats.last_value = series.last_date, series.last_value
+        stats.vl_min, stats.vl_max = float(valeurs.min()), float(valeurs.max())
+        stats.max_drawdown = max_drawdown(valeurs)
+
+        rendements = series.returns()
+        if rendements.size:
+            stats.mean = float(rendements.mean())
+            ecarts = rendements - rendements.mean()
+            carres = ecarts * ecarts
+            stats.m2 = float(np.sum(carres))
+            stats.m3 = float(np.sum(carres * ecarts))
+            stats.m4 = float(np.sum(carres * carres))
+            negatifs = rendements[rendements < 0]
+            stats.jours_positifs = int(np.count_nonzero(rendements > 0))
+            stats.jours_negatifs = int(negatifs.size)
+            stats.neg_sumsq = float(np.dot(negatifs, negatifs))
+            stats.rdt_min, stats.rdt_max = float(rendements.min()), float(rendements.max())
+        return stats
+
+    def push(self, date, value):
+        """Ajoute une VL postérieure à la dernière VL accumulée"""
+        value = float(value)
+        if self.last_date is not None and date <= self.last_date:
+            raise ValueError(f"VL du {date} antérieure à la dernière VL accumulée ({self.last_date})")
+
+        if self.nb_vl:
+            rendement = (value / self.last_value - 1) * 100
+            n1 = self.nb_rendements
+            n = n1 + 1
+            delta = rendement - self.mean
+            delta_n = delta / n
+            delta_n2 = delta_n * delta_n
+            term1 = delta * delta_n * n1
+            self.mean += delta_n
+            self.m4 += term1 * delta_n2 * (n * n - 3 * n + 3) + 6 * delta_n2 * self.m2 - 4 * delta_n * self.m3
+            self.m3 += term1 * delta_n * (n - 2) - 3 * delta_n * self.m2
+            self.m2 += term1
+
+            if rendement > 0:
+                self.jours_positifs += 1
+            elif rendement < 0:
+                self.jours_negatifs += 1
+                self.neg_sumsq += rendement * rendement
+            self.rdt_min = rendement if self.rdt_min is None else min(self.rdt_min, rendement)
+            self.rdt_max = rendement if self.rdt_max is None else max(self.rdt_max, rendement)
+        else:
+            self.first_date, self.first_value = date, value
+
+        self.nb_vl += 1
+        self.last_date, self.last_value = date, value
+        self.vl_min = value if self.vl_min is None else min(self.vl_min, value)
+        self.vl_max = value if self.vl_max is None else max(self.vl_max, value)
+        # Le plus haut historique est la VL maximum
+        self.max_drawdown = max(self.max_drawdown, (self.vl_max - value) / self.vl_max * 100)
+
+    def matches(self, series):
+        """True si l'accumulateur porte sur toute la série (même nombre de VL, mêmes bornes)"""
+        return (
+            self.nb_vl == len(series) and self.nb_vl > 0
+            and self.first_date == series.first_date and self.last_date == series.last_date
+        )
+
+    def ecart_type(self):
+        """Écart-type non biaisé des rendements (population si un seul rendement)"""
+        n = self.nb_rendements
+        if n == 0:
+            return 0.0
+        return sqrt(max(self.m2, 0.0) / (n - 1 if n > 1 else 1))
+
+    def rendement_origine(self):
+        """Performance depuis la première VL (%)"""
+        return (self.last_value / self.first_value - 1) * 100
+
+    def volatilite_ann(self):
+        """Volatilité annualisée, None si moins de 2 rendements (comme annualized_volatility)"""
+        if self.nb_rendements < 2:
+            return None
+        return self.ecart_type() * ANNUALIZATION_FACTOR
+
+    def statistics(self):
+        """
+        Statistiques descriptives et profil de risque de l'onglet Analyse
+        (mêmes clés et arrondis que analyse_statistics), dict vide si moins
+        de 2 VL.
+        """
+        n = self.nb_rendements
+        if n == 0:
+            return {}
+
+        ecart_type = self.ecart_type()
+        excess = self.mean - RISK_FREE_RATE_DAILY
+        sharpe = excess / ecart_type * ANNUALIZATION_FACTOR if ecart_type > 0 else 0.0
+
+        sortino = 0.0
+        if self.jours_negatifs:
+            downside_var = self.neg_sumsq / (self.jours_negatifs - 1) if self.jours_negatifs > 1 else self.neg_sumsq
+            downside_std = downside_var ** 0.5
+            if downside_std > 0:
+                sortino = excess / downside_std * ANNUALIZATION_FACTOR
+
+        if ecart_type > 0:
+            skewness = self.m3 / (n * ecart_type ** 3)
+            kurtosis = self.m4 / (n * ecart_type ** 4) - 3
+        else:
+            skewness = kurtosis = 0.0
+
+        return {
+            'nb_observations': n,
+            'rendement_moyen': round(self.mean, 4),
+            'rendement_moyen_ann': round(self.mean * 365, 2),
+            'ecart_type': round(ecart_type, 4),
+            'volatilite_ann': round(ecart_type * ANNUALIZATION_FACTOR, 2),
+            'vl_min': round(self.vl_min, 2),
+            'vl_max': round(self.vl_max, 2),
+            'rdt_min': round(self.rdt_min, 2),
+            'rdt_max': round(self.rdt_max, 2),
+            'max_drawdown': round(self.max_drawdown, 2),
+            'sharpe': round(sharpe, 2),
+            'sortino': round(sortino, 2),
+            'jours_positifs': self.jours_positifs,
+            'jours_negatifs': self.jours_negatifs,
+            'ratio_positif': round(self.jours_positifs / n * 100, 1),
+            'skewness': round(skewness, 3),
+            'kurtosis': round(kurtosis, 3),
+        }
+
+    def as_fields(self):
+        return {name: getattr(self, name) for name in RUNNING_FIELDS}
+
+
+# ============================================================================
+# Accumulateurs enregistrés (FcpRunningStats)
+# ============================================================================
+
+def _data_versions(fcp_names):
+    """Version courante des VL de plusieurs FCP : {nom: version} (absents si jamais modifiées)"""
+    from ..models import VLDataVersion
+    return dict(VLDataVersion.objects.filter(fcp_name__in=list(fcp_names)).values_list('fcp_name', 'version'))
+
+
+def get_many_running_stats(fcp_names):
+    """Accumulateurs à jour de plusieurs FCP : {nom: RunningStats} (deux requêtes)"""
+    from ..models import FcpRunningStats
+
+    fcp_names = list(fcp_names)
+    versions = _data_versions(fcp_names)
+    rows = FcpRunningStats.objects.filter(fcp_name__in=fcp_names).values('fcp_name', 'data_version', *RUNNING_FIELDS)
+    result = {}
+    for row in rows:
+        name = row.pop('fcp_name')
+        if row.pop('data_version') == versions.get(name, 0):
+            result[name] = RunningStats(**row)
+    return result
+
+
+def get_running_stats(fcp_name):
+    """Accumulateur à jour d'un FCP, None s'il est absent ou périmé"""
+    return get_many_running_stats([fcp_name]).get(fcp_name)
+
+
+def save_running_stats(fcp_name, stats, data_version):
+    from ..models import FcpRunningStats
+
+    FcpRunningStats.objects.update_or_create(
+        fcp_name=fcp_name,
+        defaults={'data_version': data_version, **stats.as_fields()},
+    )
+
+
+def rebuild_running_stats(fcp_name, series=None):
+    """Recalcule l'accumulateur d'un FCP sur tout son historique et l'enregistre"""
+    from .cache import get_series
+
+    # Version lue avant le chargement : une modification concurrente rend l'accumulateur périmé
+    version = _data_versions([fcp_name]).get(fcp_name, 0)
+    if series is None:
+        series = get_series(fcp_name)
+    if series is None:
+        return None
+    stats = RunningStats.from_series(series)
+    save_running_stats(fcp_name, stats, version)
+    return stats
+
+
+def append_running_stats(fcp_name, rows, base_version):
+    """
+    Ajoute à l'accumulateur d'un FCP les VL [(date, valeur), ...] insérées
+    après sa dernière date, sans relire l'historique. `base_version` est la
+    version des VL lue avant l'insertion (suivie d'un seul vl_changed).
+    Recalcul complet si l'accumulateur n'était pas à jour avant l'insertion,
+    si une date n'est pas postérieure à sa dernière date ou si les VL ont
+    été modifiées par ailleurs entre-temps.
+    """
+    from ..models import FcpRunningStats
+
+    record = FcpRunningStats.objects.filter(fcp_name=fcp_name).values('data_version', *RUNNING_FIELDS).first()
+    rows = sorted(rows)
+    version = _data_versions([fcp_name]).get(fcp_name, 0)
+    if (
+        record is None
+        or record.pop('data_version') != base_version
+        or version != base_version + 1
+        or (rows and record['last_date'] is not None and rows[0][0] <= record['last_date'])
+    ):
+        return rebuild_running_stats(fcp_name)
+
+    stats = RunningStats(**record)
+    for d, valeur in rows:
+        stats.push(d, valeur)
+    save_running_stats(fcp_name, stats, version)
+    return stats
+
+
+def running_scatter_statistics(running_by_name, min_points=30):
+    """
+    Rendement et volatilité annualisée (%) depuis l'origine lus dans les
+    accumulateurs, comme scatter_statistics(period='origin') : {nom: (rendement, volatilite)}.
+    Les FCP d'au plus `min_points` VL sont absents.
+    """
+    return {
+        name: (stats.rendement_origine(), stats.volatilite_ann() or 0.0)
+        for name, stats in running_by_name.items()
+        if stats.nb_vl > min_points
+    }
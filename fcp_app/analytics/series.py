@@ -0,0 +1,114 @@
+"""
+Chargement des séries de valeurs liquidatives en mémoire (tableaux NumPy)
+"""
+from bisect import bisect_left, bisect_right
+
+import numpy as np
+
+
+class VLSeries:
+    """
+    Série de valeurs liquidatives d'un FCP, triée par date croissante.
+
+    - dates : liste de datetime.date
+    - values : tableau NumPy float64 des VL
+    - date_index : tableau datetime64[D] des dates (recherche vectorisée)
+    """
+
+    def __init__(self, dates, values, date_index=None):
+        self.dates = list(dates)
+        self.values = np.asarray(values, dtype=np.float64)
+        if date_index is None:
+            date_index = np.array(self.dates, dtype='datetime64[D]')
+        self.date_index = date_index
+
+    def __len__(self):
+        return len(self.dates)
+
+    def __repr__(self):
+        if not self.dates:
+            return '<VLSeries vide>'
+        return f'<VLSeries {len(self)} VL du {self.dates[0]} au {self.dates[-1]}>'
+
+    @property
+    def first_date(self):
+        return self.dates[0] if self.dates else None
+
+    @property
+    def last_date(self):
+        return self.dates[-1] if self.dates else None
+
+    @property
+    def first_value(self):
+        return float(self.values[0]) if self.dates else None
+
+    @property
+    def last_value(self):
+        return float(self.values[-1]) if self.dates else None
+
+    def _slice(self, start, stop):
+        return VLSeries(self.dates[start:stop], self.values[start:stop], self.date_index[start:stop])
+
+    def take(self, indices):
+        """Sous-série des VL aux positions données (triées)"""
+        return VLSeries([self.dates[i] for i in indices.tolist()], self.values[indices], self.date_index[indices])
+
+    def since(self, start_date):
+        """Sous-série des VL à partir de start_date (incluse)"""
+        start = int(np.searchsorted(self.date_index, np.datetime64(start_date, 'D'), side='left'))
+        return self._slice(start, None)
+
+    def until(self, end_date):
+        """Sous-série des VL jusqu'à end_date (incluse)"""
+        stop = int(np.searchsorted(self.date_index, np.datetime64(end_date, 'D'), side='right'))
+        return self._slice(None, stop)
+
+    def point_asof(self, as_of, strict=False):
+        """
+        (date, VL) de la dernière observation à la date as_of (incluse),
+        ou strictement avant si strict=True. None si aucune observation.
+        """
+        position = (bisect_left if strict else bisect_right)(self.dates, as_of) - 1
+        if position < 0:
+            return None
+        return self.dates[position], float(self.values[position])
+
+    def value_asof(self, as_of, strict=False):
+        """VL de référence à la date as_of (voir point_asof), None si aucune"""
+        point = self.point_asof(as_of, strict=strict)
+        return point[1] if point else None
+
+    def date_strings(self):
+        """Dates au format ISO (YYYY-MM-DD), formatées en une seule opération"""
+        return np.datetime_as_string(self.date_index, unit='D').tolist()
+
+    def returns(self):
+        """Rendements quotidiens (%) de la série"""
+        from .stats import daily_returns
+        return daily_returns(self.values)
+
+    def to_records(self):
+        """Liste [{'date': 'YYYY-MM-DD', 'valeur': float}] pour les réponses JSON"""
+        return [
+            {'date': d, 'valeur': v}
+            for d, v in zip(self.date_strings(), self.values.tolist())
+        ]
+
+
+def load_series(vl_model, start_date=None, end_date=None):
+    """
+    Charge la série d'un modèle VL en une seule requête (date, valeur).
+    Les Decimal sont convertis une fois en float64.
+    """
+    queryset = vl_model.objects.order_by('date')
+    if start_date:
+        queryset = queryset.filter(date__gte=start_date)
+    if end_date:
+        queryset = queryset.filter(date__lte=end_date)
+
+    rows = list(queryset.values_list('date', 'valeur'))
+    if not rows:
+        return VLSeries([], np.empty(0, dtype=np.float64))
+
+    dates, valeurs = zip(*rows)
+    return VLSeries(dates, np.array(valeurs, dtype=np.float64))
@@ -0,0 +1,114 @@
+"""
+Instantanés de statistiques précalculées (FcpAnalyticsSnapshot)
+
+Les instantanés sont construits par la commande build_analytics_snapshots
+(lancée aussi en fin de sync_vl_sharepoint). Les vues lisent l'instantané
+et ne recalculent à la volée que s'il est absent ou périmé (VL modifiées
+depuis son calcul).
+"""
+from datetime import date, timedelta
+
+from .cache import get_series
+from .performance import fund_analytics, factsheet_preview
+from .running import RunningStats, get_running_stats, save_running_stats
+
+
+def current_version(fcp_name):
+    """Version courante des VL d'un FCP (0 si jamais modifiées)"""
+    from ..models import VLDataVersion
+    version = VLDataVersion.objects.filter(fcp_name=fcp_name).values_list('version', flat=True).first()
+    return version or 0
+
+
+def month_end(month):
+    """Dernier jour d'un mois au format YYYY-MM"""
+    year, month_num = int(month.split('-')[0]), int(month.split('-')[1])
+    next_month = date(year, month_num, 1) + timedelta(days=32)
+    return next_month.replace(day=1) - timedelta(days=1)
+
+
+def get_snapshot(fcp_name, type_snapshot, as_of_date=None):
+    """
+    Payload de l'instantané à jour d'un FCP (le plus récent si as_of_date
+    n'est pas précisée), None s'il n'existe pas ou s'il est périmé.
+    """
+    from ..models import FcpAnalyticsSnapshot
+
+    queryset = FcpAnalyticsSnapshot.objects.filter(fcp_name=fcp_name, type_snapshot=type_snapshot)
+    if as_of_date is not None:
+        queryset = queryset.filter(as_of_date=as_of_date)
+    snapshot = queryset.order_by('-as_of_date').values_list('data_version', 'payload').first()
+    if snapshot is None or snapshot[0] != current_version(fcp_name):
+        return None
+    return snapshot[1]
+
+
+def save_snapshot(fcp_name, type_snapshot, as_of_date, payload, data_version):
+    """Enregistre (ou remplace) l'instantané d'un FCP à une date d'arrêté"""
+    from ..models import FcpAnalyticsSnapshot
+
+    FcpAnalyticsSnapshot.objects.update_or_create(
+        fcp_name=fcp_name,
+        type_snapshot=type_snapshot,
+        as_of_date=as_of_date,
+        defaults={'payload': payload, 'data_version': data_version},
+    )
+
+
+def get_fund_analytics(fcp_name, series=None):
+    """
+    Statistiques de la page Valeurs Liquidatives : instantané ou calcul à la
+    volée (statistiques depuis l'origine lues dans l'accumulateur s'il est à jour)
+    """
+    from ..models import TypeSnapshot
+
+    payload = get_snapshot(fcp_name, TypeSnapshot.ANALYSE)
+    if payload is not None:
+        return payload
+    if series is None:
+        series = get_series(fcp_name)
+    return fund_analytics(series, get_running_stats(fcp_name))
+
+
+def get_factsheet_preview(fcp_name, month):
+    """Données VL du factsheet d'un mois : instantané ou calcul à la volée"""
+    from ..models import TypeSnapshot
+
+    end_of_month = month_end(month)
+    payload = get_snapshot(fcp_name, TypeSnapshot.FACTSHEET, end_of_month)
+    if payload is not None:
+        return payload
+    return factsheet_preview(get_series(fcp_name).until(end_of_month))
+
+
+def build_snapshots(fcp_name, months=()):
+    """
+    Calcule et enregistre les instantanés d'un FCP : statistiques complètes
+    à la dernière date en base et factsheets des mois demandés (YYYY-MM).
+    Reconstruit aussi l'accumulateur FcpRunningStats s'il n'est pas à jour.
+    Retourne le nombre d'instantanés enregistrés.
+    """
+    from ..models import TypeSnapshot
+
+    # Version lue avant les calculs : une modification concurrente rend
+    # l'instantané périmé au lieu de le masquer
+    version = current_version(fcp_name)
+    series = get_series(fcp_name)
+    if series is None or not len(series):
+        return 0
+
+    # Accumulateur des statistiques depuis l'origine recalculé s'il est absent ou périmé
+    running = get_running_stats(fcp_name)
+    if running is None:
+        running = RunningStats.from_series(series)
+        save_running_stats(fcp_name, running, version)
+    save_snapshot(fcp_name, TypeSnapshot.ANALYSE, series.last_date, fund_analytics(series, running), version)
+    count = 1
+
+    for month in months:
+        end_of_month = month_end(month)
+        payload = factsheet_preview(series.until(end_of_month))
+        if payload is not None:
+            save_snapshot(fcp_name, TypeSnapshot.FACTSHEET, end_of_month, payload, version)
+            count += 1
+    return count
@@ -0,0 +1,205 @@
+"""
+Statistiques de rendement et de risque vectorisées (NumPy)
+
+Toutes les fonctions travaillent sur des tableaux float64 : rendements
+quotidiens exprimés en % et valeurs liquidatives.
+"""
+import numpy as np
+
+from .constants import ANNUALIZATION_FACTOR, RISK_FREE_RATE_DAILY
+from .drawdown import drawdown_curve, max_drawdown, drawdown_episodes
+from .running import RunningStats
+
+
+def daily_returns(values):
+    """Rendements quotidiens en % : (VL[t] / VL[t-1] - 1) * 100"""
+    values = np.asarray(values, dtype=np.float64)
+    if values.size < 2:
+        return np.empty(0, dtype=np.float64)
+    return (values[1:] / values[:-1] - 1) * 100
+
+
+def sample_std(rendements):
+    """Écart-type non biaisé (ddof=1), population si une seule observation"""
+    rendements = np.asarray(rendements, dtype=np.float64)
+    if rendements.size == 0:
+        return 0.0
+    return float(np.std(rendements, ddof=1 if rendements.size > 1 else 0))
+
+
+def annualized_volatility(rendements):
+    """Volatilité annualisée (écart-type non biaisé * sqrt(365)), None si moins de 2 rendements"""
+    if len(rendements) < 2:
+        return None
+    return float(np.std(rendements, ddof=1)) * ANNUALIZATION_FACTOR
+
+
+def sharpe_ratio(rendements):
+    """Ratio de Sharpe annualisé (taux sans risque constant)"""
+    ecart_type = sample_std(rendements)
+    if ecart_type <= 0:
+        return 0.0
+    return (float(np.mean(rendements)) - RISK_FREE_RATE_DAILY) / ecart_type * ANNUALIZATION_FACTOR
+
+
+def sortino_ratio(rendements):
+    """Ratio de Sortino annualisé (semi-variance des rendements négatifs)"""
+    rendements = np.asarray(rendements, dtype=np.float64)
+    negatifs = rendements[rendements < 0]
+    if negatifs.size == 0:
+        return 0.0
+    somme_carres = float(np.dot(negatifs, negatifs))
+    downside_var = somme_carres / (negatifs.size - 1) if negatifs.size > 1 else somme_carres
+    downside_std = downside_var ** 0.5
+    if downside_std <= 0:
+        return 0.0
+    return (float(np.mean(rendements)) - RISK_FREE_RATE_DAILY) / downside_std * ANNUALIZATION_FACTOR
+
+
+def skewness_kurtosis(rendements):
+    """Asymétrie et excess kurtosis (0 pour une loi normale)"""
+    rendements = np.asarray(rendements, dtype=np.float64)
+    ecart_type = sample_std(rendements)
+    if ecart_type <= 0:
+        return 0.0, 0.0
+    n = rendements.size
+    ecarts = rendements - rendements.mean()
+    carres = ecarts * ecarts
+    skewness = float(np.sum(carres * ecarts)) / (n * ecart_type ** 3)
+    kurtosis = float(np.sum(carres * carres)) / (n * ecart_type ** 4) - 3
+    return skewness, kurtosis
+
+
+def historical_var(rendements_sorted, level):
+    """VaR historique : percentile `level` (ex: 0.05) des rendements triés"""
+    return float(rendements_sorted[int(rendements_sorted.size * level)])
+
+
+def conditional_var(rendements, var):
+    """CVaR / Expected Shortfall : moyenne des rendements au-delà de la VaR"""
+    queue = rendements[rendements <= var]
+    return float(queue.mean()) if queue.size else var
+
+
+def return_histogram(rendements, nb_bins=30):
+    """Histogramme des rendements en `nb_bins` classes [début, fin)"""
+    n = rendements.size
+    hist_min = float(rendements.min())
+    hist_max = float(rendements.max())
+    bin_width = (hist_max - hist_min) / nb_bins if hist_max != hist_min else 1
+    starts = hist_min + np.arange(nb_bins) * bin_width
+    ends = starts + bin_width
+
+    # Classe de chaque rendement : dernier début <= r, conservé si r < fin de classe
+    idx = np.searchsorted(starts, rendements, side='right') - 1
+    valid = idx >= 0
+    valid[valid] = rendements[valid] < ends[idx[valid]]
+    counts = np.bincount(idx[valid], minlength=nb_bins)
+
+    return [
+        {
+            'bin_start': round(start, 3),
+            'bin_end': round(end, 3),
+            'count': count,
+            'frequency': round(count / n * 100, 2)
+        }
+        for start, end, count in zip(starts.tolist(), ends.tolist(), counts.tolist())
+    ]
+
+
+def tracking_error_since(series, start_date):
+    """Tracking error (volatilité annualisée, %) depuis une date de référence"""
+    if start_date is None:
+        return None
+    volatilite = annualized_volatility(series.since(start_date).returns())
+    return round(volatilite, 2) if volatilite is not None else None
+
+
+def risk_statistics(series):
+    """
+    Indicateurs de risque d'une (sous-)série : volatilité, max drawdown,
+    VaR 95%, tracking error, Sharpe et Sortino. None si moins de 2 VL.
+    """
+    rendements = series.returns()
+    if rendements.size == 0:
+        return {'vol': None, 'max_dd': None, 'var95': None, 'te': None, 'sharpe': None, 'sortino': None}
+
+    ecart_type = sample_std(rendements)
+    vol = ecart_type * ANNUALIZATION_FACTOR if ecart_type > 0 else 0
+    var95 = historical_var(np.sort(rendements), 0.05)
+
+    return {
+        'vol': vol,
+        'max_dd': max_drawdown(series.values),
+        'var95': abs(var95),
+        'te': vol,
+        'sharpe': sharpe_ratio(rendements),
+        'sortino': sortino_ratio(rendements),
+    }
+
+
+def analyse_statistics(series, running=None):
+    """
+    Statistiques complètes de l'onglet Analyse : descriptives, profil de
+    risque, distribution des rendements et données des graphiques.
+    Les statistiques descriptives et le profil de risque sont lus dans
+    `running` (accumulateur RunningStats) s'il porte sur toute la série.
+    Retourne un dict vide si la série compte moins de 2 VL.
+    """
+    valeurs = series.values
+    rendements = series.returns()
+    n = rendements.size
+    if n == 0:
+        return {}
+
+    # Statistiques descriptives et profil de risque
+    if running is None or not running.matches(series):
+        running = RunningStats.from_series(series)
+    descriptives = running.statistics()
+    rendements_sorted = np.sort(rendements)
+
+    # VaR / CVaR historiques
+    var_95 = historical_var(rendements_sorted, 0.05)
+    var_99 = historical_var(rendements_sorted, 0.01)
+    cvar_95 = conditional_var(rendements, var_95)
+    cvar_99 = conditional_var(rendements, var_99)
+
+    # Drawdowns
+    dd_curve = drawdown_curve(valeurs)
+    underwater_data = [
+        {'date': d, 'drawdown': round(dd, 2)}  # Négatif pour l'affichage
+        for d, dd in zip(series.date_strings(), (-dd_curve).tolist())
+    ]
+
+    return {
+        # Statistiques descriptives
+        'nb_observations': n,
+        'rendement_moyen': descriptives['rendement_moyen'],
+        'rendement_moyen_ann': descriptives['rendement_moyen_ann'],
+        'mediane': round(float(np.median(rendements)), 4),
+        'ecart_type': descriptives['ecart_type'],
+        'volatilite_ann': descriptives['volatilite_ann'],
+        'vl_min': descriptives['vl_min'],
+        'vl_max': descriptives['vl_max'],
+        'rdt_min': descriptives['rdt_min'],
+        'rdt_max': descriptives['rdt_max'],
+        # Profil de risque
+        'max_drawdown': descriptives['max_drawdown'],
+        'sharpe': descriptives['sharpe'],
+        'sortino': descriptives['sortino'],
+        'jours_positifs': descriptives['jours_positifs'],
+        'jours_negatifs': descriptives['jours_negatifs'],
+        'ratio_positif': descriptives['ratio_positif'],
+        # Distribution des rendements
+        'skewness': descriptives['skewness'],
+        'kurtosis': descriptives['kurtosis'],
+        'var_95': round(var_95, 3),
+        'var_99': round(var_99, 3),
+        'cvar_95': round(cvar_95, 3),
+        'cvar_99': round(cvar_99, 3),
+        # Données pour graphiques (JSON)
+        'histogram_data': return_histogram(rendements),
+        'underwater_data': underwater_data,
+        'drawdowns_data': drawdown_episodes(series.dates, valeurs, limit=10),  # Top 10 drawdowns
+        'rendements_list': [round(r, 4) for r in rendements.tolist()],  # Pour histogramme JS
+    }
@@ -4,3 +4,11 @@ from django.apps import AppConfig
 class FcpAppConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'fcp_app'
+
+    def ready(self):
+        from django.db.backends.signals import connection_created
+        from .db import configure_sqlite
+        from .signals import connect_signals
+        connect_signals()
+        # PRAGMA SQLite (WAL, cache, mmap) à l'ouverture de chaque connexion
+        connection_created.connect(configure_sqlite, dispatch_uid='fcp_configure_sqlite')
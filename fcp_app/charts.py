@@ -0,0 +1,242 @@
+"""
+Graphiques d'évolution des VL pour les exports (matplotlib)
+
+Le rendu est une fonction pure (dates, valeurs, libellé, template) -> PNG,
+sans accès à la base : les graphiques de plusieurs FCP sont rendus en
+parallèle dans un pool de processus puis insérés dans l'ordre des slides.
+Le pool est unique pour le processus (créé au premier export, réutilisé
+ensuite) et borné à quelques processus démarrés en 'spawn' : pas de copie
+du serveur web ni de ses connexions, pas de pool par requête.
+
+Les courbes sont réduites par LTTB à CHART_MAX_POINTS points avant le rendu
+(la figure fait ~1100 pixels de large : au-delà, les points se superposent).
+
+Les PNG peuvent être conservés dans un cache disque (ChartCache) adressé par
+le contenu : la clé est un hash des données tracées et des paramètres de
+rendu, une VL corrigée produit donc une nouvelle clé.
+"""
+import hashlib
+import io
+import json
+import multiprocessing
+import os
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from importlib.metadata import version
+from pathlib import Path
+
+import numpy as np
+
+from .analytics.downsample import lttb_indices
+
+CHART_FIGSIZE = (11, 4)
+CHART_DPI = 100
+CHART_MAX_POINTS = 1000
+
+# Processus de rendu par défaut (settings.FCP_CHART_WORKERS)
+DEFAULT_CHART_WORKERS = 2
+
+# Styles de courbe par template (couleur, épaisseur, remplissage, fond)
+CHART_STYLES = {
+    'moderne': {'color': '#6633cc', 'linewidth': 2.5, 'fill_alpha': 0.3, 'background': '#f8f5ff'},
+    'minimaliste': {'color': '#212121', 'linewidth': 2, 'fill_alpha': None, 'background': 'white'},
+    'standard': {'color': '#004080', 'linewidth': 2, 'fill_alpha': 0.2, 'background': '#f5f7fa'},
+}
+
+
+def render_vl_chart(dates, values, fcp_name, template='standard', figsize=CHART_FIGSIZE, dpi=CHART_DPI):
+    """Graphique d'évolution de la VL d'un FCP : contenu PNG (bytes)"""
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+
+    style = CHART_STYLES.get(template, CHART_STYLES['standard'])
+    fig, ax = plt.subplots(figsize=figsize, dpi=dpi)
+
+    if style['fill_alpha'] is not None:
+        ax.fill_between(dates, values, alpha=style['fill_alpha'], color=style['color'])
+    ax.plot(dates, values, color=style['color'], linewidth=style['linewidth'])
+    fig.patch.set_facecolor(style['background'])
+    ax.set_facecolor(style['background'])
+    if template == 'minimaliste':
+        ax.spines['top'].set_visible(False)
+        ax.spines['right'].set_visible(False)
+
+    ax.set_title(f'Évolution de la VL - {fcp_name}', fontsize=14, fontweight='bold', pad=10)
+    ax.set_xlabel('Date', fontsize=10)
+    ax.set_ylabel('Valeur Liquidative', fontsize=10)
+    ax.grid(True, alpha=0.3, linestyle='--')
+
+    # Format des dates
+    fig.autofmt_xdate()
+
+    plt.tight_layout()
+
+    img_buffer = io.BytesIO()
+    plt.savefig(img_buffer, format='png', bbox_inches='tight', facecolor=fig.get_facecolor())
+    plt.close(fig)
+    return img_buffer.getvalue()
+
+
+def reduce_points(dates, values, max_points=CHART_MAX_POINTS):
+    """Courbe (dates, valeurs) réduite par LTTB à au plus max_points points"""
+    if len(values) <= max_points:
+        return dates, values
+    x = np.array(dates, dtype='datetime64[D]').astype(np.int64)
+    indices = lttb_indices(x, values, max_points).tolist()
+    return [dates[i] for i in indices], [values[i] for i in indices]
+
+
+def _render_chart(args):
+    return render_vl_chart(*args)
+
+
+def _init_chart_process():
+    """Initialisation d'un processus du pool : matplotlib chargé une fois (backend Agg)"""
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot  # noqa: F401
+
+
+_pool = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+
+
+def _chart_pool(max_workers):
+    """Pool de rendu du processus, recréé seulement si sa taille change"""
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is None or _pool_workers != max_workers:
+            if _pool is not None:
+                _pool.shutdown(wait=False)
+            _pool = ProcessPoolExecutor(
+                max_workers=max_workers,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_init_chart_process
+            )
+            _pool_workers = max_workers
+        return _pool
+
+
+def _discard_pool(pool):
+    """Abandonne un pool interrompu (processus tué) : le suivant sera recréé"""
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False)
+
+
+class ChartCache:
+    """
+    Cache disque des PNG, plafonné à max_bytes. Un fichier par clé ; la date
+    de modification est mise à jour à chaque lecture et les fichiers les
+    moins récemment utilisés sont supprimés au-delà du plafond (LRU).
+    """
+
+    def __init__(self, directory, max_bytes):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+
+    @staticmethod
+    def key(dates, values, fcp_name, template, figsize=CHART_FIGSIZE, dpi=CHART_DPI):
+        """Clé du graphique : hash des données et des paramètres de rendu"""
+        digest = hashlib.sha256()
+        digest.update(json.dumps(
+            [fcp_name, template, list(figsize), dpi, version('matplotlib')]
+        ).encode('utf-8'))
+        digest.update('|'.join(d.isoformat() for d in dates).encode('ascii'))
+        digest.update(repr([float(v) for v in values]).encode('ascii'))
+        return digest.hexdigest()
+
+    def _path(self, key):
+        return self.directory / f'{key}.png'
+
+    def get(self, key):
+        """PNG en cache ou None"""
+        path = self._path(key)
+        try:
+            content = path.read_bytes()
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return content
+
+    def put(self, key, content):
+        """Enregistre un PNG (écriture atomique : fichier temporaire puis renommage)"""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as tmp:
+            tmp.write(content)
+        os.replace(tmp_path, self._path(key))
+
+    def evict(self):
+        """Supprime les PNG les moins récemment utilisés au-delà du plafond"""
+        entries = []
+        for path in self.directory.glob('*.png'):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+
+
+def render_vl_charts(charts, max_workers=None, cache=None):
+    """
+    Rend une liste de graphiques [(dates, valeurs, libellé, template), ...]
+    et retourne les PNG dans le même ordre. Au-delà d'un graphique, le rendu
+    est réparti sur le pool de processus du module (max_workers, défaut :
+    DEFAULT_CHART_WORKERS) ; max_workers=1 force le rendu dans le processus
+    courant.
+    Avec un ChartCache, seuls les graphiques absents du cache sont rendus.
+    """
+    charts = [(*reduce_points(dates, values), *params) for dates, values, *params in charts]
+    pngs = [None] * len(charts)
+    keys = [None] * len(charts)
+    if cache is not None:
+        for idx, chart in enumerate(charts):
+            keys[idx] = cache.key(*chart)
+            pngs[idx] = cache.get(keys[idx])
+
+    missing = [idx for idx, png in enumerate(pngs) if png is None]
+    for idx, png in zip(missing, _render_all([charts[idx] for idx in missing], max_workers)):
+        pngs[idx] = png
+        if cache is not None:
+            try:
+                cache.put(keys[idx], png)
+            except OSError:
+                # Cache indisponible (droits, disque plein) : l'export continue sans cache
+                pass
+
+    if cache is not None and missing:
+        cache.evict()
+    return pngs
+
+
+def _render_all(charts, max_workers):
+    if not charts:
+        return []
+    if max_workers is None:
+        max_workers = DEFAULT_CHART_WORKERS
+    max_workers = min(max_workers, os.cpu_count() or 1)
+
+    if max_workers <= 1 or len(charts) <= 1:
+        return [_render_chart(chart) for chart in charts]
+
+    pool = _chart_pool(max_workers)
+    try:
+        return list(pool.map(_render_chart, charts))
+    except BrokenProcessPool:
+        # Processus du pool tué (mémoire...) : rendu dans le processus courant
+        _discard_pool(pool)
+        return [_render_chart(chart) for chart in charts]
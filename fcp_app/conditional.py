@@ -0,0 +1,105 @@
+"""
+Réponses conditionnelles des API de lecture (ETag, 304)
+
+Le validateur d'une réponse ne dépend que des données des FCP qu'elle lit :
+version des VL (VLDataVersion, incrémentée à chaque écriture) et fiches
+signalétiques (non versionnées, table de quelques lignes). Il est calculé
+avant la vue : si le client envoie un If-None-Match encore valable, la
+réponse 304 est renvoyée sans charger de série ni rien calculer.
+Une vue dont la réponse dépend aussi d'autre chose que ces données (mois
+par défaut calculé à partir de la date du jour...) fournit une clé
+supplémentaire, mêlée au validateur.
+Pas de Last-Modified : les fiches n'ont pas de date de modification, une
+date tirée des seules versions des VL validerait à tort une réponse dont
+la fiche a changé.
+
+Les vues asynchrones (ASGI) lisent le validateur par sync_to_async avant
+condition(), qui l'appelle dans la boucle d'événements.
+
+Les réponses 200 portent en plus un Cache-Control public dont la durée
+vient de FCP_API_CACHE_MAX_AGE (0 : revalidation à chaque requête).
+"""
+import hashlib
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import condition
+
+from .models import FicheSignaletique, VLDataVersion
+
+
+def requested_fund(request):
+    """FCP du paramètre fcp (aucun s'il est absent)"""
+    fcp_name = request.GET.get('fcp')
+    return [fcp_name] if fcp_name else []
+
+
+def all_funds(request):
+    """Tous les FCP (None : toutes les fiches et toutes les VL)"""
+    return None
+
+
+def fund_validator(fcp_names=None, extra=None):
+    """
+    ETag des données de VL et des fiches signalétiques des FCP `fcp_names`
+    (tous si None) et de la clé supplémentaire `extra` : deux requêtes,
+    aucune série chargée.
+    """
+    versions = VLDataVersion.objects.order_by('fcp_name')
+    fiches = FicheSignaletique.objects.order_by('nom')
+    if fcp_names is not None:
+        fcp_names = sorted(set(fcp_names))
+        versions = versions.filter(fcp_name__in=fcp_names)
+        fiches = fiches.filter(nom__in=fcp_names)
+
+    digest = hashlib.sha1(str(getattr(settings, 'FCP_API_CACHE_VERSION', 1)).encode())
+    digest.update(repr(list(versions.values_list('fcp_name', 'version', 'updated_at'))).encode())
+    digest.update(repr(list(fiches.values_list())).encode())
+    if extra is not None:
+        digest.update(repr(extra).encode())
+    return f'"{digest.hexdigest()}"'
+
+
+def _cache_headers(response):
+    """Cache-Control des réponses 200 / 304, pas de validateur sur les erreurs"""
+    if response.status_code in (200, 304):
+        patch_cache_control(response, public=True, max_age=getattr(settings, 'FCP_API_CACHE_MAX_AGE', 60))
+    elif 'ETag' in response:
+        del response['ETag']
+    return response
+
+
+def conditional_api(fcp_names=requested_fund, extra=None):
+    """
+    Décorateur des vues API en lecture seule (synchrones ou asynchrones) :
+    ETag calculé par fund_validator() sur les FCP `fcp_names(request)` et la
+    clé `extra(request)` éventuelle, 304 avant la vue si le client a déjà la
+    réponse, Cache-Control sur les réponses 200. Les réponses d'erreur ne
+    portent pas de validateur.
+    """
+    def extra_key(request):
+        return extra(request) if extra is not None else None
+
+    def decorator(view):
+        def validator(request):
+            if not hasattr(request, '_fcp_validator'):
+                request._fcp_validator = fund_validator(fcp_names(request), extra_key(request))
+            return request._fcp_validator
+
+        conditional_view = condition(etag_func=lambda request, *args, **kwargs: validator(request))(view)
+
+        if iscoroutinefunction(view):
+            @wraps(view)
+            async def async_wrapper(request, *args, **kwargs):
+                # condition() appelle le validateur dans la boucle d'événements : lu avant
+                request._fcp_validator = await sync_to_async(fund_validator)(fcp_names(request), extra_key(request))
+                return _cache_headers(await conditional_view(request, *args, **kwargs))
+            return async_wrapper
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            return _cache_headers(conditional_view(request, *args, **kwargs))
+        return wrapper
+    return decorator
@@ -0,0 +1,104 @@
+"""
+Base SQLite en production : réglages des connexions et routage des lectures
+
+- configure_sqlite() (récepteur de connection_created) applique
+  settings.FCP_SQLITE_PRAGMAS à chaque nouvelle connexion SQLite : journal
+  WAL (les lectures ne sont plus bloquées pendant une synchronisation des
+  VL), synchronous, cache de pages, mmap et tables temporaires en mémoire.
+- ReadReplicaRouter envoie les lectures des vues marquées par
+  read_only_view() vers la connexion settings.FCP_READ_DATABASE (même
+  fichier, PRAGMA query_only) ; les écritures restent sur 'default'.
+  Dans une transaction ouverte sur 'default', les lectures y restent aussi
+  (lecture des écritures de la transaction).
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+DEFAULT_SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',  # suffisant en WAL : pas de corruption, au pire perte des derniers commits
+    'cache_size': -64000,  # valeur négative : en Kio (64 Mo)
+    'mmap_size': 256 * 1024 * 1024,
+    'temp_store': 'MEMORY',
+}
+
+_read_only = ContextVar('fcp_read_only', default=False)
+
+
+def read_database():
+    """Alias de la connexion de lecture (settings.FCP_READ_DATABASE), None s'il n'est pas configuré"""
+    alias = getattr(settings, 'FCP_READ_DATABASE', None)
+    return alias if alias and alias in settings.DATABASES else None
+
+
+def sqlite_pragmas(alias):
+    """PRAGMA appliqués aux connexions SQLite de l'alias (query_only en plus pour la connexion de lecture)"""
+    pragmas = dict(getattr(settings, 'FCP_SQLITE_PRAGMAS', DEFAULT_SQLITE_PRAGMAS) or {})
+    if alias == read_database():
+        pragmas['query_only'] = 'ON'
+    return pragmas
+
+
+def configure_sqlite(sender, connection, **kwargs):
+    """Récepteur de connection_created : PRAGMA de sqlite_pragmas() sur la nouvelle connexion"""
+    if connection.vendor != 'sqlite':
+        return
+    # Directement sur la connexion sqlite3 : hors journal des requêtes et wrappers Django
+    for name, value in sqlite_pragmas(connection.alias).items():
+        connection.connection.execute(f'PRAGMA {name} = {value}')
+
+
+@contextmanager
+def read_only():
+    """Lectures du bloc envoyées vers la connexion de lecture (si elle est configurée)"""
+    token = _read_only.set(True)
+    try:
+        yield
+    finally:
+        _read_only.reset(token)
+
+
+def read_only_view(view):
+    """Décorateur des vues en lecture seule (synchrones ou asynchrones) : voir read_only()"""
+    if iscoroutinefunction(view):
+        @wraps(view)
+        async def async_wrapper(request, *args, **kwargs):
+            with read_only():
+                return await view(request, *args, **kwargs)
+        return async_wrapper
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        with read_only():
+            return view(request, *args, **kwargs)
+    return wrapper
+
+
+class ReadReplicaRouter:
+    """Lectures des vues read_only_view() sur FCP_READ_DATABASE, tout le reste sur 'default'"""
+
+    def db_for_read(self, model, **hints):
+        alias = read_database()
+        if alias and _read_only.get() and not connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return alias
+        return None
+
+    def db_for_write(self, model, **hints):
+        # Objet lu sur la connexion de lecture puis enregistré : écriture sur 'default'
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        aliases = {DEFAULT_DB_ALIAS, read_database()}
+        if obj1._state.db in aliases and obj2._state.db in aliases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db == read_database():
+            return False
+        return None
@@ -0,0 +1,189 @@
+"""
+Exportation des VL (CSV, XLSX)
+
+Les VL sont lues FCP par FCP avec un curseur (iterator) et les rendements
+sont calculés au fil de l'eau : la mémoire utilisée ne dépend ni du nombre
+de FCP ni de la période exportée.
+
+Au-delà de XLSX_WRITE_ONLY_THRESHOLD VL, le classeur XLSX est écrit en mode
+write-only d'openpyxl (lignes écrites au fil de l'eau dans un fichier
+temporaire, styles nommés déclarés une seule fois).
+"""
+import csv
+import io
+import tempfile
+from datetime import datetime
+
+from django.http import StreamingHttpResponse, FileResponse
+
+from .models import get_vl_model
+
+# Nombre de VL lues par requête sur le curseur
+EXPORT_CHUNK_SIZE = 2000
+
+# Taille (caractères) des blocs CSV envoyés au client
+CSV_FLUSH_SIZE = 64 * 1024
+
+# Nombre total de VL au-delà duquel le XLSX est écrit en mode write-only
+XLSX_WRITE_ONLY_THRESHOLD = 20000
+
+XLSX_CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+
+def export_filename(extension):
+    """Nom du fichier exporté (horodaté)"""
+    return f'export_fcp_{datetime.now().strftime("%Y%m%d_%H%M%S")}.{extension}'
+
+
+def vl_queryset(fcp_name, start_date=None, end_date=None):
+    """VL d'un FCP sur la période, triées par date (None si le FCP n'a pas de table)"""
+    vl_model = get_vl_model(fcp_name)
+    if vl_model is None:
+        return None
+
+    queryset = vl_model.objects.order_by('date')
+    if start_date:
+        queryset = queryset.filter(date__gte=start_date)
+    if end_date:
+        queryset = queryset.filter(date__lte=end_date)
+    return queryset
+
+
+def count_vl_rows(fcps, start_date=None, end_date=None):
+    """Nombre total de VL à exporter (mêmes tables que iter_vl_rows, une requête par FCP)"""
+    querysets = (vl_queryset(fcp_name, start_date, end_date) for fcp_name in fcps)
+    return sum(queryset.count() for queryset in querysets if queryset is not None)
+
+
+def iter_vl_rows(fcp_name, start_date=None, end_date=None, with_returns=False, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    VL d'un FCP triées par date : tuples (date, valeur, rendement en %).
+    Le rendement de la première VL vaut 0 ; None si non demandé.
+    """
+    queryset = vl_queryset(fcp_name, start_date, end_date)
+    if queryset is None:
+        return
+
+    prev_val = None
+    for d, valeur in queryset.values_list('date', 'valeur').iterator(chunk_size=chunk_size):
+        rendement = None
+        if with_returns:
+            curr_val = float(valeur)
+            rendement = round(((curr_val / prev_val) - 1) * 100, 4) if prev_val else 0
+            prev_val = curr_val
+        yield d, valeur, rendement
+
+
+def iter_csv(fcps, start_date=None, end_date=None, with_returns=False, chunk_size=EXPORT_CHUNK_SIZE):
+    """Contenu CSV (séparateur ';', format français) par blocs de texte"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, delimiter=';')
+
+    yield '\ufeff'  # BOM pour Excel
+
+    # En-têtes
+    headers = ['FCP', 'Date', 'Valeur Liquidative']
+    if with_returns:
+        headers.append('Rendement (%)')
+    writer.writerow(headers)
+
+    # Données (un FCP demandé plusieurs fois n'est exporté qu'une fois)
+    for fcp_name in dict.fromkeys(fcps):
+        for d, valeur, rendement in iter_vl_rows(fcp_name, start_date, end_date, with_returns, chunk_size):
+            line = [fcp_name, d.strftime('%d/%m/%Y'), str(valeur).replace('.', ',')]
+            if with_returns:
+                line.append(str(rendement).replace('.', ','))
+            writer.writerow(line)
+
+            if buffer.tell() >= CSV_FLUSH_SIZE:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate(0)
+
+    yield buffer.getvalue()
+
+
+def csv_response(fcps, start_date=None, end_date=None, with_returns=False, chunk_size=EXPORT_CHUNK_SIZE):
+    """Réponse CSV en streaming (mémoire constante)"""
+    response = StreamingHttpResponse(
+        iter_csv(fcps, start_date, end_date, with_returns, chunk_size),
+        content_type='text/csv; charset=utf-8'
+    )
+    response['Content-Disposition'] = f'attachment; filename="{export_filename("csv")}"'
+    return response
+
+
+def xlsx_write_only_response(fcps, start_date=None, end_date=None, with_returns=False):
+    """
+    Export XLSX en mode write-only : une feuille par FCP, mise en forme
+    identique à l'export standard. Chaque colonne réutilise une cellule
+    portant son style nommé ; le classeur est écrit dans un fichier
+    temporaire renvoyé par blocs.
+    """
+    import openpyxl
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Font, Alignment, PatternFill, Border, Side, NamedStyle
+    from openpyxl.utils import get_column_letter
+
+    wb = openpyxl.Workbook(write_only=True)
+
+    thin_border = Border(
+        left=Side(style='thin'),
+        right=Side(style='thin'),
+        top=Side(style='thin'),
+        bottom=Side(style='thin')
+    )
+    wb.add_named_style(NamedStyle(
+        name='fcp_entete',
+        font=Font(bold=True, color='FFFFFF'),
+        fill=PatternFill(start_color='004080', end_color='004080', fill_type='solid'),
+        alignment=Alignment(horizontal='center', vertical='center'),
+        border=thin_border
+    ))
+    wb.add_named_style(NamedStyle(name='fcp_date', number_format='yyyy-mm-dd', border=thin_border))
+    wb.add_named_style(NamedStyle(name='fcp_vl', number_format='#,##0.0000', border=thin_border))
+    wb.add_named_style(NamedStyle(name='fcp_rendement', number_format='0.00%', border=thin_border))
+
+    headers = ['Date', 'Valeur Liquidative']
+    column_styles = ['fcp_date', 'fcp_vl']
+    if with_returns:
+        headers.append('Rendement (%)')
+        column_styles.append('fcp_rendement')
+
+    for fcp_name in dict.fromkeys(fcps):
+        if get_vl_model(fcp_name) is None:
+            continue
+        ws = wb.create_sheet(title=fcp_name[:31])  # Max 31 caractères pour le nom de feuille
+        for col in range(1, len(headers) + 1):
+            ws.column_dimensions[get_column_letter(col)].width = 18
+
+        header_cells = []
+        for header in headers:
+            cell = WriteOnlyCell(ws, value=header)
+            cell.style = 'fcp_entete'
+            header_cells.append(cell)
+        ws.append(header_cells)
+
+        # Une cellule stylée par colonne : chaque ligne est sérialisée dès l'ajout
+        row_cells = []
+        for style in column_styles:
+            cell = WriteOnlyCell(ws)
+            cell.style = style
+            row_cells.append(cell)
+
+        for d, valeur, rendement in iter_vl_rows(fcp_name, start_date, end_date, with_returns):
+            row_cells[0].value = d
+            row_cells[1].value = float(valeur)
+            if with_returns:
+                row_cells[2].value = rendement
+            ws.append(row_cells)
+
+    output = tempfile.TemporaryFile()
+    wb.save(output)
+    output.seek(0)
+    return FileResponse(
+        output,
+        as_attachment=True,
+        filename=export_filename('xlsx'),
+        content_type=XLSX_CONTENT_TYPE
+    )
@@ -0,0 +1,75 @@
+"""
+Conversion vectorisée du fichier Excel des VL
+
+Le fichier est au format large (une colonne Date puis une colonne par FCP).
+Il est converti une seule fois en format long (fcp, date, valeur) avec pandas,
+colonne par colonne, au lieu d'un parcours ligne à ligne par FCP.
+"""
+from decimal import Decimal
+
+import numpy as np
+import pandas as pd
+
+# Décimales du champ valeur des tables de VL
+VL_DECIMALS = 4
+
+# Écart en dessous duquel deux VL sont considérées identiques (champ à 4 décimales)
+VL_TOLERANCE = 1e-9
+
+
+def melt_vl_frame(df):
+    """
+    DataFrame large -> DataFrame long (fcp, date, valeur).
+    Les cellules sans date ou sans VL numérique sont ignorées ; pour une date
+    en double dans un FCP, la première occurrence est conservée.
+    """
+    if 'Date' not in df.columns:
+        raise ValueError("Colonne 'Date' non trouvée dans le fichier")
+
+    fcp_columns = [col for col in df.columns if col != 'Date']
+    wide = df[fcp_columns].apply(pd.to_numeric, errors='coerce')
+    wide.insert(0, 'date', pd.to_datetime(df['Date'], errors='coerce'))
+
+    long = wide.melt(id_vars='date', var_name='fcp', value_name='valeur')
+    long = long.dropna(subset=['date', 'valeur'])
+    long['date'] = long['date'].dt.date
+    return long.drop_duplicates(subset=['fcp', 'date'], keep='first').reset_index(drop=True)
+
+
+def split_by_fcp(long):
+    """Format long -> {nom du FCP: DataFrame (date, valeur) trié par date}"""
+    return {
+        fcp_name: group[['date', 'valeur']].sort_values('date').reset_index(drop=True)
+        for fcp_name, group in long.groupby('fcp', sort=False)
+    }
+
+
+def to_decimals(values):
+    """Valeurs float -> Decimal (même représentation que Decimal(str(valeur)))"""
+    return [Decimal(repr(valeur)) for valeur in values.tolist()]
+
+
+def vl_rows(frame):
+    """
+    DataFrame (date, valeur) -> [(date, Decimal), ...], valeurs arrondies à
+    4 décimales : les VL telles qu'elles seront relues en base.
+    """
+    return list(zip(frame['date'].tolist(), to_decimals(frame['valeur'].round(VL_DECIMALS))))
+
+
+def diff_vl_frame(frame, existing):
+    """
+    Compare les VL du fichier (DataFrame date, valeur) aux VL en base
+    (liste de tuples (date, Decimal)). Les valeurs du fichier sont arrondies
+    à 4 décimales, comme à l'enregistrement.
+    Retourne (nouvelles VL, VL modifiées, nombre de VL inchangées).
+    """
+    db = pd.DataFrame(existing, columns=['date', 'valeur_db'])
+    db['valeur_db'] = db['valeur_db'].astype(np.float64)
+    merged = frame.merge(db, on='date', how='left')
+
+    is_new = merged['valeur_db'].isna().to_numpy()
+    ecarts = np.abs(merged['valeur'].round(VL_DECIMALS).to_numpy() - merged['valeur_db'].to_numpy())
+    is_changed = ~is_new & (ecarts > VL_TOLERANCE)
+    unchanged = int(np.count_nonzero(~is_new & ~is_changed))
+    return frame[is_new], frame[is_changed], unchanged
@@ -0,0 +1,245 @@
+"""
+Instrumentation des requêtes : durée, requêtes SQL et étapes nommées
+
+TimingMiddleware mesure pour chaque requête la durée totale, le nombre de
+requêtes SQL et leur durée cumulée. Les vues peuvent découper leur travail en
+étapes nommées avec span() (gestionnaire de contexte ou décorateur) :
+
+    with span('load series'):
+        series = get_series(fcp_name)
+
+Les mesures sont renvoyées dans l'en-tête Server-Timing (visible dans les
+outils de développement du navigateur) et écrites, une ligne JSON par
+requête, dans un journal à rotation (settings.FCP_TIMING_LOG).
+En dehors d'une requête instrumentée, span() ne fait rien.
+
+Le middleware fonctionne en WSGI comme en ASGI : les mesures de la requête
+sont portées par une variable de contexte, que sync_to_async transmet aux
+threads qui exécutent l'ORM. Chaque connexion reçoit un wrapper SQL
+permanent qui mesure les requêtes pour la requête HTTP du contexte courant.
+"""
+import json
+import logging
+import re
+from contextvars import ContextVar
+from functools import wraps
+from logging.handlers import RotatingFileHandler
+from pathlib import Path
+from time import perf_counter
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+logger = logging.getLogger('fcp_app.requests')
+
+_current_profile = ContextVar('fcp_request_profile', default=None)
+
+
+class RequestProfile:
+    """Mesures d'une requête : durée totale, SQL et étapes nommées"""
+
+    def __init__(self):
+        self.started = perf_counter()
+        self.duration = None
+        self.queries = 0
+        self.sql_time = 0.0
+        # nom -> {'duration', 'count', 'queries', 'sql_time'} (ordre d'exécution)
+        self.spans = {}
+
+    def execute_wrapper(self, execute, sql, params, many, context):
+        """Wrapper d'exécution SQL (connection.execute_wrapper) : compte et chronomètre"""
+        started = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.sql_time += perf_counter() - started
+
+    def add_span(self, name, duration, queries, sql_time):
+        """Cumule une étape (une étape répétée, par exemple dans une boucle, est additionnée)"""
+        entry = self.spans.setdefault(name, {'duration': 0.0, 'count': 0, 'queries': 0, 'sql_time': 0.0})
+        entry['duration'] += duration
+        entry['count'] += 1
+        entry['queries'] += queries
+        entry['sql_time'] += sql_time
+
+    def finish(self):
+        self.duration = perf_counter() - self.started
+
+    def server_timing(self):
+        """Valeur de l'en-tête Server-Timing (durées en millisecondes)"""
+        metrics = [
+            f'total;dur={self.duration * 1000:.1f}',
+            f'sql;dur={self.sql_time * 1000:.1f};desc="{self.queries} queries"',
+        ]
+        for name, entry in self.spans.items():
+            token = re.sub(r'[^A-Za-z0-9_.-]+', '-', name).strip('-') or 'span'
+            desc = name.replace('"', "'")
+            metrics.append(f'{token};dur={entry["duration"] * 1000:.1f};desc="{desc}"')
+        return ', '.join(metrics)
+
+    def as_dict(self):
+        """Mesures en millisecondes, pour le journal"""
+        return {
+            'duration_ms': round(self.duration * 1000, 2),
+            'queries': self.queries,
+            'sql_ms': round(self.sql_time * 1000, 2),
+            'spans': {
+                name: {
+                    'duration_ms': round(entry['duration'] * 1000, 2),
+                    'count': entry['count'],
+                    'queries': entry['queries'],
+                    'sql_ms': round(entry['sql_time'] * 1000, 2),
+                }
+                for name, entry in self.spans.items()
+            },
+        }
+
+
+def current_profile():
+    """Mesures de la requête en cours, ou None hors requête instrumentée"""
+    return _current_profile.get()
+
+
+class span:
+    """
+    Étape nommée d'une requête, utilisable comme gestionnaire de contexte
+    (`with span('compute stats'):`) ou comme décorateur (`@span('render')`).
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self._profile = None
+
+    def __enter__(self):
+        self._profile = _current_profile.get()
+        if self._profile is not None:
+            self._queries = self._profile.queries
+            self._sql_time = self._profile.sql_time
+            self._started = perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        profile = self._profile
+        if profile is not None:
+            profile.add_span(
+                self.name,
+                perf_counter() - self._started,
+                profile.queries - self._queries,
+                profile.sql_time - self._sql_time
+            )
+            self._profile = None
+        return False
+
+    def __call__(self, func):
+        name = self.name
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            # Nouvelle instance par appel : le décorateur peut être appelé en parallèle
+            with span(name):
+                return func(*args, **kwargs)
+        return wrapper
+
+
+def configure_request_log():
+    """Handler fichier à rotation du journal des requêtes (settings.FCP_TIMING_LOG, None : désactivé)"""
+    log_path = getattr(settings, 'FCP_TIMING_LOG', Path(settings.BASE_DIR) / 'logs' / 'requests.log')
+    if not log_path or logger.handlers:
+        return
+    log_path = Path(log_path)
+    log_path.parent.mkdir(parents=True, exist_ok=True)
+
+    handler = RotatingFileHandler(
+        log_path,
+        maxBytes=getattr(settings, 'FCP_TIMING_LOG_MAX_BYTES', 5 * 1024 * 1024),
+        backupCount=getattr(settings, 'FCP_TIMING_LOG_BACKUPS', 5),
+        encoding='utf-8'
+    )
+    handler.setFormatter(logging.Formatter(
+        '%(asctime)s - %(message)s',
+        datefmt='%Y-%m-%d %H:%M:%S'
+    ))
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+
+def _profile_execute(execute, sql, params, many, context):
+    """Wrapper SQL permanent des connexions : mesure pour la requête instrumentée du contexte courant"""
+    profile = _current_profile.get()
+    if profile is None:
+        return execute(sql, params, many, context)
+    return profile.execute_wrapper(execute, sql, params, many, context)
+
+
+def instrument_connection(connection, **kwargs):
+    """
+    Installe le wrapper de mesure sur une connexion (une seule fois).
+    Récepteur de connection_created : les connexions ouvertes par les
+    threads de l'ORM asynchrone sont instrumentées à leur création.
+    """
+    if _profile_execute not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_profile_execute)
+
+
+class TimingMiddleware:
+    """
+    Mesure chaque requête (durée, requêtes SQL, étapes span()) et ajoute
+    l'en-tête Server-Timing. Pour une réponse en flux (export CSV), la durée
+    s'arrête à la création de la réponse, avant l'envoi du contenu.
+    Compatible WSGI et ASGI (vues synchrones et asynchrones).
+    Désactivé avec settings.FCP_TIMING_ENABLED = False.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'FCP_TIMING_ENABLED', True):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+        configure_request_log()
+        connection_created.connect(instrument_connection, dispatch_uid='fcp_timing_instrument_connection')
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        # Connexions du thread ouvertes avant l'installation du récepteur
+        for connection in connections.all(initialized_only=True):
+            instrument_connection(connection)
+        profile = RequestProfile()
+        token = _current_profile.set(profile)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current_profile.reset(token)
+        return self.finish(request, response, profile)
+
+    async def __acall__(self, request):
+        profile = RequestProfile()
+        token = _current_profile.set(profile)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current_profile.reset(token)
+        return self.finish(request, response, profile)
+
+    def finish(self, request, response, profile):
+        """En-tête Server-Timing et ligne du journal"""
+        profile.finish()
+        response['Server-Timing'] = profile.server_timing()
+        if logger.isEnabledFor(logging.INFO):
+            match = getattr(request, 'resolver_match', None)
+            logger.info(json.dumps({
+                'method': request.method,
+                'path': request.path,
+                'view': match.view_name if match else None,
+                'status': response.status_code,
+                **profile.as_dict(),
+            }, ensure_ascii=False))
+        return response
@@ -0,0 +1,279 @@
+"""
+File d'attente des exports PPT / PDF / factsheet
+
+Les API d'export enregistrent un ExportJob (statut « en attente ») et rendent
+la main immédiatement avec l'identifiant du travail. La commande
+run_export_worker réserve les travaux en attente et les exécute dans un pool
+de processus ; le fichier généré est écrit dans settings.FCP_EXPORT_DIR puis
+téléchargé via api_export_job_download.
+
+Chaque travail « en cours » appartient au worker qui l'a réservé (champ
+worker) : ce worker renouvelle heartbeat_at tant qu'il l'exécute, et seules
+ses propres mises à jour (progression, fin, échec) sont prises en compte.
+Un travail n'est remis en attente que si son worker ne donne plus signe de
+vie depuis settings.FCP_EXPORT_STALE_AFTER secondes.
+"""
+import json
+import logging
+import os
+import re
+import socket
+import tempfile
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import Q
+from django.urls import reverse
+from django.utils import timezone
+
+from .models import ExportJob, StatutExport, TypeExport
+
+logger = logging.getLogger(__name__)
+
+
+def export_dir():
+    """Répertoire des fichiers générés (créé au besoin)"""
+    path = Path(getattr(settings, 'FCP_EXPORT_DIR', Path(settings.BASE_DIR) / 'exports'))
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def use_job_queue(data):
+    """Export en arrière-plan : champ 'async' de la requête, sinon settings.FCP_EXPORT_ASYNC"""
+    return bool(data.get('async', getattr(settings, 'FCP_EXPORT_ASYNC', False)))
+
+
+def enqueue(type_export, parametres):
+    """Met un export en file d'attente"""
+    return ExportJob.objects.create(type_export=type_export, parametres=parametres)
+
+
+def job_payload(job):
+    """Représentation JSON d'un travail (réponse des API d'export et de suivi)"""
+    payload = {
+        'job_id': str(job.id),
+        'type': job.type_export,
+        'statut': job.statut,
+        'progression': job.progression,
+        'message': job.message,
+        'status_url': reverse('fcp_app:api_export_job_status', args=[job.id]),
+    }
+    if job.statut == StatutExport.TERMINE:
+        payload['download_url'] = reverse('fcp_app:api_export_job_download', args=[job.id])
+        payload['nom_fichier'] = job.nom_fichier
+    elif job.statut == StatutExport.ECHEC:
+        payload['erreur'] = job.erreur
+    return payload
+
+
+def artifact_path(job):
+    """Chemin du fichier généré par un travail terminé"""
+    return export_dir() / job.fichier
+
+
+# ============================================================================
+# Exécution (commande run_export_worker)
+# ============================================================================
+
+def worker_id():
+    """Identifiant d'un worker (machine, processus, jeton propre à son démarrage)"""
+    return f'{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}'
+
+
+def _owned(job_id, worker):
+    """Travail toujours « en cours » pour ce worker"""
+    return ExportJob.objects.filter(pk=job_id, statut=StatutExport.EN_COURS, worker=worker)
+
+
+def claim_next_job(worker=''):
+    """
+    Réserve le plus ancien travail en attente pour `worker`. La réservation
+    est un UPDATE conditionnel sur le statut : un travail n'est exécuté
+    qu'une fois même si plusieurs workers tournent. Retourne l'identifiant
+    ou None.
+    """
+    while True:
+        job_id = (
+            ExportJob.objects.filter(statut=StatutExport.EN_ATTENTE)
+            .order_by('created_at')
+            .values_list('id', flat=True)
+            .first()
+        )
+        if job_id is None:
+            return None
+        now = timezone.now()
+        claimed = ExportJob.objects.filter(pk=job_id, statut=StatutExport.EN_ATTENTE).update(
+            statut=StatutExport.EN_COURS,
+            worker=worker,
+            started_at=now,
+            heartbeat_at=now,
+            progression=0,
+            message='Démarrage'
+        )
+        if claimed:
+            return job_id
+
+
+def heartbeat(job_ids, worker):
+    """Signale que `worker` exécute toujours ces travaux"""
+    return ExportJob.objects.filter(
+        pk__in=list(job_ids), statut=StatutExport.EN_COURS, worker=worker
+    ).update(heartbeat_at=timezone.now())
+
+
+def requeue_interrupted(stale_after=None):
+    """
+    Remet en attente les travaux « en cours » dont le worker ne donne plus
+    signe de vie depuis `stale_after` secondes (défaut :
+    settings.FCP_EXPORT_STALE_AFTER). Les travaux d'un worker actif ne sont
+    pas touchés.
+    """
+    if stale_after is None:
+        stale_after = getattr(settings, 'FCP_EXPORT_STALE_AFTER', 300)
+    limite = timezone.now() - timedelta(seconds=stale_after)
+    return ExportJob.objects.filter(
+        Q(heartbeat_at__lt=limite) | Q(heartbeat_at__isnull=True, started_at__lt=limite),
+        statut=StatutExport.EN_COURS
+    ).update(statut=StatutExport.EN_ATTENTE, worker='', progression=0, message='')
+
+
+def purge_jobs(days):
+    """Supprime les travaux terminés depuis plus de `days` jours et leurs fichiers"""
+    old_jobs = ExportJob.objects.filter(
+        statut__in=[StatutExport.TERMINE, StatutExport.ECHEC],
+        finished_at__lt=timezone.now() - timedelta(days=days)
+    )
+    for job in old_jobs:
+        if job.fichier:
+            artifact_path(job).unlink(missing_ok=True)
+    deleted, _ = old_jobs.delete()
+    return deleted
+
+
+def mark_failed(job_id, error, worker=''):
+    """Enregistre l'échec d'un travail, s'il est toujours « en cours » pour ce worker"""
+    return _owned(job_id, worker).update(
+        statut=StatutExport.ECHEC,
+        erreur=str(error),
+        message='',
+        finished_at=timezone.now()
+    )
+
+
+def _parse_date(value):
+    return datetime.strptime(value, '%Y-%m-%d').date() if value else None
+
+
+def render_export(type_export, parametres, progress=None):
+    """
+    Génère le fichier d'un export avec les fonctions des vues.
+    Retourne (contenu, nom du fichier, type MIME).
+    """
+    # Import différé : les vues importent ce module
+    from . import views
+
+    if type_export == TypeExport.PPT:
+        response = views.generate_ppt(
+            parametres['fcps'], parametres['content'], parametres['template'],
+            _parse_date(parametres.get('startDate')), _parse_date(parametres.get('endDate')),
+            progress=progress
+        )
+    elif type_export == TypeExport.PDF:
+        response = views.generate_pdf(
+            parametres['fcps'], parametres['content'],
+            _parse_date(parametres.get('startDate')), _parse_date(parametres.get('endDate')),
+            progress=progress
+        )
+    elif type_export == TypeExport.FACTSHEET:
+        response = views.generate_factsheet_pdf(
+            parametres['fcp'], parametres['month'], parametres['commentaire'], parametres['disclaimer']
+        )
+    else:
+        raise ValueError(f"Type d'export inconnu: {type_export}")
+
+    return response_artifact(response, f'export_{type_export}')
+
+
+def response_artifact(response, default_filename):
+    """
+    Fichier produit par une fonction de génération des vues :
+    (contenu, nom du fichier, type MIME). Lève ValueError si la fonction a
+    renvoyé une erreur JSON.
+    """
+    if response.status_code != 200:
+        # Erreur fonctionnelle renvoyée en JSON par la fonction de génération
+        raise ValueError(json.loads(response.content).get('error', f'Erreur HTTP {response.status_code}'))
+
+    match = re.search(r'filename="(.+)"', response.get('Content-Disposition', ''))
+    filename = match.group(1) if match else default_filename
+    return response.content, filename, response['Content-Type']
+
+
+def _write_artifact(job_id, suffix, content):
+    """
+    Écrit le fichier d'une exécution (écriture atomique : fichier temporaire
+    puis renommage). Nom propre à l'exécution : une exécution abandonnée ne
+    réécrit jamais le fichier d'une autre.
+    """
+    directory = export_dir()
+    path = directory / f'{job_id}-{uuid.uuid4().hex[:8]}{suffix}'
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as tmp:
+            tmp.write(content)
+        os.replace(tmp_path, path)
+    except BaseException:
+        Path(tmp_path).unlink(missing_ok=True)
+        raise
+    return path
+
+
+def run_job(job_id, worker=''):
+    """
+    Exécute un travail réservé par `worker` (dans un processus du pool) et
+    écrit le fichier. Retourne False si le travail a échoué ou n'appartient
+    plus à ce worker (remis en attente puis repris par un autre).
+    """
+    job = _owned(job_id, worker).first()
+    if job is None:
+        return False
+
+    def progress(done, total, label):
+        # 0-90 % pendant la génération, 100 % une fois le fichier écrit
+        _owned(job_id, worker).update(
+            progression=int(90 * done / max(total, 1)),
+            message=str(label)[:255]
+        )
+
+    try:
+        content, filename, content_type = render_export(job.type_export, job.parametres, progress)
+        path = _write_artifact(job.id, Path(filename).suffix, content)
+    except Exception as e:
+        logger.exception("Échec de l'export %s", job_id)
+        mark_failed(job_id, e, worker)
+        return False
+
+    finished = _owned(job_id, worker).update(
+        statut=StatutExport.TERMINE,
+        progression=100,
+        message='',
+        fichier=path.name,
+        nom_fichier=filename,
+        content_type=content_type,
+        finished_at=timezone.now()
+    )
+    if not finished:
+        # Travail repris par un autre worker entre-temps : fichier abandonné
+        path.unlink(missing_ok=True)
+        return False
+    return True
+
+
+def init_worker_process():
+    """Initialisation d'un processus du pool : Django chargé, connexions héritées fermées"""
+    import django
+    django.setup()
+    connections.close_all()
@@ -0,0 +1,325 @@
+"""
+Commande Django de mesure des performances des vues analytiques et des exports
+- Historiques de VL synthétiques (1 000 à 50 000 points) pour les 25 FCP
+- Exécution dans une base de test temporaire : la base de l'application n'est pas modifiée
+- Durée de chaque endpoint (premier appel à froid, puis appels répétés) et nombre de requêtes SQL
+- Résultats JSON comparables d'un commit à l'autre (--output, --compare)
+"""
+import json
+import logging
+import platform
+import statistics
+import subprocess
+from datetime import date, datetime
+from time import perf_counter
+
+import django
+import numpy as np
+import pandas as pd
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, reset_queries
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext, setup_test_environment, teardown_test_environment
+from django.urls import reverse
+
+from fcp_app.models import FicheSignaletique, FCP_VL_MODELS
+from fcp_app.data import FCP_FICHE_SIGNALETIQUE
+from fcp_app.importers import to_decimals
+from fcp_app.repository import bulk_vl_changes, clear_vl_table, vl_changed
+from fcp_app.analytics.cache import clear as clear_series_cache
+from fcp_app.management.commands.build_analytics_snapshots import previous_month
+
+DEFAULT_FCP = 'FCP PLACEMENT AVANTAGE'
+
+
+def benchmark_endpoints(fcp_name, fcp_names):
+    """
+    Endpoints mesurés : {nom: (méthode, nom de l'URL, paramètres)}.
+    Les exports sont demandés en mode synchrone (pas de file d'attente).
+    """
+    return {
+        'api_vl_data': ('get', 'api_vl_data', {'fcp': fcp_name, 'period': 'all'}),
+        'api_fcp_full_data': ('get', 'api_fcp_full_data', {'fcp': fcp_name}),
+        'api_scatter_data': ('get', 'api_scatter_data', {'period': 'ytd'}),
+        'api_correlation_matrix': ('get', 'api_correlation_matrix', {'period': 'origin'}),
+        'api_rolling_metrics': ('get', 'api_rolling_metrics', {'fcp': fcp_name, 'window': 20}),
+        'api_tail_risk': ('get', 'api_tail_risk', {'fcp': fcp_name}),
+        'api_calendar_data': ('get', 'api_calendar_data', {'fcp': fcp_name}),
+        'export_csv': ('post', 'api_export_data', {
+            'format': 'csv', 'fcps': fcp_names, 'content': ['vl', 'returns'], 'async': False
+        }),
+        'export_xlsx': ('post', 'api_export_data', {
+            'format': 'xlsx', 'fcps': fcp_names, 'content': ['vl', 'returns'], 'async': False
+        }),
+        'export_pdf': ('post', 'api_export_pdf', {
+            'fcps': [fcp_name], 'content': ['vl', 'perf'], 'async': False
+        }),
+        'export_ppt': ('post', 'api_export_ppt', {
+            'fcps': [fcp_name], 'content': ['vl', 'perf'], 'template': 'standard', 'async': False
+        }),
+        'export_factsheet': ('post', 'api_export_factsheet', {
+            'fcp': fcp_name, 'month': previous_month(), 'commentaire': '', 'async': False
+        }),
+    }
+
+
+def synthetic_vl(points, rng, end_date=None):
+    """
+    Historique synthétique d'un FCP : `points` jours ouvrés se terminant à
+    end_date (défaut : aujourd'hui), VL log-normale partant de 10 000.
+    Retourne (dates, valeurs arrondies à 4 décimales).
+    """
+    dates = pd.bdate_range(end=end_date or date.today(), periods=points).date
+    volatilite = rng.uniform(0.002, 0.012)
+    rendements = rng.normal(0.0002, volatilite, points - 1)
+    valeurs = 10000 * np.exp(np.concatenate(([0.0], np.cumsum(rendements))))
+    return list(dates), np.round(valeurs, 4)
+
+
+def populate_synthetic_vl(fcp_names, points, seed=42):
+    """
+    Remplace les VL des FCP par des historiques synthétiques (tables par FCP
+    puis table unifiée). Crée les fiches signalétiques manquantes.
+    """
+    for nom in fcp_names:
+        data = FCP_FICHE_SIGNALETIQUE.get(nom, {})
+        FicheSignaletique.objects.get_or_create(
+            nom=nom,
+            defaults={
+                'echelle_risque': data.get('echelle_risque', 3),
+                'type_fond': data.get('type_fond', 'Diversifié'),
+                'horizon': data.get('horizon', 5),
+                'benchmark_oblig': data.get('benchmark_oblig', 50),
+                'benchmark_brvmc': data.get('benchmark_brvmc', 50),
+            }
+        )
+    fcp_ids = dict(FicheSignaletique.objects.filter(nom__in=fcp_names).values_list('nom', 'id'))
+
+    rng = np.random.default_rng(seed)
+    with bulk_vl_changes():
+        for nom in fcp_names:
+            vl_model = FCP_VL_MODELS[nom]
+            dates, valeurs = synthetic_vl(points, rng)
+            clear_vl_table(nom)
+            vl_model.objects.bulk_create(
+                [
+                    vl_model(fcp_id=fcp_ids[nom], date=d, valeur=v)
+                    for d, v in zip(dates, to_decimals(valeurs))
+                ],
+                batch_size=2000
+            )
+            vl_changed(nom)
+
+
+def call_endpoint(client, method, url_name, params):
+    """Appelle un endpoint et lit toute la réponse. Retourne (statut, taille, durée en s)"""
+    url = reverse(f'fcp_app:{url_name}')
+    started = perf_counter()
+    if method == 'post':
+        response = client.post(url, json.dumps(params), content_type='application/json')
+    else:
+        response = client.get(url, params)
+    if response.streaming:
+        size = sum(len(chunk) for chunk in response.streaming_content)
+    else:
+        size = len(response.content)
+    elapsed = perf_counter() - started
+    response.close()
+    return response.status_code, size, elapsed
+
+
+def measure_endpoint(client, method, url_name, params, repeat=5):
+    """
+    Mesure un endpoint : un appel à froid (cache des séries vidé), puis
+    `repeat` appels (cache chaud). Les requêtes SQL sont comptées sur des
+    appels séparés pour ne pas fausser les durées.
+    """
+    clear_series_cache()
+    reset_queries()
+    with CaptureQueriesContext(connection) as cold_queries:
+        status, size, cold = call_endpoint(client, method, url_name, params)
+
+    durations = [call_endpoint(client, method, url_name, params)[2] for _ in range(repeat)]
+    reset_queries()
+    with CaptureQueriesContext(connection) as warm_queries:
+        call_endpoint(client, method, url_name, params)
+
+    return {
+        'status': status,
+        'bytes': size,
+        'queries_cold': len(cold_queries),
+        'queries': len(warm_queries),
+        'cold_ms': round(cold * 1000, 3),
+        'min_ms': round(min(durations) * 1000, 3),
+        'median_ms': round(statistics.median(durations) * 1000, 3),
+        'mean_ms': round(statistics.fmean(durations) * 1000, 3),
+        'max_ms': round(max(durations) * 1000, 3),
+    }
+
+
+def git_revision():
+    """Commit courant (None hors dépôt git)"""
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=settings.BASE_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = 'Mesure les performances des API et des exports sur des historiques de VL synthétiques'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--points',
+            type=int,
+            nargs='+',
+            default=[1000],
+            help='Nombre de VL par FCP (plusieurs tailles possibles, ex: 1000 10000 50000)'
+        )
+        parser.add_argument(
+            '--funds',
+            type=int,
+            default=len(FCP_VL_MODELS),
+            help=f'Nombre de FCP alimentés (défaut: {len(FCP_VL_MODELS)})'
+        )
+        parser.add_argument(
+            '--fcp',
+            type=str,
+            default=DEFAULT_FCP,
+            help=f'FCP utilisé par les endpoints mono-FCP (défaut: {DEFAULT_FCP})'
+        )
+        parser.add_argument(
+            '--endpoints',
+            nargs='+',
+            help='Endpoints à mesurer (défaut: tous)'
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=5,
+            help='Nombre d\'appels mesurés à chaud par endpoint (défaut: 5)'
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=42,
+            help='Graine des historiques synthétiques (défaut: 42)'
+        )
+        parser.add_argument(
+            '--output',
+            type=str,
+            help='Fichier JSON des résultats (défaut: sortie standard)'
+        )
+        parser.add_argument(
+            '--compare',
+            type=str,
+            help='Fichier JSON d\'une exécution précédente : affiche l\'écart des durées médianes'
+        )
+
+    def handle(self, *args, **options):
+        points_list = options['points']
+        if any(points < 2 for points in points_list):
+            raise CommandError('--points doit être supérieur ou égal à 2')
+        if options['repeat'] < 1:
+            raise CommandError('--repeat doit être supérieur ou égal à 1')
+
+        fcp_name = options['fcp']
+        if fcp_name not in FCP_VL_MODELS:
+            raise CommandError(f"FCP inconnu: {fcp_name}")
+        # FCP des endpoints mono-FCP, puis les suivants jusqu'à --funds
+        others = [name for name in FCP_VL_MODELS if name != fcp_name]
+        fcp_names = [fcp_name] + others[:max(1, options['funds']) - 1]
+
+        endpoints = benchmark_endpoints(fcp_name, fcp_names)
+        selected = options['endpoints'] or list(endpoints)
+        unknown = [name for name in selected if name not in endpoints]
+        if unknown:
+            raise CommandError(f"Endpoint(s) inconnu(s): {', '.join(unknown)} (disponibles: {', '.join(endpoints)})")
+
+        baseline = None
+        if options['compare']:
+            with open(options['compare'], encoding='utf-8') as f:
+                baseline = json.load(f)
+
+        # Base de test temporaire : données synthétiques sans toucher à la base de l'application
+        old_name = connection.settings_dict['NAME']
+        setup_test_environment()
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        clear_series_cache()
+        # Les erreurs HTTP 500 sont reportées dans les résultats, sans trace sur la console
+        request_logger = logging.getLogger('django.request')
+        request_log_level = request_logger.level
+        request_logger.setLevel(logging.CRITICAL)
+        try:
+            # Lectures sur 'default' (base de test) : pas de connexion de lecture sur la base de l'application
+            with override_settings(
+                FCP_EXPORT_ASYNC=False, FCP_CHART_CACHE_DIR=None, FCP_TIMING_LOG=None, FCP_READ_DATABASE=None
+            ):
+                results = self.run_benchmark(fcp_names, endpoints, selected, points_list, options)
+        finally:
+            request_logger.setLevel(request_log_level)
+            clear_series_cache()
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        report = {
+            'generated_at': datetime.now().isoformat(timespec='seconds'),
+            'git_revision': git_revision(),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'numpy': np.__version__,
+            'database': connection.vendor,
+            'funds': len(fcp_names),
+            'fcp': fcp_name,
+            'repeat': options['repeat'],
+            'results': results,
+        }
+        content = json.dumps(report, indent=2, ensure_ascii=False)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as f:
+                f.write(content + '\n')
+            self.stdout.write(self.style.SUCCESS(f'Résultats écrits dans {options["output"]}'))
+        else:
+            self.stdout.write(content)
+
+        if baseline is not None:
+            self.write_comparison(baseline, report)
+
+    def run_benchmark(self, fcp_names, endpoints, selected, points_list, options):
+        client = Client()
+        results = []
+        for points in points_list:
+            started = perf_counter()
+            populate_synthetic_vl(fcp_names, points, options['seed'])
+            self.stderr.write(f'{len(fcp_names)} FCP × {points} VL générés en {perf_counter() - started:.1f}s')
+
+            for name in selected:
+                method, url_name, params = endpoints[name]
+                measure = measure_endpoint(client, method, url_name, params, options['repeat'])
+                results.append({'endpoint': name, 'points': points, **measure})
+                style = self.style.SUCCESS if measure['status'] == 200 else self.style.WARNING
+                self.stderr.write(style(
+                    f'  {name:<24} {points:>6} pts  médiane {measure["median_ms"]:>10.1f} ms'
+                    f'  froid {measure["cold_ms"]:>10.1f} ms  {measure["queries"]:>4} requêtes'
+                    f'  (HTTP {measure["status"]})'
+                ))
+        return results
+
+    def write_comparison(self, baseline, report):
+        """Écart des durées médianes par rapport à une exécution précédente"""
+        previous = {(r['endpoint'], r['points']): r for r in baseline.get('results', [])}
+        self.stderr.write(f'\nComparaison avec {baseline.get("git_revision") or "la référence"} :')
+        for result in report['results']:
+            ref = previous.get((result['endpoint'], result['points']))
+            if ref is None or not ref['median_ms']:
+                continue
+            ratio = result['median_ms'] / ref['median_ms']
+            style = self.style.ERROR if ratio > 1.1 else self.style.SUCCESS if ratio < 0.9 else str
+            self.stderr.write(style(
+                f'  {result["endpoint"]:<24} {result["points"]:>6} pts  '
+                f'{ref["median_ms"]:>10.1f} → {result["median_ms"]:>10.1f} ms  (×{ratio:.2f})'
+            ))
@@ -0,0 +1,62 @@
+"""
+Commande Django pour précalculer les statistiques des FCP (FcpAnalyticsSnapshot)
+- Statistiques complètes de la page Valeurs Liquidatives (dernière date en base)
+- Données VL de la prévisualisation factsheet des mois demandés
+"""
+import re
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from fcp_app.models import FCP_VL_MODELS
+from fcp_app.analytics import build_snapshots
+
+
+def previous_month():
+    """Mois précédent au format YYYY-MM (mois par défaut du factsheet)"""
+    today = datetime.now().date()
+    if today.month == 1:
+        return f"{today.year - 1}-12"
+    return f"{today.year}-{today.month - 1:02d}"
+
+
+class Command(BaseCommand):
+    help = 'Précalcule les statistiques (instantanés) des FCP pour les vues et le factsheet'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--fcp',
+            action='append',
+            help='Nom du FCP à traiter (répétable, défaut: tous les FCP)'
+        )
+        parser.add_argument(
+            '--months',
+            nargs='*',
+            help='Mois des factsheets à précalculer, format YYYY-MM (défaut: mois précédent)'
+        )
+
+    def handle(self, *args, **options):
+        start_time = datetime.now()
+        fcp_names = options['fcp'] or list(FCP_VL_MODELS)
+        months = options['months'] if options['months'] is not None else [previous_month()]
+
+        unknown = [name for name in fcp_names if name not in FCP_VL_MODELS]
+        if unknown:
+            raise CommandError(f"FCP inconnu(s): {', '.join(unknown)}")
+        invalid = [month for month in months if not re.fullmatch(r'\d{4}-(0[1-9]|1[0-2])', month)]
+        if invalid:
+            raise CommandError(f"Mois invalide(s) (format YYYY-MM): {', '.join(invalid)}")
+
+        self.stdout.write(f'Calcul des instantanés ({len(fcp_names)} FCP, factsheets: {", ".join(months) or "aucun"})')
+
+        total = 0
+        for fcp_name in fcp_names:
+            count = build_snapshots(fcp_name, months)
+            if count:
+                self.stdout.write(self.style.SUCCESS(f'  ✓ {fcp_name}: {count} instantané(s)'))
+            else:
+                self.stdout.write(f'  - {fcp_name}: aucune VL')
+            total += count
+
+        duration = (datetime.now() - start_time).total_seconds()
+        self.stdout.write(self.style.SUCCESS(f'{total} instantanés enregistrés en {duration:.2f}s'))
@@ -0,0 +1,132 @@
+"""
+Commande Django pour générer les factsheets PDF d'un mois pour plusieurs FCP
+- VL de tous les FCP chargées en une seule requête (table unifiée)
+- Génération répartie sur un pool de processus
+- Écriture dans une archive ZIP ou un répertoire, avec durée par FCP
+"""
+import os
+import re
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from time import perf_counter
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from fcp_app.models import FicheSignaletique
+from fcp_app.jobs import response_artifact, init_worker_process
+from fcp_app.repository import load_vl_rows
+from fcp_app.views import FACTSHEET_DISCLAIMER, generate_factsheet_pdf
+from fcp_app.management.commands.build_analytics_snapshots import previous_month
+
+
+def render_factsheet(fcp_name, month, commentaire, disclaimer, vl_list):
+    """
+    Génère le factsheet d'un FCP (dans un processus du pool).
+    Retourne (nom du FCP, contenu PDF ou None, nom du fichier ou erreur, durée).
+    """
+    started = perf_counter()
+    try:
+        response = generate_factsheet_pdf(fcp_name, month, commentaire, disclaimer, vl_list=vl_list)
+        content, filename, _ = response_artifact(response, f"factsheet_{fcp_name.replace(' ', '_')}_{month}.pdf")
+    except Exception as e:
+        return fcp_name, None, str(e), perf_counter() - started
+    return fcp_name, content, filename, perf_counter() - started
+
+
+class Command(BaseCommand):
+    help = 'Génère les factsheets PDF d\'un mois pour tous les FCP (ou une sélection)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--month',
+            type=str,
+            help='Mois du factsheet, format YYYY-MM (défaut: mois précédent)'
+        )
+        parser.add_argument(
+            '--funds',
+            nargs='+',
+            help='FCP à traiter (défaut: tous les FCP en base)'
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=os.cpu_count() or 1,
+            help='Nombre de processus de génération (défaut: nombre de cœurs)'
+        )
+        parser.add_argument(
+            '--output',
+            type=str,
+            help='Archive .zip ou répertoire de sortie (défaut: factsheets_YYYY-MM.zip dans FCP_EXPORT_DIR)'
+        )
+        parser.add_argument(
+            '--commentaire',
+            type=str,
+            default='',
+            help='Commentaire de gestion ajouté à chaque factsheet'
+        )
+
+    def handle(self, *args, **options):
+        started = perf_counter()
+        month = options['month'] or previous_month()
+        if not re.fullmatch(r'\d{4}-(0[1-9]|1[0-2])', month):
+            raise CommandError(f"Mois invalide (format YYYY-MM): {month}")
+
+        known = list(FicheSignaletique.objects.order_by('nom').values_list('nom', flat=True))
+        fcp_names = options['funds'] or known
+        unknown = [name for name in fcp_names if name not in known]
+        if unknown:
+            raise CommandError(f"FCP inconnu(s): {', '.join(unknown)}")
+
+        output = Path(options['output'] or Path(settings.FCP_EXPORT_DIR) / f'factsheets_{month}.zip')
+        workers = max(1, min(options['workers'], len(fcp_names)))
+
+        # Toutes les séries en une requête, transmises aux processus
+        vl_rows = load_vl_rows(fcp_names)
+        tasks = [
+            (fcp_name, month, options['commentaire'], FACTSHEET_DISCLAIMER, vl_rows.get(fcp_name, []))
+            for fcp_name in fcp_names
+        ]
+        self.stdout.write(f'Factsheets {month} : {len(tasks)} FCP, {workers} processus → {output}')
+
+        if workers == 1:
+            results = (render_factsheet(*task) for task in tasks)
+            self.write_results(results, output)
+        else:
+            # Pas de connexion ouverte héritée par les processus créés
+            connections.close_all()
+            with ProcessPoolExecutor(max_workers=workers, initializer=init_worker_process) as pool:
+                futures = [pool.submit(render_factsheet, *task) for task in tasks]
+                self.write_results((future.result() for future in as_completed(futures)), output)
+
+        self.stdout.write(f'Durée totale: {perf_counter() - started:.2f}s')
+
+    def write_results(self, results, output):
+        """Écrit les PDF au fil de l'eau (archive ZIP ou répertoire) et affiche la durée par FCP"""
+        generated = failed = 0
+        is_zip = output.suffix.lower() == '.zip'
+        output.parent.mkdir(parents=True, exist_ok=True)
+        if not is_zip:
+            output.mkdir(parents=True, exist_ok=True)
+
+        archive = zipfile.ZipFile(output, 'w', zipfile.ZIP_DEFLATED) if is_zip else None
+        try:
+            for fcp_name, content, filename, duration in results:
+                if content is None:
+                    failed += 1
+                    self.stdout.write(self.style.ERROR(f'  ✗ {fcp_name} ({duration:.2f}s): {filename}'))
+                    continue
+                if archive is not None:
+                    archive.writestr(filename, content)
+                else:
+                    (output / filename).write_bytes(content)
+                generated += 1
+                self.stdout.write(self.style.SUCCESS(f'  ✓ {fcp_name} ({duration:.2f}s): {filename}'))
+        finally:
+            if archive is not None:
+                archive.close()
+
+        style = self.style.SUCCESS if not failed else self.style.WARNING
+        self.stdout.write(style(f'{generated} factsheet(s) générés, {failed} échec(s) — {output}'))
@@ -1,12 +1,17 @@
 """
 Commande Django pour importer les valeurs liquidatives depuis le fichier Excel
 dans les 25 tables VL séparées
+- Conversion vectorisée du fichier (format long, une seule passe pandas)
+- Écriture par bulk_create en lots, dans une seule transaction
 """
+from time import perf_counter
+
 import pandas as pd
 from django.core.management.base import BaseCommand
+from django.db import transaction
 from fcp_app.models import FicheSignaletique, FCP_VL_MODELS, get_vl_model
-from decimal import Decimal
-from datetime import datetime
+from fcp_app.importers import melt_vl_frame, split_by_fcp, to_decimals
+from fcp_app.repository import bulk_vl_changes, clear_vl_table, vl_changed
 
 
 class Command(BaseCommand):
@@ -24,11 +29,24 @@ class Command(BaseCommand):
             action='store_true',
             help='Supprimer toutes les VL existantes avant import'
         )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Nombre de VL par requête INSERT (défaut: 500)'
+        )
 
     def handle(self, *args, **options):
         file_path = options['file']
+        batch_size = max(1, options['batch_size'])
+        timings = []
+        
+        def stage(label, start):
+            timings.append((label, perf_counter() - start))
+            return perf_counter()
         
         self.stdout.write(f'Lecture du fichier: {file_path}')
+        started = t = perf_counter()
         
         # Lire le fichier Excel
         try:
@@ -38,80 +56,84 @@ class Command(BaseCommand):
             return
         
         self.stdout.write(f'  → {len(df)} lignes, {len(df.columns)} colonnes')
+        t = stage('Lecture Excel', t)
         
-        # Récupérer les FCP existants
-        fcp_dict = {fcp.nom: fcp for fcp in FicheSignaletique.objects.all()}
-        self.stdout.write(f'  → {len(fcp_dict)} FCP en base')
+        # Conversion en format long (dates et valeurs converties colonne par colonne)
+        try:
+            vl_frames = split_by_fcp(melt_vl_frame(df))
+        except ValueError as e:
+            self.stdout.write(self.style.ERROR(str(e)))
+            return
         
         # Colonnes FCP (toutes sauf Date)
         fcp_columns = [col for col in df.columns if col != 'Date']
+        t = stage('Conversion pandas', t)
         
-        # Supprimer les VL existantes si demandé
-        if options['clear']:
-            self.stdout.write('')
-            self.stdout.write('Suppression des VL existantes...')
-            for fcp_name, model_class in FCP_VL_MODELS.items():
-                deleted, _ = model_class.objects.all().delete()
-                if deleted > 0:
-                    self.stdout.write(f'  {fcp_name}: {deleted} supprimées')
-        
-        # Importer les données par FCP
-        self.stdout.write('')
-        self.stdout.write('Import en cours...')
+        # Récupérer les FCP existants
+        fcp_dict = {fcp.nom: fcp for fcp in FicheSignaletique.objects.all()}
+        self.stdout.write(f'  → {len(fcp_dict)} FCP en base')
         
+        # Une seule transaction pour tout l'import. Suppressions en DELETE
+        # direct (sans signal par VL) : table unifiée et cache des séries mis
+        # à jour une seule fois par FCP à la fin de l'import
         total_created = 0
-        
-        for fcp_name in fcp_columns:
-            # Récupérer le modèle VL correspondant
-            vl_model = get_vl_model(fcp_name)
-            
-            if vl_model is None:
-                self.stdout.write(self.style.WARNING(f'  ⚠ Modèle non trouvé pour: {fcp_name}'))
-                continue
-            
-            # Récupérer l'objet FCP
-            fcp_obj = fcp_dict.get(fcp_name)
-            if fcp_obj is None:
-                self.stdout.write(self.style.WARNING(f'  ⚠ FCP non trouvé en base: {fcp_name}'))
-                continue
-            
-            # Supprimer les données existantes pour ce FCP
-            vl_model.objects.all().delete()
-            
-            # Préparer les objets VL
-            vl_objects = []
-            skipped = 0
-            
-            for idx, row in df.iterrows():
-                date_val = row['Date']
-                valeur = row[fcp_name]
+        with transaction.atomic():
+            with bulk_vl_changes():
+                # Supprimer les VL existantes si demandé
+                if options['clear']:
+                    self.stdout.write('')
+                    self.stdout.write('Suppression des VL existantes...')
+                    for fcp_name in FCP_VL_MODELS:
+                        deleted = clear_vl_table(fcp_name)
+                        if deleted > 0:
+                            self.stdout.write(f'  {fcp_name}: {deleted} supprimées')
                 
-                # Ignorer les valeurs nulles
-                if pd.isna(date_val) or pd.isna(valeur):
-                    skipped += 1
-                    continue
+                # Importer les données par FCP
+                self.stdout.write('')
+                self.stdout.write('Import en cours...')
                 
-                # Convertir la date
-                if isinstance(date_val, datetime):
-                    date = date_val.date()
-                elif isinstance(date_val, str):
-                    date = datetime.strptime(date_val, '%Y-%m-%d').date()
-                else:
-                    date = date_val
+                for fcp_name in fcp_columns:
+                    # Récupérer le modèle VL correspondant
+                    vl_model = get_vl_model(fcp_name)
+                    
+                    if vl_model is None:
+                        self.stdout.write(self.style.WARNING(f'  ⚠ Modèle non trouvé pour: {fcp_name}'))
+                        continue
+                    
+                    # Récupérer l'objet FCP
+                    fcp_obj = fcp_dict.get(fcp_name)
+                    if fcp_obj is None:
+                        self.stdout.write(self.style.WARNING(f'  ⚠ FCP non trouvé en base: {fcp_name}'))
+                        continue
+                    
+                    # Supprimer les données existantes pour ce FCP
+                    clear_vl_table(fcp_name)
+                    
+                    frame = vl_frames.get(fcp_name)
+                    if frame is None or frame.empty:
+                        self.stdout.write(f'  - {fcp_name}: 0 VL (toutes nulles)')
+                        continue
+                    
+                    # Bulk create par lots
+                    vl_objects = [
+                        vl_model(fcp=fcp_obj, date=d, valeur=valeur)
+                        for d, valeur in zip(frame['date'].tolist(), to_decimals(frame['valeur']))
+                    ]
+                    vl_model.objects.bulk_create(vl_objects, batch_size=batch_size, ignore_conflicts=True)
+                    # bulk_create n'émet pas de signaux
+                    vl_changed(fcp_name)
+                    self.stdout.write(self.style.SUCCESS(f'  ✓ {fcp_name}: {len(vl_objects)} VL'))
+                    total_created += len(vl_objects)
                 
-                vl_objects.append(vl_model(
-                    fcp=fcp_obj,
-                    date=date,
-                    valeur=Decimal(str(valeur))
-                ))
-            
-            # Bulk create
-            if vl_objects:
-                vl_model.objects.bulk_create(vl_objects, ignore_conflicts=True)
-                self.stdout.write(self.style.SUCCESS(f'  ✓ {fcp_name}: {len(vl_objects)} VL'))
-                total_created += len(vl_objects)
-            else:
-                self.stdout.write(f'  - {fcp_name}: 0 VL (toutes nulles)')
+                t = stage('Écriture des tables VL', t)
+            t = stage('Table unifiée et cache', t)
+        t = stage('Commit', t)
+        
+        self.stdout.write('')
+        self.stdout.write('Durées par étape:')
+        for label, duration in timings:
+            self.stdout.write(f'  {label:<25} {duration:7.2f}s')
+        self.stdout.write(f'  {"Total":<25} {perf_counter() - started:7.2f}s')
         
         self.stdout.write('')
         self.stdout.write(self.style.SUCCESS(f'Import terminé! {total_created} VL créées au total.'))
@@ -0,0 +1,113 @@
+"""
+Commande Django exécutant la file d'attente des exports (ExportJob)
+- Réservation des travaux en attente (sûre entre plusieurs workers : chaque
+  travail appartient au worker qui l'a réservé, qui signale régulièrement
+  qu'il l'exécute toujours ; seuls les travaux d'un worker interrompu sont
+  remis en attente au démarrage)
+- Génération PPT / PDF / factsheet dans un pool de processus
+- Fichiers générés conservés dans settings.FCP_EXPORT_DIR
+"""
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from fcp_app.jobs import (
+    worker_id,
+    claim_next_job,
+    heartbeat,
+    requeue_interrupted,
+    purge_jobs,
+    mark_failed,
+    run_job,
+    init_worker_process,
+)
+
+
+class Command(BaseCommand):
+    help = "Traite les travaux d'export (PPT, PDF, factsheet) en arrière-plan"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=2,
+            help='Nombre de processus de génération (défaut: 2)'
+        )
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=1.0,
+            help='Intervalle en secondes entre deux lectures de la file (défaut: 1)'
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Traite les travaux en attente puis s\'arrête'
+        )
+        parser.add_argument(
+            '--purge-days',
+            type=int,
+            default=7,
+            help='Supprime au démarrage les travaux terminés depuis plus de N jours (défaut: 7)'
+        )
+        parser.add_argument(
+            '--stale-after',
+            type=float,
+            default=None,
+            help='Remet en attente au démarrage les travaux sans signal de leur worker depuis N secondes '
+                 '(défaut: settings.FCP_EXPORT_STALE_AFTER)'
+        )
+
+    def handle(self, *args, **options):
+        workers = max(1, options['workers'])
+        worker = worker_id()
+
+        requeued = requeue_interrupted(options['stale_after'])
+        if requeued:
+            self.stdout.write(self.style.WARNING(f'{requeued} travail(aux) interrompu(s) remis en attente'))
+        purged = purge_jobs(options['purge_days'])
+        if purged:
+            self.stdout.write(f'{purged} ancien(s) travail(aux) supprimé(s)')
+
+        self.stdout.write(f'Worker d\'export {worker} démarré ({workers} processus)')
+
+        running = {}
+        with ProcessPoolExecutor(max_workers=workers, initializer=init_worker_process) as pool:
+            try:
+                while True:
+                    # Travaux terminés
+                    for future in [f for f in running if f.done()]:
+                        job_id = running.pop(future)
+                        error = future.exception()
+                        if error is not None:
+                            # Processus interrompu (BrokenProcessPool...) : le travail n'a pas pu se terminer
+                            mark_failed(job_id, error, worker)
+                            self.stdout.write(self.style.ERROR(f'  ✗ {job_id}: {error}'))
+                        elif future.result():
+                            self.stdout.write(self.style.SUCCESS(f'  ✓ {job_id}'))
+                        else:
+                            self.stdout.write(self.style.ERROR(f'  ✗ {job_id}: échec (voir le statut du travail)'))
+
+                    # Travaux toujours en cours : pas remis en attente par un autre worker
+                    if running:
+                        heartbeat(running.values(), worker)
+
+                    # Nouveaux travaux, dans la limite des processus libres
+                    while len(running) < workers:
+                        job_id = claim_next_job(worker)
+                        if job_id is None:
+                            break
+                        # Pas de connexion ouverte héritée par les processus créés
+                        connections.close_all()
+                        running[pool.submit(run_job, job_id, worker)] = job_id
+                        self.stdout.write(f'  → {job_id}')
+
+                    if options['once'] and not running:
+                        break
+                    time.sleep(options['poll_interval'])
+            except KeyboardInterrupt:
+                self.stdout.write(self.style.WARNING('Arrêt demandé : fin des travaux en cours...'))
+
+        self.stdout.write('Worker d\'export arrêté')
@@ -0,0 +1,52 @@
+"""
+Commande Django pour reconstruire la table unifiée ValeurLiquidative
+à partir des 25 tables VL par FCP (réparation / contrôle de cohérence)
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from fcp_app.models import FCP_VL_MODELS
+from fcp_app.repository import vl_changed, fund_summaries
+
+
+class Command(BaseCommand):
+    help = 'Reconstruit la table unifiée des VL à partir des tables par FCP'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--fcp',
+            action='append',
+            help='Nom du FCP à reconstruire (répétable, défaut: tous les FCP)'
+        )
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Vérifier la cohérence (nombre de VL et dates) sans rien modifier'
+        )
+
+    def handle(self, *args, **options):
+        fcp_names = options['fcp'] or list(FCP_VL_MODELS)
+        unknown = [name for name in fcp_names if name not in FCP_VL_MODELS]
+        if unknown:
+            raise CommandError(f"FCP inconnu(s): {', '.join(unknown)}")
+
+        if options['check']:
+            summaries = fund_summaries(fcp_names)
+            ecarts = 0
+            for fcp_name in fcp_names:
+                legacy_count = FCP_VL_MODELS[fcp_name].objects.count()
+                unified_count = summaries.get(fcp_name, {}).get('count', 0)
+                if legacy_count != unified_count:
+                    ecarts += 1
+                    self.stdout.write(self.style.WARNING(
+                        f'  ⚠ {fcp_name}: {legacy_count} VL (table FCP) / {unified_count} VL (table unifiée)'
+                    ))
+            if ecarts:
+                self.stdout.write(self.style.WARNING(f'{ecarts} FCP à reconstruire'))
+            else:
+                self.stdout.write(self.style.SUCCESS('Table unifiée cohérente'))
+            return
+
+        for fcp_name in fcp_names:
+            vl_changed(fcp_name)
+            self.stdout.write(self.style.SUCCESS(f'  ✓ {fcp_name}'))
+        self.stdout.write(self.style.SUCCESS(f'{len(fcp_names)} FCP reconstruits'))
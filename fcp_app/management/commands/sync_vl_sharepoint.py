@@ -2,21 +2,28 @@
 Commande Django pour synchroniser les valeurs liquidatives depuis SharePoint
 - Connexion et téléchargement du fichier Excel depuis SharePoint
 - Lecture du fichier (feuille spécifique)
-- Insertion incrémentale dans chaque table VL
+- Insertion incrémentale dans chaque table VL, ou upsert (--upsert) pour
+  prendre en compte les VL corrigées sur des dates déjà en base
+- Mise à jour incrémentale des statistiques depuis l'origine (FcpRunningStats)
+- Recalcul des statistiques précalculées (build_analytics_snapshots)
 - Logging d'exécution détaillé
 """
 import os
 import io
 import logging
 from datetime import datetime
-from decimal import Decimal
 from pathlib import Path
 
 import pandas as pd
+from django.core.management import call_command
 from django.core.management.base import BaseCommand
 from django.conf import settings
 
 from fcp_app.models import FicheSignaletique, FCP_VL_MODELS, get_vl_model
+from fcp_app.importers import melt_vl_frame, split_by_fcp, vl_rows, diff_vl_frame
+from fcp_app.repository import vl_changed
+from fcp_app.analytics.running import append_running_stats, rebuild_running_stats
+from fcp_app.analytics.snapshots import current_version
 
 # Configuration du logging
 LOG_DIR = Path(settings.BASE_DIR) / 'logs'
@@ -39,7 +46,7 @@ logger.addHandler(file_handler)
 
 
 class Command(BaseCommand):
-    help = 'Synchronise les valeurs liquidatives depuis SharePoint (insertion incrémentale)'
+    help = 'Synchronise les valeurs liquidatives depuis SharePoint (insertion incrémentale ou upsert)'
 
     def add_arguments(self, parser):
         parser.add_argument(
@@ -85,6 +92,22 @@ class Command(BaseCommand):
             action='store_true',
             help='Mode simulation : affiche les opérations sans les exécuter'
         )
+        parser.add_argument(
+            '--upsert',
+            action='store_true',
+            help='Insère les nouvelles dates et met à jour les VL modifiées sur les dates déjà en base'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Nombre de VL par requête INSERT (défaut: 500)'
+        )
+        parser.add_argument(
+            '--skip-snapshots',
+            action='store_true',
+            help='Ne pas recalculer les statistiques précalculées en fin de synchronisation'
+        )
 
     def log_and_print(self, message, level='info', style=None):
         """Log et affiche un message"""
@@ -138,6 +161,59 @@ class Command(BaseCommand):
         last_vl = vl_model.objects.order_by('-date').first()
         return last_vl.date if last_vl else None
 
+    def update_running_stats(self, fcp_name, rows, base_version, rebuild=False):
+        """
+        Met à jour l'accumulateur des statistiques depuis l'origine d'un FCP :
+        ajout des VL insérées après sa dernière date (O(1) par VL), recalcul
+        complet si des VL existantes ont été modifiées (rebuild).
+        """
+        try:
+            if rebuild:
+                rebuild_running_stats(fcp_name)
+            else:
+                append_running_stats(fcp_name, rows, base_version)
+        except Exception as e:
+            # Les vues recalculent à la volée si l'accumulateur est périmé
+            self.log_and_print(f"  ⚠️  {fcp_name}: échec de la mise à jour des statistiques cumulées: {e}", level='warning', style=self.style.WARNING)
+
+    def upsert_fcp(self, fcp_name, vl_model, fcp_obj, frame, batch_size, dry_run):
+        """
+        Upsert des VL d'un FCP : nouvelles dates insérées, VL différentes de
+        la base mises à jour (INSERT ... ON CONFLICT(date) DO UPDATE), VL
+        identiques ignorées. Retourne (insérées, mises à jour, inchangées).
+        """
+        existing = list(vl_model.objects.values_list('date', 'valeur'))
+        new_frame, changed_frame, unchanged = diff_vl_frame(frame, existing)
+
+        if logger.isEnabledFor(logging.DEBUG):
+            for d in changed_frame['date'].tolist()[:20]:
+                logger.debug(f"{fcp_name}: VL corrigée au {d}")
+
+        to_write = pd.concat([new_frame, changed_frame])
+        if not to_write.empty and not dry_run:
+            base_version = current_version(fcp_name)
+            # Arrondies comme en base : l'accumulateur reste identique au recalcul complet
+            rows = vl_rows(to_write)
+            vl_objects = [vl_model(fcp=fcp_obj, date=d, valeur=valeur) for d, valeur in rows]
+            vl_model.objects.bulk_create(
+                vl_objects,
+                batch_size=batch_size,
+                update_conflicts=True,
+                unique_fields=['date'],
+                update_fields=['valeur']
+            )
+            # bulk_create n'émet pas de signaux : table unifiée et cache
+            vl_changed(fcp_name)
+            self.update_running_stats(fcp_name, rows, base_version, rebuild=not changed_frame.empty)
+
+        inserted, updated = len(new_frame), len(changed_frame)
+        message = f"  {fcp_name}: +{inserted} insérées, {updated} mises à jour, {unchanged} inchangées"
+        if inserted or updated:
+            self.log_and_print(f"  ✅{message}", style=self.style.SUCCESS)
+        else:
+            self.log_and_print(f"  ⏭️ {message}")
+        return inserted, updated, unchanged
+
     def handle(self, *args, **options):
         start_time = datetime.now()
         self.log_and_print(f"\n{'='*60}")
@@ -228,12 +304,22 @@ class Command(BaseCommand):
         self.log_and_print(f"📊 {len(fcp_columns)} colonnes FCP dans le fichier Excel")
 
         # =====================================================================
-        # ÉTAPE 4: Insertion incrémentale
+        # ÉTAPE 4: Insertion incrémentale ou upsert
         # =====================================================================
-        self.log_and_print(f"\n📋 ÉTAPE 4: Insertion incrémentale des VL")
+        upsert = options['upsert']
+        batch_size = max(1, options['batch_size'])
+        if upsert:
+            self.log_and_print(f"\n📋 ÉTAPE 4: Upsert des VL (nouvelles dates et VL corrigées)")
+        else:
+            self.log_and_print(f"\n📋 ÉTAPE 4: Insertion incrémentale des VL")
         self.log_and_print("-" * 40)
 
+        # Conversion en format long en une seule passe (dates et valeurs par colonne)
+        vl_frames = split_by_fcp(melt_vl_frame(df))
+
         total_inserted = 0
+        total_updated = 0
+        total_unchanged = 0
         total_skipped = 0
         fcp_stats = []
 
@@ -251,68 +337,80 @@ class Command(BaseCommand):
                 self.log_and_print(f"  ⚠️  FCP non trouvé en base: {fcp_name}", level='warning', style=self.style.WARNING)
                 continue
 
+            frame = vl_frames.get(fcp_name)
+            if frame is None or frame.empty:
+                self.log_and_print(f"  ➖ {fcp_name}: aucune donnée valide")
+                continue
+
+            if upsert:
+                inserted, updated, unchanged = self.upsert_fcp(
+                    fcp_name, vl_model, fcp_obj, frame, batch_size, dry_run
+                )
+                total_inserted += inserted
+                total_updated += updated
+                total_unchanged += unchanged
+                fcp_stats.append({
+                    'fcp': fcp_name,
+                    'inserted': inserted,
+                    'updated': updated,
+                    'unchanged': unchanged
+                })
+                continue
+
             # Récupérer la dernière date en base
             last_date = self.get_last_date_in_db(vl_model)
             if last_date:
                 logger.debug(f"{fcp_name}: dernière date en base = {last_date}")
 
-            # Préparer les objets VL à insérer (uniquement nouvelles dates)
-            vl_objects = []
-            skipped_count = 0
-
-            for idx, row in df.iterrows():
-                date_val = row['Date']
-                valeur = row[fcp_name]
-
-                # Ignorer les valeurs nulles
-                if pd.isna(date_val) or pd.isna(valeur):
-                    continue
-
-                # Convertir la date
-                if isinstance(date_val, datetime):
-                    date = date_val.date()
-                elif isinstance(date_val, pd.Timestamp):
-                    date = date_val.date()
-                elif isinstance(date_val, str):
-                    date = datetime.strptime(date_val, '%Y-%m-%d').date()
-                else:
-                    date = date_val
-
-                # Vérifier si la date est plus récente que la dernière en base
-                if last_date and date <= last_date:
-                    skipped_count += 1
-                    continue
-
-                vl_objects.append(vl_model(
-                    fcp=fcp_obj,
-                    date=date,
-                    valeur=Decimal(str(valeur))
-                ))
+            # Uniquement les dates plus récentes que la dernière en base
+            if last_date:
+                is_new = (frame['date'] > last_date).to_numpy()
+                skipped_count = int((~is_new).sum())
+                new_frame = frame[is_new]
+            else:
+                skipped_count = 0
+                new_frame = frame
 
             # Insertion en base
-            if vl_objects:
+            if not new_frame.empty:
                 if not dry_run:
+                    base_version = current_version(fcp_name)
+                    rows = vl_rows(new_frame)
+                    vl_objects = [vl_model(fcp=fcp_obj, date=d, valeur=valeur) for d, valeur in rows]
                     # Utiliser bulk_create avec ignore_conflicts pour éviter les doublons
-                    vl_model.objects.bulk_create(vl_objects, ignore_conflicts=True)
+                    vl_model.objects.bulk_create(vl_objects, batch_size=batch_size, ignore_conflicts=True)
+                    # bulk_create n'émet pas de signaux : table unifiée et cache
+                    vl_changed(fcp_name)
+                    # Nouvelles dates postérieures à la dernière VL : ajout en O(1) par VL
+                    self.update_running_stats(fcp_name, rows, base_version)
                 
                 self.log_and_print(
-                    f"  ✅ {fcp_name}: +{len(vl_objects)} VL (dernière date base: {last_date or 'aucune'})",
+                    f"  ✅ {fcp_name}: +{len(new_frame)} VL (dernière date base: {last_date or 'aucune'})",
                     style=self.style.SUCCESS
                 )
-                total_inserted += len(vl_objects)
+                total_inserted += len(new_frame)
                 fcp_stats.append({
                     'fcp': fcp_name,
-                    'inserted': len(vl_objects),
+                    'inserted': len(new_frame),
                     'skipped': skipped_count,
                     'last_date_before': last_date
                 })
             else:
-                if skipped_count > 0:
-                    self.log_and_print(f"  ⏭️  {fcp_name}: 0 nouvelle VL ({skipped_count} déjà en base)")
-                else:
-                    self.log_and_print(f"  ➖ {fcp_name}: aucune donnée valide")
+                self.log_and_print(f"  ⏭️  {fcp_name}: 0 nouvelle VL ({skipped_count} déjà en base)")
                 total_skipped += skipped_count
 
+        # =====================================================================
+        # ÉTAPE 5: Statistiques précalculées
+        # =====================================================================
+        if not dry_run and not options['skip_snapshots']:
+            self.log_and_print(f"\n📋 ÉTAPE 5: Calcul des statistiques précalculées")
+            self.log_and_print("-" * 40)
+            try:
+                call_command('build_analytics_snapshots', stdout=self.stdout)
+            except Exception as e:
+                # Les vues recalculent à la volée si les instantanés sont périmés
+                self.log_and_print(f"⚠️  Échec du calcul des instantanés: {e}", level='warning', style=self.style.WARNING)
+
         # =====================================================================
         # RÉSUMÉ
         # =====================================================================
@@ -324,7 +422,11 @@ class Command(BaseCommand):
         self.log_and_print(f"{'='*60}")
         self.log_and_print(f"  ⏱️  Durée: {duration:.2f} secondes")
         self.log_and_print(f"  ✅ VL insérées: {total_inserted}", style=self.style.SUCCESS if total_inserted > 0 else None)
-        self.log_and_print(f"  ⏭️  VL ignorées (déjà en base): {total_skipped}")
+        if upsert:
+            self.log_and_print(f"  ✏️  VL mises à jour: {total_updated}", style=self.style.SUCCESS if total_updated > 0 else None)
+            self.log_and_print(f"  ⏭️  VL inchangées: {total_unchanged}")
+        else:
+            self.log_and_print(f"  ⏭️  VL ignorées (déjà en base): {total_skipped}")
         self.log_and_print(f"  📁 Log détaillé: {LOG_DIR / 'sync_vl_sharepoint.log'}")
 
         if dry_run:
@@ -333,4 +435,10 @@ class Command(BaseCommand):
         self.log_and_print(f"\n{'='*60}\n")
 
         # Log du résumé
-        logger.info(f"Synchronisation terminée - {total_inserted} insérées, {total_skipped} ignorées, durée: {duration:.2f}s")
+        if upsert:
+            logger.info(
+                f"Synchronisation terminée (upsert) - {total_inserted} insérées, {total_updated} mises à jour, "
+                f"{total_unchanged} inchangées, durée: {duration:.2f}s"
+            )
+        else:
+            logger.info(f"Synchronisation terminée - {total_inserted} insérées, {total_skipped} ignorées, durée: {duration:.2f}s")
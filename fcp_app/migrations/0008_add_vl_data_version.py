@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-17 12:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fcp_app', '0007_add_missing_devise_column'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VLDataVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fcp_name', models.CharField(max_length=200, unique=True, verbose_name='Nom du FCP')),
+                ('version', models.PositiveIntegerField(default=0, verbose_name='Version')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Dernière modification')),
+            ],
+            options={
+                'verbose_name': 'Version des données VL',
+                'verbose_name_plural': 'Versions des données VL',
+                'ordering': ['fcp_name'],
+            },
+        ),
+    ]
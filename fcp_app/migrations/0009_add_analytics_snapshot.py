@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-17 12:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fcp_app', '0008_add_vl_data_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FcpAnalyticsSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fcp_name', models.CharField(max_length=200, verbose_name='Nom du FCP')),
+                ('type_snapshot', models.CharField(choices=[('analyse', 'Page Valeurs Liquidatives'), ('factsheet', 'Prévisualisation factsheet')], default='analyse', max_length=20, verbose_name="Type d'instantané")),
+                ('as_of_date', models.DateField(verbose_name="Date d'arrêté")),
+                ('data_version', models.PositiveIntegerField(default=0, verbose_name='Version des données VL')),
+                ('payload', models.JSONField(verbose_name='Statistiques')),
+                ('computed_at', models.DateTimeField(auto_now=True, verbose_name='Calculé le')),
+            ],
+            options={
+                'verbose_name': 'Instantané de statistiques',
+                'verbose_name_plural': 'Instantanés de statistiques',
+                'ordering': ['fcp_name', 'type_snapshot', '-as_of_date'],
+                'unique_together': {('fcp_name', 'type_snapshot', 'as_of_date')},
+            },
+        ),
+    ]
@@ -0,0 +1,88 @@
+# Generated by Django 5.2.18 on 2026-10-17 12:37
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+# Nom du FCP -> modèle VL historique (état au moment de la migration)
+LEGACY_VL_MODELS = {
+    "FCP ACTIONS PHARMACIE": 'VL_FCP_Actions_Pharmacie',
+    "FCP AL BARAKA 2": 'VL_FCP_Al_Baraka_2',
+    "FCP ASSUR SENEGAL": 'VL_FCP_Assur_Senegal',
+    "FCP BNDE VALEURS": 'VL_FCP_BNDE_Valeurs',
+    "FCP CAPITAL RETRAITE": 'VL_FCP_Capital_Retraite',
+    "FCP DIASPORA": 'VL_FCP_Diaspora',
+    "FCP DJOLOF": 'VL_FCP_Djolof',
+    "FCP EXPAT": 'VL_FCP_Expat',
+    "FCP IFC-BOAD": 'VL_FCP_IFC_BOAD',
+    "FCP LIQUIDITE OPTIMUM": 'VL_FCP_Liquidite_Optimum',
+    "FCP PLACEMENT AVANTAGE": 'VL_FCP_Placement_Avantage',
+    "FCP PLACEMENT CROISSANCE": 'VL_FCP_Placement_Croissance',
+    "FCP PLACEMENT QUIETUDE": 'VL_FCP_Placement_Quietude',
+    "FCP POSTEFINANCES": 'VL_FCP_Postefinances',
+    "FCP RENTE PERPETUELLE": 'VL_FCP_Rente_Perpetuelle',
+    "FCP SALAM CI": 'VL_FCP_Salam_CI',
+    "FCP TRANSVIE": 'VL_FCP_Transvie',
+    "FCP UCA DOGUICIMI": 'VL_FCP_UCA_Doguicimi',
+    "FCP VISION MONETAIRE": 'VL_FCP_Vision_Monetaire',
+    "FCP WALO": 'VL_FCP_Walo',
+    "FCPCR SONATEL": 'VL_FCPCR_Sonatel',
+    "FCPE DP WORLD DAKAR": 'VL_FCPE_DP_World_Dakar',
+    "FCPE FORCE PAD": 'VL_FCPE_Force_PAD',
+    "FCPE SINI GNESIGUI": 'VL_FCPE_Sini_Gnesigui',
+    "FCPR SEN'FONDS": 'VL_FCPR_SenFonds',
+}
+
+
+def fill_unified_table(apps, schema_editor):
+    """Copie les VL des 25 tables historiques dans la table unifiée"""
+    FicheSignaletique = apps.get_model('fcp_app', 'FicheSignaletique')
+    ValeurLiquidative = apps.get_model('fcp_app', 'ValeurLiquidative')
+    fcp_ids = dict(FicheSignaletique.objects.values_list('nom', 'id'))
+    
+    for fcp_name, model_name in LEGACY_VL_MODELS.items():
+        fcp_id = fcp_ids.get(fcp_name)
+        if fcp_id is None:
+            continue
+        legacy_model = apps.get_model('fcp_app', model_name)
+        ValeurLiquidative.objects.bulk_create(
+            [
+                ValeurLiquidative(fcp_id=fcp_id, date=d, valeur=v, actif_net=a, nombre_parts=n)
+                for d, v, a, n in legacy_model.objects.values_list('date', 'valeur', 'actif_net', 'nombre_parts')
+            ],
+            batch_size=500
+        )
+
+
+def empty_unified_table(apps, schema_editor):
+    """Reverse: la table est supprimée par l'opération CreateModel"""
+    pass
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fcp_app', '0009_add_analytics_snapshot'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ValeurLiquidative',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='Date')),
+                ('valeur', models.DecimalField(decimal_places=4, max_digits=15, verbose_name='Valeur Liquidative')),
+                ('actif_net', models.DecimalField(blank=True, decimal_places=2, max_digits=20, null=True, verbose_name='Actif Net')),
+                ('nombre_parts', models.DecimalField(blank=True, decimal_places=4, max_digits=15, null=True, verbose_name='Nombre de parts')),
+                ('fcp', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='valeurs_liquidatives', to='fcp_app.fichesignaletique', verbose_name='FCP')),
+            ],
+            options={
+                'verbose_name': 'Valeur Liquidative (table unifiée)',
+                'verbose_name_plural': 'Valeurs Liquidatives (table unifiée)',
+                'db_table': 'fcp_app_valeur_liquidative',
+                'ordering': ['fcp', '-date'],
+                'unique_together': {('fcp', 'date')},
+            },
+        ),
+        migrations.RunPython(fill_unified_table, empty_unified_table),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-17 12:45
+
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fcp_app', '0010_add_unified_valeur_liquidative'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExportJob',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('type_export', models.CharField(choices=[('ppt', 'Présentation PowerPoint'), ('pdf', 'Rapport PDF'), ('factsheet', 'Factsheet PDF')], max_length=20, verbose_name="Type d'export")),
+                ('parametres', models.JSONField(default=dict, verbose_name='Paramètres')),
+                ('statut', models.CharField(choices=[('pending', 'En attente'), ('running', 'En cours'), ('done', 'Terminé'), ('failed', 'Échec')], db_index=True, default='pending', max_length=20, verbose_name='Statut')),
+                ('progression', models.PositiveSmallIntegerField(default=0, verbose_name='Progression (%)')),
+                ('message', models.CharField(blank=True, max_length=255, verbose_name='Étape en cours')),
+                ('erreur', models.TextField(blank=True, verbose_name='Erreur')),
+                ('fichier', models.CharField(blank=True, max_length=255, verbose_name='Fichier généré')),
+                ('nom_fichier', models.CharField(blank=True, max_length=255, verbose_name='Nom du fichier')),
+                ('content_type', models.CharField(blank=True, max_length=100, verbose_name='Type MIME')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Créé le')),
+                ('started_at', models.DateTimeField(blank=True, null=True, verbose_name='Démarré le')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='Terminé le')),
+            ],
+            options={
+                'verbose_name': "Travail d'export",
+                'verbose_name_plural': "Travaux d'export",
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
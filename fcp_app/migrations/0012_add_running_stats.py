@@ -0,0 +1,44 @@
+# Generated by Django 5.2.18 on 2026-10-17 13:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fcp_app', '0011_add_export_job'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FcpRunningStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fcp_name', models.CharField(max_length=200, unique=True, verbose_name='Nom du FCP')),
+                ('data_version', models.PositiveIntegerField(default=0, verbose_name='Version des données VL')),
+                ('nb_vl', models.PositiveIntegerField(default=0, verbose_name='Nombre de VL')),
+                ('first_date', models.DateField(blank=True, null=True, verbose_name='Première date')),
+                ('first_value', models.FloatField(blank=True, null=True, verbose_name='Première VL')),
+                ('last_date', models.DateField(blank=True, null=True, verbose_name='Dernière date')),
+                ('last_value', models.FloatField(blank=True, null=True, verbose_name='Dernière VL')),
+                ('mean', models.FloatField(default=0, verbose_name='Rendement moyen')),
+                ('m2', models.FloatField(default=0, verbose_name='Somme des écarts au carré')),
+                ('m3', models.FloatField(default=0, verbose_name='Somme des écarts au cube')),
+                ('m4', models.FloatField(default=0, verbose_name='Somme des écarts puissance 4')),
+                ('jours_positifs', models.PositiveIntegerField(default=0, verbose_name='Jours positifs')),
+                ('jours_negatifs', models.PositiveIntegerField(default=0, verbose_name='Jours négatifs')),
+                ('neg_sumsq', models.FloatField(default=0, verbose_name='Somme des carrés des rendements négatifs')),
+                ('rdt_min', models.FloatField(blank=True, null=True, verbose_name='Rendement minimum')),
+                ('rdt_max', models.FloatField(blank=True, null=True, verbose_name='Rendement maximum')),
+                ('vl_min', models.FloatField(blank=True, null=True, verbose_name='VL minimum')),
+                ('vl_max', models.FloatField(blank=True, null=True, verbose_name='VL maximum')),
+                ('max_drawdown', models.FloatField(default=0, verbose_name='Drawdown maximum (%)')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Mis à jour le')),
+            ],
+            options={
+                'verbose_name': 'Statistiques cumulées',
+                'verbose_name_plural': 'Statistiques cumulées',
+                'ordering': ['fcp_name'],
+            },
+        ),
+    ]
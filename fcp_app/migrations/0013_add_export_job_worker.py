@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-17 14:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fcp_app', '0012_add_running_stats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='exportjob',
+            name='heartbeat_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Dernier signal du worker'),
+        ),
+        migrations.AddField(
+            model_name='exportjob',
+            name='worker',
+            field=models.CharField(blank=True, max_length=100, verbose_name='Worker'),
+        ),
+    ]
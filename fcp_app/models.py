@@ -1,4 +1,6 @@
-﻿from django.db import models
+﻿import uuid
+
+from django.db import models
 
 # Modèles pour la gestion des FCP
 
@@ -642,6 +644,209 @@ class BenchmarkBRVM(BaseBenchmark):
         db_table = 'fcp_app_benchmark_brvm'
 
 
+# ============================================================================
+# Table unifiée des Valeurs Liquidatives (tous les FCP)
+# ============================================================================
+
+class ValeurLiquidative(models.Model):
+    """
+    Table unifiée des VL de tous les FCP (format long, une ligne par FCP et
+    par date). Alimentée à partir des tables par FCP (signaux, import,
+    synchronisation) : elle permet de lire plusieurs FCP en une seule requête
+    via l'index unique (fcp, date). Voir fcp_app/repository.py.
+    """
+    fcp = models.ForeignKey(
+        FicheSignaletique,
+        on_delete=models.CASCADE,
+        related_name='valeurs_liquidatives',
+        verbose_name="FCP"
+    )
+    date = models.DateField(verbose_name="Date")
+    valeur = models.DecimalField(
+        max_digits=15,
+        decimal_places=4,
+        verbose_name="Valeur Liquidative"
+    )
+    actif_net = models.DecimalField(
+        max_digits=20,
+        decimal_places=2,
+        null=True,
+        blank=True,
+        verbose_name="Actif Net"
+    )
+    nombre_parts = models.DecimalField(
+        max_digits=15,
+        decimal_places=4,
+        null=True,
+        blank=True,
+        verbose_name="Nombre de parts"
+    )
+    
+    class Meta:
+        verbose_name = "Valeur Liquidative (table unifiée)"
+        verbose_name_plural = "Valeurs Liquidatives (table unifiée)"
+        db_table = 'fcp_app_valeur_liquidative'
+        ordering = ['fcp', '-date']
+        unique_together = ['fcp', 'date']
+    
+    def __str__(self):
+        return f"{self.fcp_id} - {self.date} : {self.valeur}"
+
+
+# ============================================================================
+# Version des données VL (invalidation des caches)
+# ============================================================================
+
+class VLDataVersion(models.Model):
+    """
+    Compteur de version des VL d'un FCP, incrémenté à chaque modification
+    (import, synchronisation, admin). Permet aux processus de savoir si la
+    série qu'ils ont en cache est encore à jour.
+    """
+    fcp_name = models.CharField(max_length=200, unique=True, verbose_name="Nom du FCP")
+    version = models.PositiveIntegerField(default=0, verbose_name="Version")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Dernière modification")
+    
+    class Meta:
+        verbose_name = "Version des données VL"
+        verbose_name_plural = "Versions des données VL"
+        ordering = ['fcp_name']
+    
+    def __str__(self):
+        return f"{self.fcp_name} : v{self.version}"
+
+
+# ============================================================================
+# Instantanés des statistiques précalculées
+# ============================================================================
+
+class TypeSnapshot(models.TextChoices):
+    """Types d'instantanés de statistiques"""
+    ANALYSE = 'analyse', 'Page Valeurs Liquidatives'
+    FACTSHEET = 'factsheet', 'Prévisualisation factsheet'
+
+
+class FcpAnalyticsSnapshot(models.Model):
+    """
+    Statistiques précalculées d'un FCP à une date d'arrêté (payload JSON).
+    Un instantané est à jour tant que data_version correspond à la version
+    courante des VL du FCP (VLDataVersion).
+    """
+    fcp_name = models.CharField(max_length=200, verbose_name="Nom du FCP")
+    type_snapshot = models.CharField(
+        max_length=20,
+        choices=TypeSnapshot.choices,
+        default=TypeSnapshot.ANALYSE,
+        verbose_name="Type d'instantané"
+    )
+    as_of_date = models.DateField(verbose_name="Date d'arrêté")
+    data_version = models.PositiveIntegerField(default=0, verbose_name="Version des données VL")
+    payload = models.JSONField(verbose_name="Statistiques")
+    computed_at = models.DateTimeField(auto_now=True, verbose_name="Calculé le")
+    
+    class Meta:
+        verbose_name = "Instantané de statistiques"
+        verbose_name_plural = "Instantanés de statistiques"
+        ordering = ['fcp_name', 'type_snapshot', '-as_of_date']
+        unique_together = ['fcp_name', 'type_snapshot', 'as_of_date']
+    
+    def __str__(self):
+        return f"{self.fcp_name} - {self.type_snapshot} au {self.as_of_date}"
+
+
+class FcpRunningStats(models.Model):
+    """
+    Accumulateur des statistiques depuis l'origine d'un FCP (moments des
+    rendements quotidiens, plus haut et drawdown, jours positifs / négatifs),
+    mis à jour en O(1) par VL ajoutée (voir analytics/running.py).
+    À jour tant que data_version correspond à la version courante des VL.
+    """
+    fcp_name = models.CharField(max_length=200, unique=True, verbose_name="Nom du FCP")
+    data_version = models.PositiveIntegerField(default=0, verbose_name="Version des données VL")
+    nb_vl = models.PositiveIntegerField(default=0, verbose_name="Nombre de VL")
+    first_date = models.DateField(null=True, blank=True, verbose_name="Première date")
+    first_value = models.FloatField(null=True, blank=True, verbose_name="Première VL")
+    last_date = models.DateField(null=True, blank=True, verbose_name="Dernière date")
+    last_value = models.FloatField(null=True, blank=True, verbose_name="Dernière VL")
+    mean = models.FloatField(default=0, verbose_name="Rendement moyen")
+    m2 = models.FloatField(default=0, verbose_name="Somme des écarts au carré")
+    m3 = models.FloatField(default=0, verbose_name="Somme des écarts au cube")
+    m4 = models.FloatField(default=0, verbose_name="Somme des écarts puissance 4")
+    jours_positifs = models.PositiveIntegerField(default=0, verbose_name="Jours positifs")
+    jours_negatifs = models.PositiveIntegerField(default=0, verbose_name="Jours négatifs")
+    neg_sumsq = models.FloatField(default=0, verbose_name="Somme des carrés des rendements négatifs")
+    rdt_min = models.FloatField(null=True, blank=True, verbose_name="Rendement minimum")
+    rdt_max = models.FloatField(null=True, blank=True, verbose_name="Rendement maximum")
+    vl_min = models.FloatField(null=True, blank=True, verbose_name="VL minimum")
+    vl_max = models.FloatField(null=True, blank=True, verbose_name="VL maximum")
+    max_drawdown = models.FloatField(default=0, verbose_name="Drawdown maximum (%)")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Mis à jour le")
+
+    class Meta:
+        verbose_name = "Statistiques cumulées"
+        verbose_name_plural = "Statistiques cumulées"
+        ordering = ['fcp_name']
+
+    def __str__(self):
+        return f"{self.fcp_name} : {self.nb_vl} VL au {self.last_date}"
+
+
+# ============================================================================
+# Travaux d'export en arrière-plan (PPT, PDF, factsheet)
+# ============================================================================
+
+class TypeExport(models.TextChoices):
+    """Types d'exports générés en arrière-plan"""
+    PPT = 'ppt', 'Présentation PowerPoint'
+    PDF = 'pdf', 'Rapport PDF'
+    FACTSHEET = 'factsheet', 'Factsheet PDF'
+
+
+class StatutExport(models.TextChoices):
+    """États d'un travail d'export"""
+    EN_ATTENTE = 'pending', 'En attente'
+    EN_COURS = 'running', 'En cours'
+    TERMINE = 'done', 'Terminé'
+    ECHEC = 'failed', 'Échec'
+
+
+class ExportJob(models.Model):
+    """
+    Travail d'export mis en file d'attente par les API d'export et traité par
+    la commande run_export_worker. Le fichier généré est conservé sur disque
+    (settings.FCP_EXPORT_DIR). Voir fcp_app/jobs.py.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    type_export = models.CharField(max_length=20, choices=TypeExport.choices, verbose_name="Type d'export")
+    parametres = models.JSONField(default=dict, verbose_name="Paramètres")
+    statut = models.CharField(
+        max_length=20,
+        choices=StatutExport.choices,
+        default=StatutExport.EN_ATTENTE,
+        db_index=True,
+        verbose_name="Statut"
+    )
+    progression = models.PositiveSmallIntegerField(default=0, verbose_name="Progression (%)")
+    message = models.CharField(max_length=255, blank=True, verbose_name="Étape en cours")
+    erreur = models.TextField(blank=True, verbose_name="Erreur")
+    fichier = models.CharField(max_length=255, blank=True, verbose_name="Fichier généré")
+    nom_fichier = models.CharField(max_length=255, blank=True, verbose_name="Nom du fichier")
+    content_type = models.CharField(max_length=100, blank=True, verbose_name="Type MIME")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Créé le")
+    started_at = models.DateTimeField(null=True, blank=True, verbose_name="Démarré le")
+    finished_at = models.DateTimeField(null=True, blank=True, verbose_name="Terminé le")
+    worker = models.CharField(max_length=100, blank=True, verbose_name="Worker")
+    heartbeat_at = models.DateTimeField(null=True, blank=True, verbose_name="Dernier signal du worker")
+    
+    class Meta:
+        verbose_name = "Travail d'export"
+        verbose_name_plural = "Travaux d'export"
+        ordering = ['-created_at']
+    
+    def __str__(self):
+        return f"{self.get_type_export_display()} - {self.get_statut_display()} ({self.created_at:%d/%m/%Y %H:%M})"
+
+
 # Dictionnaire de mapping nom FCP -> modèle VL
 FCP_VL_MODELS = {
     "FCP ACTIONS PHARMACIE": VL_FCP_Actions_Pharmacie,
@@ -676,3 +881,11 @@ def get_vl_model(fcp_name):
     """Retourne le modèle VL correspondant au nom du FCP"""
     return FCP_VL_MODELS.get(fcp_name)
 
+
+# Mapping inverse modèle VL -> nom FCP
+VL_MODEL_FCP_NAMES = {model: name for name, model in FCP_VL_MODELS.items()}
+
+
+def get_fcp_name(vl_model):
+    """Retourne le nom du FCP correspondant à un modèle VL"""
+    return VL_MODEL_FCP_NAMES.get(vl_model)
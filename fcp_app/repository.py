@@ -0,0 +1,209 @@
+"""
+Accès aux VL via la table unifiée ValeurLiquidative
+
+- Synchronisation de la table unifiée avec les 25 tables historiques
+  (source de vérité : import, synchronisation SharePoint, admin)
+- Lecture de plusieurs FCP en une seule requête (index unique fcp, date)
+"""
+import threading
+from contextlib import contextmanager
+from itertools import groupby
+
+import numpy as np
+from django.db import transaction
+from django.db.models import Count, Min, Max
+
+from .analytics import VLSeries, invalidate
+from .models import FicheSignaletique, ValeurLiquidative, FCP_VL_MODELS, get_vl_model
+
+_bulk = threading.local()
+
+
+def get_fcp_ids(fcp_names=None):
+    """Nom du FCP -> identifiant de la fiche signalétique (une requête)"""
+    queryset = FicheSignaletique.objects.all()
+    if fcp_names is not None:
+        queryset = queryset.filter(nom__in=list(fcp_names))
+    return dict(queryset.values_list('nom', 'id'))
+
+
+# ============================================================================
+# Synchronisation avec les tables historiques
+# ============================================================================
+
+def sync_unified_vl(fcp_name):
+    """
+    Reconstruit les lignes d'un FCP dans la table unifiée à partir de sa
+    table historique. Retourne le nombre de VL copiées.
+    """
+    vl_model = get_vl_model(fcp_name)
+    fcp_id = get_fcp_ids([fcp_name]).get(fcp_name)
+    if vl_model is None or fcp_id is None:
+        return 0
+
+    rows = vl_model.objects.values_list('date', 'valeur', 'actif_net', 'nombre_parts')
+    with transaction.atomic():
+        ValeurLiquidative.objects.filter(fcp_id=fcp_id).delete()
+        created = ValeurLiquidative.objects.bulk_create(
+            [
+                ValeurLiquidative(fcp_id=fcp_id, date=d, valeur=v, actif_net=a, nombre_parts=n)
+                for d, v, a, n in rows
+            ],
+            batch_size=500
+        )
+    return len(created)
+
+
+def vl_changed(fcp_name):
+    """
+    À appeler après une écriture en masse (bulk_create, update) dans la table
+    historique d'un FCP : resynchronise la table unifiée et invalide le cache.
+    Regroupé en fin de bloc à l'intérieur de bulk_vl_changes().
+    """
+    pending = getattr(_bulk, 'names', None)
+    if pending is not None:
+        pending.add(fcp_name)
+        return
+    sync_unified_vl(fcp_name)
+    invalidate(fcp_name)
+
+
+def clear_vl_table(fcp_name):
+    """
+    Vide la table historique d'un FCP en une requête DELETE, sans signal
+    ligne par ligne, puis appelle vl_changed(). Retourne le nombre de VL
+    supprimées.
+    """
+    queryset = get_vl_model(fcp_name).objects.all()
+    deleted = queryset._raw_delete(queryset.db)
+    vl_changed(fcp_name)
+    return deleted
+
+
+@contextmanager
+def bulk_vl_changes():
+    """
+    Regroupe les modifications de VL du bloc (signaux ligne par ligne d'un
+    import, appels à vl_changed) : une seule resynchronisation et une seule
+    invalidation par FCP à la sortie.
+    Si le bloc échoue dans une transaction, rien n'est reporté : l'annulation
+    de la transaction défait aussi les modifications (et la transaction
+    interrompue n'accepte plus de requêtes). Hors transaction, les
+    modifications déjà enregistrées sont reportées avant de relancer l'erreur.
+    """
+    if getattr(_bulk, 'names', None) is not None:
+        # Bloc imbriqué : le bloc englobant traite les FCP
+        yield
+        return
+
+    _bulk.names = set()
+    try:
+        yield
+    except BaseException:
+        names = _bulk.names
+        _bulk.names = None
+        if not transaction.get_connection().in_atomic_block:
+            _flush_vl_changes(names)
+        raise
+    names = _bulk.names
+    _bulk.names = None
+    _flush_vl_changes(names)
+
+
+def _flush_vl_changes(names):
+    for fcp_name in sorted(names):
+        sync_unified_vl(fcp_name)
+    if names:
+        invalidate(*names)
+
+
+def mirror_vl_saved(fcp_name, instance, created):
+    """Répercute l'enregistrement d'une VL historique dans la table unifiée"""
+    if getattr(_bulk, 'names', None) is not None:
+        _bulk.names.add(fcp_name)
+        return
+    fcp_id = get_fcp_ids([fcp_name]).get(fcp_name)
+    if fcp_id is None:
+        return
+    ValeurLiquidative.objects.update_or_create(
+        fcp_id=fcp_id,
+        date=instance.date,
+        defaults={
+            'valeur': instance.valeur,
+            'actif_net': instance.actif_net,
+            'nombre_parts': instance.nombre_parts,
+        }
+    )
+    if not created:
+        # La date a pu être modifiée : retirer les dates absentes de la table historique
+        ValeurLiquidative.objects.filter(fcp_id=fcp_id).exclude(
+            date__in=type(instance).objects.values('date')
+        ).delete()
+    invalidate(fcp_name)
+
+
+def mirror_vl_deleted(fcp_name, instance):
+    """Répercute la suppression d'une VL historique dans la table unifiée"""
+    if getattr(_bulk, 'names', None) is not None:
+        _bulk.names.add(fcp_name)
+        return
+    ValeurLiquidative.objects.filter(fcp__nom=fcp_name, date=instance.date).delete()
+    invalidate(fcp_name)
+
+
+# ============================================================================
+# Lecture multi-FCP
+# ============================================================================
+
+def load_many_series(fcp_names=None, start_date=None, end_date=None):
+    """
+    Séries de plusieurs FCP (tous par défaut) en une seule requête sur la
+    table unifiée : {nom: VLSeries}. Les FCP sans VL sont absents.
+    """
+    fcp_ids = get_fcp_ids(fcp_names if fcp_names is not None else FCP_VL_MODELS)
+    names_by_id = {fcp_id: name for name, fcp_id in fcp_ids.items()}
+
+    queryset = ValeurLiquidative.objects.filter(fcp_id__in=list(names_by_id))
+    if start_date:
+        queryset = queryset.filter(date__gte=start_date)
+    if end_date:
+        queryset = queryset.filter(date__lte=end_date)
+    rows = queryset.order_by('fcp_id', 'date').values_list('fcp_id', 'date', 'valeur')
+
+    result = {}
+    for fcp_id, fcp_rows in groupby(rows, key=lambda row: row[0]):
+        _, dates, valeurs = zip(*fcp_rows)
+        result[names_by_id[fcp_id]] = VLSeries(dates, np.array(valeurs, dtype=np.float64))
+    return result
+
+
+def load_vl_rows(fcp_names=None):
+    """
+    VL de plusieurs FCP en une seule requête, valeurs Decimal :
+    {nom: [{'date': ..., 'valeur': ...}, ...]} trié par date.
+    """
+    fcp_ids = get_fcp_ids(fcp_names if fcp_names is not None else FCP_VL_MODELS)
+    names_by_id = {fcp_id: name for name, fcp_id in fcp_ids.items()}
+
+    rows = (
+        ValeurLiquidative.objects.filter(fcp_id__in=list(names_by_id))
+        .order_by('fcp_id', 'date')
+        .values_list('fcp_id', 'date', 'valeur')
+    )
+    return {
+        names_by_id[fcp_id]: [{'date': d, 'valeur': v} for _, d, v in fcp_rows]
+        for fcp_id, fcp_rows in groupby(rows, key=lambda row: row[0])
+    }
+
+
+def fund_summaries(fcp_names=None):
+    """Nombre de VL, première et dernière date par FCP (une requête agrégée)"""
+    queryset = ValeurLiquidative.objects.all()
+    if fcp_names is not None:
+        queryset = queryset.filter(fcp__nom__in=list(fcp_names))
+    return {
+        row['fcp__nom']: {'count': row['count'], 'date_min': row['date_min'], 'date_max': row['date_max']}
+        for row in queryset.order_by().values('fcp__nom').annotate(
+            count=Count('id'), date_min=Min('date'), date_max=Max('date')
+        )
+    }
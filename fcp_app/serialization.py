@@ -0,0 +1,104 @@
+"""
+Sérialisation JSON rapide des réponses d'API (séries temporelles)
+
+- dumps() : orjson s'il est installé (encodage en C, UTF-8 compact), sinon
+  json de la bibliothèque standard avec le même format compact. Même
+  résultat avec les deux : scalaires et tableaux NumPy acceptés, NaN et
+  infinis écrits null (JSON valide)
+- FastJsonResponse : JsonResponse encodée avec dumps()
+- Format colonnes (?format=columnar) : une liste par champ au lieu d'un
+  objet par point ; les dates sont encodées par une date de départ et des
+  écarts en jours (entiers), calculés en une opération NumPy
+"""
+import json
+import math
+
+import numpy as np
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponse
+
+try:
+    import orjson
+except ImportError:  # orjson optionnel
+    orjson = None
+
+RESPONSE_FORMATS = ('records', 'columnar')
+
+_encoder = DjangoJSONEncoder()
+
+
+def _default(obj):
+    """Types non natifs : NumPy (scalaires, tableaux), puis Decimal, dates, UUID... comme DjangoJSONEncoder"""
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    return _encoder.default(obj)
+
+
+def _finite(obj):
+    """Copie de data pour json : NumPy converti, NaN et infinis remplacés par None (comme orjson)"""
+    if isinstance(obj, float):
+        return obj if math.isfinite(obj) else None
+    if isinstance(obj, dict):
+        return {key: _finite(value) for key, value in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_finite(value) for value in obj]
+    if isinstance(obj, (np.generic, np.ndarray)):
+        return _finite(obj.tolist())
+    return obj
+
+
+def dumps(data):
+    """Encode en JSON (bytes UTF-8) ; NumPy, Decimal, UUID, etc. acceptés, NaN / infinis -> null"""
+    if orjson is not None:
+        return orjson.dumps(
+            data, default=_default, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+        )
+    return json.dumps(
+        _finite(data), default=_default, allow_nan=False, ensure_ascii=False, separators=(',', ':')
+    ).encode('utf-8')
+
+
+class FastJsonResponse(HttpResponse):
+    """Réponse JSON encodée avec dumps() (orjson si disponible)"""
+
+    def __init__(self, data, **kwargs):
+        kwargs.setdefault('content_type', 'application/json')
+        super().__init__(content=dumps(data), **kwargs)
+
+
+def response_format(request):
+    """Format demandé (paramètre format : records par défaut, columnar), None s'il est inconnu"""
+    fmt = request.GET.get('format', 'records')
+    return fmt if fmt in RESPONSE_FORMATS else None
+
+
+def date_offsets(dates):
+    """
+    Dates (datetime64[D], date ou chaînes YYYY-MM-DD) encodées par la
+    première date et l'écart en jours de chaque date :
+    {'start': 'YYYY-MM-DD', 'offsets': [0, 1, 4, ...]}.
+    """
+    dates = np.asarray(dates, dtype='datetime64[D]')
+    if dates.size == 0:
+        return {'start': None, 'offsets': []}
+    return {'start': str(dates[0]), 'offsets': (dates - dates[0]).astype(np.int64).tolist()}
+
+
+def series_columns(series):
+    """Série de VL au format colonnes : {'dates': date_offsets, 'values': [...]}"""
+    return {'dates': date_offsets(series.date_index), 'values': series.values.tolist()}
+
+
+def records_to_columns(records, date_key='date'):
+    """
+    Liste d'objets de mêmes clés -> {clé: [valeurs]} ; la colonne date_key
+    (si présente) est encodée par date_offsets sous la clé 'dates'.
+    """
+    if not records:
+        return {}
+    columns = {key: [record[key] for record in records] for key in records[0]}
+    if date_key in columns:
+        columns = {'dates': date_offsets(columns.pop(date_key)), **columns}
+    return columns
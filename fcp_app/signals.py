@@ -0,0 +1,29 @@
+"""
+Signaux de l'application : report des modifications de VL
+(table unifiée ValeurLiquidative et cache des séries)
+"""
+from django.db.models.signals import post_save, post_delete
+
+from .models import FCP_VL_MODELS, get_fcp_name
+from .repository import mirror_vl_saved, mirror_vl_deleted
+
+
+def vl_saved(sender, instance, created, **kwargs):
+    """Création ou modification d'une VL : table unifiée et cache de la série"""
+    fcp_name = get_fcp_name(sender)
+    if fcp_name:
+        mirror_vl_saved(fcp_name, instance, created)
+
+
+def vl_deleted(sender, instance, **kwargs):
+    """Suppression d'une VL : table unifiée et cache de la série"""
+    fcp_name = get_fcp_name(sender)
+    if fcp_name:
+        mirror_vl_deleted(fcp_name, instance)
+
+
+def connect_signals():
+    """Connecte les signaux sur chaque table VL (pas de récepteur global)"""
+    for vl_model in FCP_VL_MODELS.values():
+        post_save.connect(vl_saved, sender=vl_model, dispatch_uid=f'vl_saved_{vl_model.__name__}')
+        post_delete.connect(vl_deleted, sender=vl_model, dispatch_uid=f'vl_deleted_{vl_model.__name__}')
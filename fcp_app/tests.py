@@ -1,9 +1,23 @@
 ﻿"""Tests pour l'application FCP - Gestion des Fonds Communs de Placement"""
-from django.test import TestCase, Client
+from django.test import TestCase, TransactionTestCase, Client, AsyncClient
+from django.test.utils import CaptureQueriesContext
+from django.core.management import call_command
 from django.urls import reverse
+from django.http import HttpResponse
+from django.db import IntegrityError, OperationalError, connections, router, transaction
+from django.utils import timezone
 from decimal import Decimal
-from datetime import date, timedelta
+from datetime import date, datetime, timedelta
+import io
 import json
+import os
+import tempfile
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+
+import numpy as np
+import pandas as pd
 
 from .models import (
     FicheSignaletique, 
@@ -17,8 +31,46 @@ from .models import (
     InstrumentObligation,
     BenchmarkObligation,
     BenchmarkBRVM,
+    VLDataVersion,
+    FcpAnalyticsSnapshot,
+    FcpRunningStats,
+    TypeSnapshot,
+    ValeurLiquidative,
+    ExportJob,
+    StatutExport,
+    TypeExport,
 )
+from .importers import melt_vl_frame, split_by_fcp, to_decimals, diff_vl_frame
+from .repository import load_many_series, fund_summaries, bulk_vl_changes, clear_vl_table, vl_changed
+from .jobs import claim_next_job, enqueue, requeue_interrupted, run_job
+from .serialization import dumps
+from .exports import count_vl_rows
+from .charts import ChartCache, render_vl_charts
+from .instrumentation import span, current_profile
+from .db import read_only
+from .management.commands.benchmark_endpoints import populate_synthetic_vl, benchmark_endpoints, measure_endpoint
 from .data import FCP_FICHE_SIGNALETIQUE
+from .analytics import (
+    VLSeries,
+    load_series,
+    daily_returns,
+    annualized_volatility,
+    max_drawdown,
+    drawdown_episodes,
+    lttb_indices,
+    analyse_statistics,
+    rolling_std,
+    rolling_beta,
+    get_series,
+    build_snapshots,
+    fund_analytics,
+    return_panel,
+    correlation_matrix,
+    RunningStats,
+    get_running_stats,
+    append_running_stats,
+    ANNUALIZATION_FACTOR,
+)
 
 
 class FicheSignaletiqueTests(TestCase):
@@ -371,6 +423,97 @@ class APITests(TestCase):
         # Vérifier qu'on a bien 365 VL
         self.assertEqual(len(data['data']), 365)
     
+    def test_api_vl_data_max_points(self):
+        """Test API données VL réduites par LTTB (max_points)"""
+        url = reverse('fcp_app:api_vl_data')
+        complete = self.client.get(url, {'fcp': 'FCP PLACEMENT AVANTAGE'}).json()['data']
+        data = self.client.get(url, {'fcp': 'FCP PLACEMENT AVANTAGE', 'max_points': 50}).json()['data']
+        self.assertEqual(len(data), 50)
+        self.assertEqual(data[0], complete[0])
+        self.assertEqual(data[-1], complete[-1])
+        self.assertTrue(all(point in complete for point in data))
+        
+        # Période plus courte que max_points : toutes les VL
+        data = self.client.get(url, {'fcp': 'FCP PLACEMENT AVANTAGE', 'period': '1m', 'max_points': 100}).json()['data']
+        self.assertEqual(len(data), 31)
+        
+        for invalid in ('2', 'abc'):
+            response = self.client.get(url, {'fcp': 'FCP PLACEMENT AVANTAGE', 'max_points': invalid})
+            self.assertEqual(response.status_code, 400)
+    
+    def test_api_columnar_format(self):
+        """Test format colonnes : mêmes VL que le format objets, dates en écarts de jours"""
+        url = reverse('fcp_app:api_vl_data')
+        records = self.client.get(url, {'fcp': 'FCP PLACEMENT AVANTAGE'}).json()['data']
+        columns = self.client.get(url, {'fcp': 'FCP PLACEMENT AVANTAGE', 'format': 'columnar'}).json()['data']
+        start = date.fromisoformat(columns['dates']['start'])
+        self.assertEqual(
+            [{'date': (start + timedelta(days=offset)).isoformat(), 'valeur': v}
+             for offset, v in zip(columns['dates']['offsets'], columns['values'])],
+            records
+        )
+        
+        full = self.client.get(
+            reverse('fcp_app:api_fcp_full_data'), {'fcp': 'FCP PLACEMENT AVANTAGE', 'format': 'columnar'}
+        ).json()
+        self.assertEqual(full['vl_data'], columns)
+        self.assertEqual(full['analyse_stats']['underwater_data']['dates'], columns['dates'])
+        self.assertEqual(len(full['analyse_stats']['histogram_data']['count']), 30)
+        
+        # Encodeur de la bibliothèque standard si orjson n'est pas installé
+        with mock.patch('fcp_app.serialization.orjson', None):
+            fallback = self.client.get(url, {'fcp': 'FCP PLACEMENT AVANTAGE', 'format': 'columnar'}).json()['data']
+        self.assertEqual(fallback, columns)
+        
+        response = self.client.get(url, {'fcp': 'FCP PLACEMENT AVANTAGE', 'format': 'csv'})
+        self.assertEqual(response.status_code, 400)
+    
+    def test_dumps_numpy_and_nan(self):
+        """Test encodage JSON identique avec orjson et json : NumPy accepté, NaN / infinis -> null"""
+        data = {
+            'scalaire': np.float64(1.25), 'entier': np.int64(3), 'nan': float('nan'),
+            'inf': np.float64('inf'), 'tableau': np.array([1.0, np.nan]), 'decimal': Decimal('1.5'),
+        }
+        expected = {'scalaire': 1.25, 'entier': 3, 'nan': None, 'inf': None, 'tableau': [1.0, None], 'decimal': '1.5'}
+        self.assertEqual(json.loads(dumps(data)), expected)
+        with mock.patch('fcp_app.serialization.orjson', None):
+            self.assertEqual(json.loads(dumps(data)), expected)
+    
+    def test_api_conditional_responses(self):
+        """Test ETag : 304 sans calcul, nouvel ETag après une écriture"""
+        url = reverse('fcp_app:api_vl_data')
+        params = {'fcp': 'FCP PLACEMENT AVANTAGE'}
+        response = self.client.get(url, params)
+        etag = response['ETag']
+        # Pas de Last-Modified (fiches sans date de modification) : If-Modified-Since ignoré
+        self.assertNotIn('Last-Modified', response)
+        self.assertEqual(
+            self.client.get(url, params, HTTP_IF_MODIFIED_SINCE='Fri, 01 Jan 2100 00:00:00 GMT').status_code, 200
+        )
+        self.assertIn('max-age=', response['Cache-Control'])
+        
+        with mock.patch('fcp_app.views.get_series') as get_series:
+            response = self.client.get(url, params, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        get_series.assert_not_called()
+        
+        # Autre FCP : validateur différent ; erreurs sans validateur
+        self.assertNotEqual(self.client.get(url, {'fcp': 'FCP CAPITAL RETRAITE'})['ETag'], etag)
+        self.assertNotIn('ETag', self.client.get(url))
+        
+        VL_FCP_Placement_Avantage.objects.create(
+            fcp=self.fcp, date=self.today + timedelta(days=1), valeur=Decimal("9990")
+        )
+        response = self.client.get(url, params, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        
+        # Fiches signalétiques (non versionnées) prises en compte
+        etag = response['ETag']
+        self.fcp.echelle_risque = 4
+        self.fcp.save()
+        self.assertNotEqual(self.client.get(url, params)['ETag'], etag)
+    
     def test_composition_view(self):
         """Test page composition"""
         response = self.client.get(reverse('fcp_app:composition'))
@@ -383,6 +526,198 @@ class APITests(TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertTemplateUsed(response, 'fcp_app/exportations.html')
     
+    def test_export_csv_streaming(self):
+        """Test export CSV en streaming avec rendements"""
+        response = self.client.post(
+            reverse('fcp_app:api_export_data'),
+            json.dumps({
+                'format': 'csv',
+                'fcps': ["FCP PLACEMENT AVANTAGE"],
+                'content': ['vl', 'returns'],
+            }),
+            content_type='application/json'
+        )
+        self.assertTrue(response.streaming)
+        lines = b''.join(response.streaming_content).decode('utf-8').lstrip('\ufeff').splitlines()
+        self.assertEqual(lines[0], 'FCP;Date;Valeur Liquidative;Rendement (%)')
+        self.assertEqual(len(lines), 366)
+        self.assertTrue(lines[1].endswith(';10182,0000;0'))
+        self.assertTrue(lines[2].endswith(';-0,0049'))
+    
+    def test_export_xlsx_write_only(self):
+        """Test export XLSX en mode write-only au-delà du seuil"""
+        import openpyxl
+        with mock.patch('fcp_app.views.XLSX_WRITE_ONLY_THRESHOLD', 100):
+            response = self.client.post(
+                reverse('fcp_app:api_export_data'),
+                json.dumps({'format': 'xlsx', 'fcps': ["FCP PLACEMENT AVANTAGE"], 'content': ['vl']}),
+                content_type='application/json'
+            )
+        self.assertTrue(response.streaming)
+        wb = openpyxl.load_workbook(io.BytesIO(b''.join(response.streaming_content)))
+        ws = wb["FCP PLACEMENT AVANTAGE"]
+        self.assertEqual(ws.max_row, 366)
+        self.assertEqual(ws['B2'].value, 10182.0)
+        self.assertEqual(ws['B2'].number_format, '#,##0.0000')
+        self.assertTrue(ws['A1'].font.b)
+    
+    def test_count_vl_rows(self):
+        """Test nombre de VL à exporter compté dans les tables exportées"""
+        # Écriture en masse sans vl_changed : table unifiée pas encore à jour
+        VL_FCP_Placement_Avantage.objects.bulk_create([
+            VL_FCP_Placement_Avantage(fcp=self.fcp, date=self.today + timedelta(days=1), valeur=Decimal("9999"))
+        ])
+        self.assertEqual(count_vl_rows(["FCP PLACEMENT AVANTAGE", "FCP INCONNU"]), 366)
+        self.assertEqual(count_vl_rows(["FCP PLACEMENT AVANTAGE"], start_date=self.today), 2)
+    
+    def test_render_vl_charts_parallel(self):
+        """Test rendu des graphiques en pool de processus : même ordre, mêmes images"""
+        dates = [self.today - timedelta(days=i) for i in range(30, 0, -1)]
+        charts = [
+            (dates, [100 + i for i in range(30)], "FCP A", 'standard'),
+            (dates, [100 - i for i in range(30)], "FCP B", 'moderne'),
+        ]
+        with mock.patch('os.cpu_count', return_value=4):
+            parallel = render_vl_charts(charts, max_workers=2)
+            self.assertEqual(parallel, render_vl_charts(charts, max_workers=1))
+            # Pool du module réutilisé d'un export à l'autre
+            with mock.patch('fcp_app.charts.ProcessPoolExecutor', side_effect=AssertionError('nouveau pool')):
+                self.assertEqual(render_vl_charts(charts, max_workers=2), parallel)
+        self.assertNotEqual(parallel[0], parallel[1])
+        self.assertTrue(parallel[0].startswith(b'\x89PNG'))
+    
+    def test_chart_cache(self):
+        """Test cache des graphiques : clé par contenu, réutilisation, éviction LRU"""
+        dates = [self.today - timedelta(days=i) for i in range(10, 0, -1)]
+        chart = (dates, [100 + i for i in range(10)], "FCP A", 'standard')
+        corrected = (dates, [100 + i for i in range(9)] + [120], "FCP A", 'standard')
+        self.assertNotEqual(ChartCache.key(*chart), ChartCache.key(*corrected))
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = ChartCache(tmp, max_bytes=10 ** 9)
+            png = render_vl_charts([chart], cache=cache)[0]
+            self.assertEqual(cache.get(ChartCache.key(*chart)), png)
+            with mock.patch('fcp_app.charts.render_vl_chart') as render:
+                self.assertEqual(render_vl_charts([chart], cache=cache), [png])
+                render.assert_not_called()
+            
+            # Plafond : seul le graphique le plus récemment utilisé est conservé
+            cache.max_bytes = int(len(png) * 1.5)
+            os.utime(os.path.join(tmp, f'{ChartCache.key(*chart)}.png'), (0, 0))
+            render_vl_charts([corrected], cache=cache)
+            self.assertIsNone(cache.get(ChartCache.key(*chart)))
+            self.assertIsNotNone(cache.get(ChartCache.key(*corrected)))
+    
+    def test_api_scatter_data(self):
+        """Test API scatter : rendement / volatilité de tous les FCP sans requête par FCP"""
+        FicheSignaletique.objects.create(
+            nom="FCP DJOLOF", echelle_risque=2, type_fond="Obligataire", horizon=3,
+            benchmark_oblig=Decimal("100.00"), benchmark_brvmc=Decimal("0.00")
+        )
+        for i in range(60):
+            VL_FCP_Djolof.objects.create(
+                fcp=FicheSignaletique.objects.get(nom="FCP DJOLOF"),
+                date=self.today - timedelta(days=i),
+                valeur=Decimal("5000") + Decimal(i % 7)
+            )
+        
+        response = self.client.get(reverse('fcp_app:api_scatter_data'), {'period': 'origin'})
+        self.assertEqual(response.status_code, 200)
+        data = {point['nom']: point for point in response.json()['data']}
+        self.assertEqual(data['FCP DJOLOF']['type_fond'], 'Obligataire')
+        self.assertEqual(response.json()['last_date'], self.today.strftime('%d/%m/%Y'))
+        
+        valeurs = list(VL_FCP_Placement_Avantage.objects.order_by('date').values_list('valeur', flat=True))
+        self.assertEqual(data['FCP PLACEMENT AVANTAGE']['rendement'], round((float(valeurs[-1]) / float(valeurs[0]) - 1) * 100, 2))
+        self.assertEqual(data['FCP PLACEMENT AVANTAGE']['volatilite'], round(annualized_volatility(daily_returns(valeurs)), 2))
+        
+        # Séries en cache : validateur (versions, fiches) + fiches + versions,
+        # quel que soit le nombre de FCP ; validateur seul si le client a déjà la réponse
+        with self.assertNumQueries(4):
+            response = self.client.get(reverse('fcp_app:api_scatter_data'), {'period': 'ytd'})
+        with self.assertNumQueries(2):
+            response = self.client.get(
+                reverse('fcp_app:api_scatter_data'), {'period': 'ytd'}, HTTP_IF_NONE_MATCH=response['ETag']
+            )
+        self.assertEqual(response.status_code, 304)
+    
+    def test_api_correlation_matrix(self):
+        """Test API matrice de corrélation : paramètres et mise en cache par période"""
+        fiche = FicheSignaletique.objects.create(
+            nom="FCP DJOLOF", echelle_risque=2, type_fond="Obligataire", horizon=3,
+            benchmark_oblig=Decimal("100.00"), benchmark_brvmc=Decimal("0.00")
+        )
+        for i in range(60):
+            VL_FCP_Djolof.objects.create(fcp=fiche, date=self.today - timedelta(days=i), valeur=Decimal("5000") + Decimal(i % 7))
+        
+        url = reverse('fcp_app:api_correlation_matrix')
+        data = self.client.get(url, {'period': 'origin'}).json()
+        self.assertEqual(data['fcp_names'], ['FCP DJOLOF', 'FCP PLACEMENT AVANTAGE'])
+        self.assertEqual(data['nb_observations'], 59)
+        self.assertEqual([data['matrix'][0][0], data['matrix'][1][1]], [1.0, 1.0])
+        self.assertEqual(data['matrix'][0][1], data['matrix'][1][0])
+        
+        # Résultat en cache : validateur (2 requêtes) + fiches + versions
+        with self.assertNumQueries(4):
+            self.client.get(url, {'period': 'origin'})
+        # Une VL modifiée invalide le résultat
+        VL_FCP_Djolof.objects.filter(date=self.today).update(valeur=Decimal("9000"))
+        vl_changed("FCP DJOLOF")
+        self.assertNotEqual(self.client.get(url, {'period': 'origin'}).json()['matrix'], data['matrix'])
+        
+        data = self.client.get(url, {'method': 'spearman', 'alignment': 'pairwise'}).json()
+        self.assertEqual((data['method'], data['alignment']), ('spearman', 'pairwise'))
+        self.assertEqual(self.client.get(url, {'method': 'kendall'}).status_code, 400)
+    
+    def test_server_timing_header(self):
+        """Test en-tête Server-Timing : durée totale, SQL et étapes nommées"""
+        response = self.client.get(reverse('fcp_app:api_fcp_full_data'), {'fcp': 'FCP PLACEMENT AVANTAGE'})
+        self.assertEqual(response.status_code, 200)
+        
+        timing = response['Server-Timing']
+        self.assertRegex(timing, r'^total;dur=[\d.]+, sql;dur=[\d.]+;desc="\d+ queries"')
+        self.assertIn('load-series;dur=', timing)
+        self.assertIn('compute-stats;dur=', timing)
+        self.assertIn('desc="render"', timing)
+        
+        # Hors requête, span() ne mesure rien
+        with span('hors requête'):
+            self.assertIsNone(current_profile())
+    
+    def test_async_views(self):
+        """Test vues asynchrones sous ASGI : mêmes réponses qu'en WSGI, 304 et Server-Timing"""
+        async_client = AsyncClient()
+        for url_name in ('api_scatter_data', 'api_correlation_matrix'):
+            url = reverse(f'fcp_app:{url_name}')
+            response = async_to_sync(async_client.get)(url, {'period': 'ytd'})
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.json(), self.client.get(url, {'period': 'ytd'}).json())
+            self.assertIn('total;dur=', response['Server-Timing'])
+            
+            response = async_to_sync(async_client.get)(
+                url, {'period': 'ytd'}, headers={'If-None-Match': response['ETag']}
+            )
+            self.assertEqual(response.status_code, 304)
+        
+        response = async_to_sync(async_client.get)(reverse('fcp_app:valeurs_liquidatives'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, self.client.get(reverse('fcp_app:valeurs_liquidatives')).content)
+    
+    def test_benchmark_synthetic_data(self):
+        """Test benchmark : historiques synthétiques et mesure d'un endpoint"""
+        fcp_names = ['FCP PLACEMENT AVANTAGE', 'FCP DJOLOF']
+        populate_synthetic_vl(fcp_names, 250, seed=1)
+        self.assertEqual(VL_FCP_Placement_Avantage.objects.count(), 250)
+        self.assertEqual(ValeurLiquidative.objects.filter(fcp__nom='FCP DJOLOF').count(), 250)
+        self.assertLess(VL_FCP_Placement_Avantage.objects.order_by('date').last().date.weekday(), 5)
+        
+        method, url_name, params = benchmark_endpoints('FCP PLACEMENT AVANTAGE', fcp_names)['api_vl_data']
+        result = measure_endpoint(self.client, method, url_name, params, repeat=2)
+        self.assertEqual(result['status'], 200)
+        self.assertEqual(len(json.loads(self.client.get(reverse('fcp_app:api_vl_data'), params).content)['data']), 250)
+        self.assertGreater(result['queries'], 0)
+        self.assertLessEqual(result['min_ms'], result['median_ms'])
+    
     def test_a_propos_view(self):
         """Test page à propos"""
         response = self.client.get(reverse('fcp_app:a_propos'))
@@ -502,3 +837,669 @@ class DataIntegrityTests(TestCase):
                 100, 
                 f"{fcp_name}: benchmarks ne somment pas à 100%"
             )
+
+
+class AnalyticsTests(TestCase):
+    """Tests du moteur analytique vectorisé"""
+    
+    def setUp(self):
+        self.fcp = FicheSignaletique.objects.create(
+            nom="FCP PLACEMENT AVANTAGE",
+            echelle_risque=3,
+            type_fond="Diversifié",
+            horizon=5,
+            benchmark_oblig=Decimal("75.00"),
+            benchmark_brvmc=Decimal("25.00")
+        )
+        self.start = date(2024, 1, 1)
+        self.valeurs = [100, 102, 101, 99, 103, 104, 100, 105]
+        for i, valeur in enumerate(self.valeurs):
+            VL_FCP_Placement_Avantage.objects.create(
+                fcp=self.fcp,
+                date=self.start + timedelta(days=i),
+                valeur=Decimal(valeur)
+            )
+    
+    def test_load_series(self):
+        """Test chargement de la série en une requête, triée par date"""
+        with self.assertNumQueries(1):
+            series = load_series(VL_FCP_Placement_Avantage)
+        self.assertEqual(len(series), len(self.valeurs))
+        self.assertEqual(series.first_date, self.start)
+        self.assertEqual(series.last_value, 105.0)
+        self.assertEqual(series.date_strings()[0], '2024-01-01')
+    
+    def test_series_since(self):
+        """Test sous-série à partir d'une date"""
+        series = load_series(VL_FCP_Placement_Avantage)
+        sub = series.since(self.start + timedelta(days=5))
+        self.assertEqual(len(sub), 3)
+        self.assertEqual(sub.first_value, 104.0)
+    
+    def test_value_asof(self):
+        """Test VL de référence as-of (incluse ou strictement antérieure)"""
+        series = load_series(VL_FCP_Placement_Avantage)
+        jour = self.start + timedelta(days=3)
+        self.assertEqual(series.value_asof(jour), 99.0)
+        self.assertEqual(series.value_asof(jour, strict=True), 101.0)
+        self.assertEqual(series.point_asof(date(2030, 1, 1)), (self.start + timedelta(days=7), 105.0))
+        self.assertIsNone(series.value_asof(self.start, strict=True))
+    
+    def test_daily_returns_and_volatility(self):
+        """Test rendements quotidiens et volatilité annualisée"""
+        rendements = daily_returns(self.valeurs)
+        attendus = [(self.valeurs[i] / self.valeurs[i-1] - 1) * 100 for i in range(1, len(self.valeurs))]
+        self.assertEqual(len(rendements), len(attendus))
+        for r, a in zip(rendements, attendus):
+            self.assertAlmostEqual(r, a)
+        
+        moyenne = sum(attendus) / len(attendus)
+        variance = sum((r - moyenne) ** 2 for r in attendus) / (len(attendus) - 1)
+        self.assertAlmostEqual(annualized_volatility(rendements), variance ** 0.5 * ANNUALIZATION_FACTOR)
+        self.assertIsNone(annualized_volatility(rendements[:1]))
+    
+    def test_max_drawdown(self):
+        """Test drawdown maximal (pic 104 -> 100)"""
+        self.assertAlmostEqual(max_drawdown(self.valeurs), (104 - 100) / 104 * 100)
+    
+    def test_drawdown_episodes(self):
+        """Test épisodes de drawdown : les plus profonds en premier, épisode en cours"""
+        dates = [self.start + timedelta(days=i) for i in range(len(self.valeurs))]
+        episodes = drawdown_episodes(dates, np.array(self.valeurs, dtype=float))
+        self.assertEqual([e['depth'] for e in episodes], [round(4 / 104 * 100, 2), round(3 / 102 * 100, 2)])
+        self.assertEqual(episodes[1], {
+            'start_date': '2024-01-02', 'trough_date': '2024-01-04', 'end_date': '2024-01-05',
+            'depth': 2.94, 'duration': 3, 'recovery': 1,
+        })
+        self.assertEqual(len(drawdown_episodes(dates, np.array(self.valeurs, dtype=float), limit=1)), 1)
+        
+        # Plus haut égalé sans être dépassé : épisode toujours en cours
+        en_cours = drawdown_episodes(dates[:5], np.array([100, 100, 98, 98, 100], dtype=float))
+        self.assertEqual(en_cours, [{
+            'start_date': '2024-01-02', 'trough_date': '2024-01-03', 'end_date': None,
+            'depth': 2.0, 'duration': 4, 'recovery': None,
+        }])
+    
+    def test_lttb_indices(self):
+        """Test LTTB : extrémités et pic conservés"""
+        y = np.sin(np.arange(1000) / 50)
+        y[637] = 5
+        indices = lttb_indices(np.arange(1000), y, 40)
+        self.assertEqual(len(indices), 40)
+        self.assertEqual((indices[0], indices[-1]), (0, 999))
+        self.assertIn(637, indices)
+        self.assertEqual(lttb_indices(np.arange(10), np.arange(10), 40).tolist(), list(range(10)))
+    
+    def test_analyse_statistics(self):
+        """Test statistiques de l'onglet Analyse"""
+        stats = analyse_statistics(load_series(VL_FCP_Placement_Avantage))
+        self.assertEqual(stats['nb_observations'], 7)
+        self.assertEqual(stats['jours_positifs'] + stats['jours_negatifs'], 7)
+        self.assertEqual(stats['vl_max'], 105.0)
+        self.assertEqual(len(stats['histogram_data']), 30)
+        self.assertEqual(len(stats['underwater_data']), len(self.valeurs))
+        self.assertEqual(stats['underwater_data'][-1]['drawdown'], 0)
+        self.assertEqual(analyse_statistics(VLSeries([], [])), {})
+    
+    def test_rolling_kernels(self):
+        """Test écart-type et beta glissants contre le calcul fenêtre par fenêtre"""
+        rendements = daily_returns(self.valeurs)
+        bench = [0.5, -0.2, 0.1, 0.4, -0.3, 0.2, 0.6]
+        window = 4
+        stds = rolling_std(rendements, window)
+        betas = rolling_beta(rendements, bench, window)
+        self.assertEqual(len(stds), len(rendements) - window + 1)
+        for i in range(len(stds)):
+            fenetre = rendements[i:i + window]
+            b = bench[i:i + window]
+            m, mb = sum(fenetre) / window, sum(b) / window
+            variance = sum((r - m) ** 2 for r in fenetre) / (window - 1)
+            cov = sum((r - m) * (x - mb) for r, x in zip(fenetre, b)) / window
+            var_b = sum((x - mb) ** 2 for x in b) / window
+            self.assertAlmostEqual(stds[i], variance ** 0.5)
+            self.assertAlmostEqual(betas[i], cov / var_b)
+        # Benchmark constant : beta par défaut
+        self.assertTrue(all(b == 1 for b in rolling_beta(rendements, [0.0] * 7, window)))
+        
+        # Fenêtres constantes à 0, fenêtres peu volatiles conservées
+        rng = np.random.default_rng(0)
+        x = np.concatenate((rng.normal(0, 0.02, 200), [0.001] * 30, 0.001 + rng.normal(0, 1e-7, 30)))
+        stds = rolling_std(x, 20)
+        self.assertTrue(np.all(stds[200:211] == 0))
+        for i in range(240, len(x) - 19):
+            self.assertAlmostEqual(stds[i] / np.std(x[i:i + 20], ddof=1), 1, places=4)
+    
+    def test_correlation_matrix(self):
+        """Test matrice de corrélation : alignement strict / par paire, Pearson / Spearman"""
+        rng = np.random.default_rng(0)
+        jours = [self.start + timedelta(days=i) for i in range(40)]
+        series = {
+            'A': VLSeries(jours, 100 * np.cumprod(1 + rng.normal(0, 0.01, 40))),
+            'B': VLSeries(jours[::2], 100 * np.cumprod(1 + rng.normal(0, 0.01, 20))),
+            'C': VLSeries(jours[5:], 100 * np.cumprod(1 + rng.normal(0, 0.01, 35))),
+        }
+        names, dates, panel = return_panel(series)
+        self.assertEqual(names, ['A', 'B', 'C'])
+        self.assertEqual(len(dates), 39)
+        self.assertEqual(int(np.isnan(panel[:, 1]).sum()), 39 - 19)
+        
+        # Strict : dates communes aux trois FCP
+        complete = panel[~np.isnan(panel).any(axis=1)]
+        matrix, nb = correlation_matrix(panel)
+        self.assertEqual(nb, len(complete))
+        np.testing.assert_allclose(matrix, np.corrcoef(complete.T))
+        
+        # Par paire : A et C sur toutes leurs dates communes
+        matrix, nb = correlation_matrix(panel, pairwise=True)
+        rows = ~np.isnan(panel[:, 0]) & ~np.isnan(panel[:, 2])
+        self.assertAlmostEqual(matrix[0, 2], np.corrcoef(panel[rows, 0], panel[rows, 2])[0, 1])
+        self.assertEqual(nb, len(complete))
+        
+        # Spearman : corrélation des rangs, identique en strict et par paire pour (A, B)
+        strict, _ = correlation_matrix(panel[:, :2], 'spearman')
+        paire, _ = correlation_matrix(panel[:, :2], 'spearman', pairwise=True)
+        rows = ~np.isnan(panel[:, 1])
+        rangs = [panel[rows, j].argsort().argsort() for j in range(2)]
+        self.assertAlmostEqual(strict[0, 1], np.corrcoef(*rangs)[0, 1])
+        self.assertAlmostEqual(paire[0, 1], strict[0, 1])
+
+
+class SeriesCacheTests(TestCase):
+    """Tests du cache des séries VL et de son invalidation"""
+    
+    FCP_NAME = "FCP PLACEMENT AVANTAGE"
+    
+    def setUp(self):
+        self.fcp = FicheSignaletique.objects.create(
+            nom=self.FCP_NAME,
+            echelle_risque=3,
+            type_fond="Diversifié",
+            horizon=5,
+            benchmark_oblig=Decimal("75.00"),
+            benchmark_brvmc=Decimal("25.00")
+        )
+        for i in range(5):
+            VL_FCP_Placement_Avantage.objects.create(
+                fcp=self.fcp,
+                date=date(2024, 1, 1) + timedelta(days=i),
+                valeur=Decimal(100 + i)
+            )
+    
+    def test_cache_hit(self):
+        """Test série servie depuis le cache (seule la version est relue)"""
+        series = get_series(self.FCP_NAME)
+        self.assertEqual(len(series), 5)
+        with self.assertNumQueries(1):
+            self.assertIs(get_series(self.FCP_NAME), series)
+        self.assertIsNone(get_series("FCP INCONNU"))
+    
+    def test_invalidation_par_signal(self):
+        """Test invalidation lors d'un save / delete ORM"""
+        get_series(self.FCP_NAME)
+        VL_FCP_Placement_Avantage.objects.create(
+            fcp=self.fcp, date=date(2024, 2, 1), valeur=Decimal("110")
+        )
+        self.assertEqual(get_series(self.FCP_NAME).last_value, 110.0)
+        VL_FCP_Placement_Avantage.objects.filter(date=date(2024, 2, 1)).delete()
+        self.assertEqual(len(get_series(self.FCP_NAME)), 5)
+    
+    def test_invalidation_bulk_create(self):
+        """Test resynchronisation explicite après bulk_create (pas de signaux)"""
+        get_series(self.FCP_NAME)
+        VL_FCP_Placement_Avantage.objects.bulk_create([
+            VL_FCP_Placement_Avantage(fcp=self.fcp, date=date(2024, 2, 1), valeur=Decimal("110"))
+        ])
+        self.assertEqual(len(get_series(self.FCP_NAME)), 5)
+        vl_changed(self.FCP_NAME)
+        self.assertEqual(len(get_series(self.FCP_NAME)), 6)
+    
+    def test_bulk_invalidation(self):
+        """Test regroupement des invalidations : une seule par FCP"""
+        version = VLDataVersion.objects.get(fcp_name=self.FCP_NAME).version
+        with bulk_vl_changes():
+            VL_FCP_Placement_Avantage.objects.all().delete()
+            self.assertEqual(VLDataVersion.objects.get(fcp_name=self.FCP_NAME).version, version)
+        self.assertEqual(VLDataVersion.objects.get(fcp_name=self.FCP_NAME).version, version + 1)
+        self.assertEqual(len(get_series(self.FCP_NAME)), 0)
+
+
+class AnalyticsSnapshotTests(TestCase):
+    """Tests des instantanés de statistiques précalculées"""
+    
+    FCP_NAME = "FCP PLACEMENT AVANTAGE"
+    
+    def setUp(self):
+        self.client = Client()
+        self.fcp = FicheSignaletique.objects.create(
+            nom=self.FCP_NAME,
+            echelle_risque=3,
+            type_fond="Diversifié",
+            horizon=5,
+            benchmark_oblig=Decimal("75.00"),
+            benchmark_brvmc=Decimal("25.00")
+        )
+        for i in range(60):
+            VL_FCP_Placement_Avantage.objects.create(
+                fcp=self.fcp,
+                date=date(2024, 1, 1) + timedelta(days=i),
+                valeur=Decimal("100") + Decimal(i % 7)
+            )
+    
+    def test_build_snapshots(self):
+        """Test commande : un instantané Analyse + un factsheet par mois"""
+        call_command('build_analytics_snapshots', fcp=[self.FCP_NAME], months=['2024-01'], stdout=io.StringIO())
+        snapshot = FcpAnalyticsSnapshot.objects.get(fcp_name=self.FCP_NAME, type_snapshot=TypeSnapshot.ANALYSE)
+        self.assertEqual(snapshot.as_of_date, date(2024, 2, 29))
+        self.assertEqual(
+            snapshot.payload,
+            json.loads(json.dumps(fund_analytics(get_series(self.FCP_NAME))))
+        )
+        factsheet = FcpAnalyticsSnapshot.objects.get(fcp_name=self.FCP_NAME, type_snapshot=TypeSnapshot.FACTSHEET)
+        self.assertEqual(factsheet.as_of_date, date(2024, 1, 31))
+        self.assertEqual(factsheet.payload['statistics']['nb_observations'], 31)
+    
+    def test_view_serves_fresh_snapshot(self):
+        """Test vue servie depuis l'instantané, recalcul à la volée si périmé"""
+        build_snapshots(self.FCP_NAME)
+        snapshot = FcpAnalyticsSnapshot.objects.get(fcp_name=self.FCP_NAME, type_snapshot=TypeSnapshot.ANALYSE)
+        snapshot.payload['stats']['nb_vl'] = -1  # Marqueur
+        snapshot.save()
+        
+        url = reverse('fcp_app:api_fcp_full_data')
+        response = self.client.get(url, {'fcp': self.FCP_NAME})
+        self.assertEqual(response.json()['stats']['nb_vl'], -1)
+        
+        # Nouvelle VL : instantané périmé
+        VL_FCP_Placement_Avantage.objects.create(
+            fcp=self.fcp, date=date(2024, 3, 1), valeur=Decimal("101")
+        )
+        response = self.client.get(url, {'fcp': self.FCP_NAME})
+        self.assertEqual(response.json()['stats']['nb_vl'], 61)
+    
+    def test_running_stats_incremental(self):
+        """Test accumulateur : ajout de VL en O(1) identique au calcul complet"""
+        build_snapshots(self.FCP_NAME)
+        self.assertEqual(get_running_stats(self.FCP_NAME).nb_vl, 60)
+        
+        base_version = VLDataVersion.objects.get(fcp_name=self.FCP_NAME).version
+        rows = [(date(2024, 3, 1) + timedelta(days=i), Decimal("98.5") + Decimal(i % 5)) for i in range(10)]
+        VL_FCP_Placement_Avantage.objects.bulk_create(
+            [VL_FCP_Placement_Avantage(fcp=self.fcp, date=d, valeur=v) for d, v in rows]
+        )
+        vl_changed(self.FCP_NAME)
+        with mock.patch.object(RunningStats, 'from_series', side_effect=AssertionError('recalcul complet')):
+            append_running_stats(self.FCP_NAME, rows, base_version)
+        
+        running = get_running_stats(self.FCP_NAME)
+        series = get_series(self.FCP_NAME)
+        self.assertTrue(running.matches(series))
+        full = RunningStats.from_series(series)
+        for field in ('mean', 'm2', 'm3', 'm4', 'neg_sumsq', 'max_drawdown'):
+            self.assertAlmostEqual(getattr(running, field), getattr(full, field), places=9)
+        expected = analyse_statistics(series)
+        for key, value in running.statistics().items():
+            self.assertEqual(value, expected[key], key)
+        
+        # Accumulateur pas à jour avant l'insertion : recalcul complet
+        FcpRunningStats.objects.filter(fcp_name=self.FCP_NAME).update(data_version=0)
+        append_running_stats(self.FCP_NAME, [], base_version)
+        self.assertEqual(get_running_stats(self.FCP_NAME).nb_vl, 70)
+    
+    def test_running_stats_sync_rounding(self):
+        """Test synchronisation de VL à plus de 4 décimales : ajout identique au recalcul complet"""
+        build_snapshots(self.FCP_NAME)
+        df = pd.DataFrame({
+            'Date': pd.to_datetime([date(2024, 3, 1) + timedelta(days=i) for i in range(10)]),
+            self.FCP_NAME: [98.123456 + (i % 5) * 1.000049 for i in range(10)],
+        })
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'vl.xlsx')
+            df.to_excel(path, sheet_name='VL', index=False)
+            with mock.patch.object(RunningStats, 'from_series', side_effect=AssertionError('recalcul complet')):
+                call_command(
+                    'sync_vl_sharepoint', '--site-url', 'x', '--file-path', 'y',
+                    '--local-file', path, '--skip-snapshots', stdout=io.StringIO()
+                )
+        
+        running = get_running_stats(self.FCP_NAME)
+        self.assertEqual(running.nb_vl, 70)
+        full = RunningStats.from_series(get_series(self.FCP_NAME))
+        for field in ('mean', 'm2', 'm3', 'm4', 'neg_sumsq', 'max_drawdown', 'last_value'):
+            self.assertAlmostEqual(getattr(running, field), getattr(full, field), places=12)
+    
+    def test_factsheet_preview(self):
+        """Test prévisualisation factsheet d'un mois"""
+        build_snapshots(self.FCP_NAME, months=['2024-01'])
+        response = self.client.get(
+            reverse('fcp_app:api_factsheet_preview'),
+            {'fcp': self.FCP_NAME, 'month': '2024-01'}
+        )
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data['month'], 'Janvier 2024')
+        self.assertEqual(data['latest_vl']['date'], '31/01/2024')
+        self.assertEqual(data['fiche']['type_fond'], 'Diversifié')
+    
+    def test_factsheet_preview_default_month_etag(self):
+        """Test ETag de la prévisualisation sans mois : change avec le mois par défaut"""
+        url = reverse('fcp_app:api_factsheet_preview')
+        
+        def preview(today, **headers):
+            with mock.patch('fcp_app.management.commands.build_analytics_snapshots.datetime') as clock:
+                clock.now.return_value = today
+                return self.client.get(url, {'fcp': self.FCP_NAME}, **headers)
+        
+        janvier = preview(datetime(2024, 2, 15))
+        self.assertEqual(janvier.json()['month'], 'Janvier 2024')
+        etag = janvier['ETag']
+        self.assertEqual(preview(datetime(2024, 2, 28), HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        
+        # Changement de mois : l'ancien ETag ne valide plus la réponse
+        fevrier = preview(datetime(2024, 3, 1), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(fevrier.status_code, 200)
+        self.assertEqual(fevrier.json()['month'], 'Février 2024')
+        self.assertNotEqual(fevrier['ETag'], etag)
+
+
+class UnifiedVLTests(TestCase):
+    """Tests de la table unifiée ValeurLiquidative et du repository multi-FCP"""
+    
+    def setUp(self):
+        self.fcp_pa = FicheSignaletique.objects.create(
+            nom="FCP PLACEMENT AVANTAGE", echelle_risque=3, type_fond="Diversifié",
+            horizon=5, benchmark_oblig=Decimal("75.00"), benchmark_brvmc=Decimal("25.00")
+        )
+        self.fcp_dj = FicheSignaletique.objects.create(
+            nom="FCP DJOLOF", echelle_risque=4, type_fond="Actions",
+            horizon=5, benchmark_oblig=Decimal("25.00"), benchmark_brvmc=Decimal("75.00")
+        )
+        for i in range(5):
+            d = date(2024, 1, 1) + timedelta(days=i)
+            VL_FCP_Placement_Avantage.objects.create(fcp=self.fcp_pa, date=d, valeur=Decimal(100 + i))
+            VL_FCP_Djolof.objects.create(fcp=self.fcp_dj, date=d, valeur=Decimal(200 - i))
+    
+    def test_mirror_signals(self):
+        """Test report des créations, modifications et suppressions"""
+        self.assertEqual(ValeurLiquidative.objects.filter(fcp=self.fcp_pa).count(), 5)
+        
+        vl = VL_FCP_Placement_Avantage.objects.get(date=date(2024, 1, 5))
+        vl.date = date(2024, 1, 8)
+        vl.save()
+        dates = list(ValeurLiquidative.objects.filter(fcp=self.fcp_pa).order_by('date').values_list('date', flat=True))
+        self.assertEqual(dates[-1], date(2024, 1, 8))
+        self.assertNotIn(date(2024, 1, 5), dates)
+        
+        vl.delete()
+        self.assertEqual(ValeurLiquidative.objects.filter(fcp=self.fcp_pa).count(), 4)
+    
+    def test_load_many_series(self):
+        """Test lecture de plusieurs FCP en une seule requête (hors résolution des noms)"""
+        with self.assertNumQueries(2):
+            series = load_many_series(["FCP PLACEMENT AVANTAGE", "FCP DJOLOF"])
+        self.assertEqual(set(series), {"FCP PLACEMENT AVANTAGE", "FCP DJOLOF"})
+        self.assertEqual(series["FCP DJOLOF"].values.tolist(), [200, 199, 198, 197, 196])
+        self.assertEqual(series["FCP PLACEMENT AVANTAGE"].dates, load_series(VL_FCP_Placement_Avantage).dates)
+        
+        summaries = fund_summaries()
+        self.assertEqual(summaries["FCP DJOLOF"]['count'], 5)
+        self.assertEqual(summaries["FCP DJOLOF"]['date_max'], date(2024, 1, 5))
+    
+    def test_bulk_changes(self):
+        """Test resynchronisation après bulk_create"""
+        with bulk_vl_changes():
+            VL_FCP_Djolof.objects.all().delete()
+            VL_FCP_Djolof.objects.bulk_create([
+                VL_FCP_Djolof(fcp=self.fcp_dj, date=date(2024, 2, 1), valeur=Decimal("150"))
+            ])
+            vl_changed("FCP DJOLOF")
+            # Report différé à la sortie du bloc
+            self.assertEqual(ValeurLiquidative.objects.filter(fcp=self.fcp_dj).count(), 5)
+        self.assertEqual(
+            list(ValeurLiquidative.objects.filter(fcp=self.fcp_dj).values_list('date', flat=True)),
+            [date(2024, 2, 1)]
+        )
+    
+    def test_bulk_changes_error(self):
+        """Test erreur dans une transaction : erreur d'origine relancée, rien reporté"""
+        version = VLDataVersion.objects.filter(fcp_name="FCP DJOLOF").values_list('version', flat=True).first()
+        with self.assertRaises(IntegrityError):
+            with transaction.atomic():
+                with bulk_vl_changes():
+                    VL_FCP_Djolof.objects.all().delete()
+                    VL_FCP_Djolof.objects.bulk_create([
+                        VL_FCP_Djolof(fcp=self.fcp_dj, date=date(2024, 2, 1), valeur=Decimal("150")),
+                        VL_FCP_Djolof(fcp=self.fcp_dj, date=date(2024, 2, 1), valeur=Decimal("151")),
+                    ])
+        self.assertEqual(
+            VLDataVersion.objects.filter(fcp_name="FCP DJOLOF").values_list('version', flat=True).first(), version
+        )
+        self.assertEqual(ValeurLiquidative.objects.filter(fcp=self.fcp_dj).count(), 5)
+    
+    def test_clear_vl_table(self):
+        """Test suppression en une requête DELETE, sans signal par VL"""
+        with bulk_vl_changes():
+            with self.assertNumQueries(1):
+                deleted = clear_vl_table("FCP DJOLOF")
+            self.assertEqual(deleted, 5)
+            self.assertEqual(ValeurLiquidative.objects.filter(fcp=self.fcp_dj).count(), 5)
+        self.assertFalse(ValeurLiquidative.objects.filter(fcp=self.fcp_dj).exists())
+
+
+class ImporterTests(TestCase):
+    """Tests de la conversion vectorisée du fichier Excel des VL"""
+    
+    def test_melt_vl_frame(self):
+        """Test format long : cellules vides ignorées, doublons supprimés"""
+        df = pd.DataFrame({
+            'Date': pd.to_datetime(['2024-01-02', '2024-01-01', None, '2024-01-02']),
+            'FCP DJOLOF': [101.5, 100.0, 99.0, 102.0],
+            'FCP WALO': [None, 50.25, 51.0, 'n/a'],
+        })
+        frames = split_by_fcp(melt_vl_frame(df))
+        self.assertEqual(frames['FCP DJOLOF']['date'].tolist(), [date(2024, 1, 1), date(2024, 1, 2)])
+        self.assertEqual(frames['FCP DJOLOF']['valeur'].tolist(), [100.0, 101.5])
+        self.assertEqual(len(frames['FCP WALO']), 1)
+        self.assertEqual(to_decimals(frames['FCP WALO']['valeur']), [Decimal('50.25')])
+    
+    def test_missing_date_column(self):
+        """Test fichier sans colonne Date"""
+        with self.assertRaises(ValueError):
+            melt_vl_frame(pd.DataFrame({'FCP DJOLOF': [1.0]}))
+    
+    def test_diff_vl_frame(self):
+        """Test détection des VL nouvelles, corrigées et inchangées"""
+        frame = pd.DataFrame({
+            'date': [date(2024, 1, 1), date(2024, 1, 2), date(2024, 1, 3)],
+            'valeur': [100.00001, 101.5, 102.0],
+        })
+        existing = [(date(2024, 1, 1), Decimal('100.0000')), (date(2024, 1, 2), Decimal('101.4000'))]
+        new, changed, unchanged = diff_vl_frame(frame, existing)
+        self.assertEqual(new['date'].tolist(), [date(2024, 1, 3)])
+        self.assertEqual(changed['date'].tolist(), [date(2024, 1, 2)])
+        self.assertEqual(unchanged, 1)
+    
+    def test_sync_upsert(self):
+        """Test upsert de sync_vl_sharepoint : VL corrigée mise à jour, nouvelle date insérée"""
+        fcp = FicheSignaletique.objects.create(
+            nom="FCP DJOLOF", echelle_risque=4, type_fond="Actions",
+            horizon=5, benchmark_oblig=Decimal("25.00"), benchmark_brvmc=Decimal("75.00")
+        )
+        VL_FCP_Djolof.objects.create(fcp=fcp, date=date(2024, 1, 1), valeur=Decimal("100"))
+        VL_FCP_Djolof.objects.create(fcp=fcp, date=date(2024, 1, 2), valeur=Decimal("101"))
+        df = pd.DataFrame({
+            'Date': pd.to_datetime(['2024-01-01', '2024-01-02', '2024-01-03']),
+            'FCP DJOLOF': [100.0, 101.25, 102.0],
+        })
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'vl.xlsx')
+            df.to_excel(path, sheet_name='VL', index=False)
+            call_command(
+                'sync_vl_sharepoint', '--site-url', 'x', '--file-path', 'y',
+                '--local-file', path, '--upsert', '--skip-snapshots', stdout=io.StringIO()
+            )
+        self.assertEqual(
+            list(VL_FCP_Djolof.objects.order_by('date').values_list('valeur', flat=True)),
+            [Decimal('100'), Decimal('101.25'), Decimal('102')]
+        )
+        self.assertEqual(
+            ValeurLiquidative.objects.get(fcp=fcp, date=date(2024, 1, 2)).valeur, Decimal('101.25')
+        )
+
+
+class ExportJobTests(TestCase):
+    """Tests de la file d'attente des exports en arrière-plan"""
+    
+    def setUp(self):
+        self.fcp = FicheSignaletique.objects.create(
+            nom="FCP DJOLOF", echelle_risque=4, type_fond="Actions",
+            horizon=5, benchmark_oblig=Decimal("25.00"), benchmark_brvmc=Decimal("75.00")
+        )
+        for i in range(30):
+            VL_FCP_Djolof.objects.create(
+                fcp=self.fcp, date=date(2024, 1, 1) + timedelta(days=i), valeur=Decimal(100 + i)
+            )
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+    
+    def test_job_lifecycle(self):
+        """Test mise en file, exécution par le worker et téléchargement"""
+        with self.settings(FCP_EXPORT_DIR=self.tmp.name):
+            response = self.client.post(
+                reverse('fcp_app:api_export_pdf'),
+                json.dumps({'fcps': ["FCP DJOLOF"], 'content': ['vl'], 'async': True}),
+                content_type='application/json'
+            )
+            self.assertEqual(response.status_code, 202)
+            job_id = response.json()['job_id']
+            
+            download_url = reverse('fcp_app:api_export_job_download', args=[job_id])
+            self.assertEqual(self.client.get(download_url).status_code, 409)
+            
+            self.assertEqual(str(claim_next_job()), job_id)
+            self.assertIsNone(claim_next_job())
+            self.assertTrue(run_job(job_id))
+            
+            status = self.client.get(reverse('fcp_app:api_export_job_status', args=[job_id])).json()
+            self.assertEqual(status['statut'], StatutExport.TERMINE)
+            self.assertEqual(status['progression'], 100)
+            
+            response = self.client.get(status['download_url'])
+            self.assertEqual(response['Content-Type'], 'application/pdf')
+            self.assertTrue(b''.join(response.streaming_content).startswith(b'%PDF'))
+    
+    def test_job_failure(self):
+        """Test erreur de génération enregistrée sur le travail"""
+        job = ExportJob.objects.create(
+            type_export=TypeExport.FACTSHEET,
+            parametres={'fcp': "FCP INEXISTANT", 'month': '2024-01', 'commentaire': '', 'disclaimer': ''}
+        )
+        self.assertEqual(claim_next_job('worker-a'), job.id)
+        with self.settings(FCP_EXPORT_DIR=self.tmp.name):
+            self.assertFalse(run_job(job.id, 'worker-a'))
+        job.refresh_from_db()
+        self.assertEqual(job.statut, StatutExport.ECHEC)
+        self.assertEqual(job.erreur, 'FCP non trouvé')
+    
+    def test_concurrent_workers(self):
+        """Test second worker démarré pendant qu'un autre exécute un travail : exécution unique"""
+        job = enqueue(TypeExport.PDF, {'fcps': ["FCP DJOLOF"], 'content': ['vl']})
+        self.assertEqual(claim_next_job('worker-a'), job.id)
+        artifact = (b'%PDF-1', 'export.pdf', 'application/pdf')
+        with self.settings(FCP_EXPORT_DIR=self.tmp.name), \
+                mock.patch('fcp_app.jobs.render_export', return_value=artifact) as render:
+            # Démarrage du worker B : le travail de A, actif, n'est ni remis en attente ni repris
+            output = io.StringIO()
+            call_command('run_export_worker', '--once', '--workers', '1', stdout=output)
+            self.assertNotIn('remis en attente', output.getvalue())
+            self.assertEqual(ExportJob.objects.get(pk=job.id).worker, 'worker-a')
+            self.assertIsNone(claim_next_job('worker-b'))
+            self.assertFalse(run_job(job.id, 'worker-b'))
+            self.assertTrue(run_job(job.id, 'worker-a'))
+            self.assertEqual(render.call_count, 1)
+            
+            # Worker A silencieux au-delà du délai : travail repris par B, la fin tardive de A est ignorée
+            job = enqueue(TypeExport.PDF, {'fcps': ["FCP DJOLOF"], 'content': ['vl']})
+            claim_next_job('worker-a')
+            ExportJob.objects.filter(pk=job.id).update(heartbeat_at=timezone.now() - timedelta(hours=1))
+            
+            def render_a(*args):
+                self.assertEqual(requeue_interrupted(), 1)
+                self.assertEqual(claim_next_job('worker-b'), job.id)
+                return artifact
+            
+            render.side_effect = render_a
+            self.assertFalse(run_job(job.id, 'worker-a'))
+            render.side_effect = None
+            self.assertTrue(run_job(job.id, 'worker-b'))
+        
+        job.refresh_from_db()
+        self.assertEqual((job.statut, job.worker), (StatutExport.TERMINE, 'worker-b'))
+        # Seuls les fichiers des exécutions retenues sont conservés, sans fichier temporaire
+        self.assertEqual(
+            sorted(os.listdir(self.tmp.name)), sorted(ExportJob.objects.values_list('fichier', flat=True))
+        )
+    
+    def test_generate_factsheets_command(self):
+        """Test génération des factsheets du mois dans une archive ZIP"""
+        import zipfile
+        
+        def fake_factsheet(fcp_name, month, commentaire, disclaimer, vl_list=None):
+            response = HttpResponse(b'%PDF-' + str(len(vl_list)).encode(), content_type='application/pdf')
+            response['Content-Disposition'] = f'attachment; filename="factsheet_{month}.pdf"'
+            return response
+        
+        output = os.path.join(self.tmp.name, 'factsheets.zip')
+        with mock.patch('fcp_app.management.commands.generate_factsheets.generate_factsheet_pdf', fake_factsheet):
+            call_command(
+                'generate_factsheets', '--month', '2024-01', '--funds', "FCP DJOLOF",
+                '--workers', '1', '--output', output, stdout=io.StringIO()
+            )
+        with zipfile.ZipFile(output) as archive:
+            self.assertEqual(archive.namelist(), ['factsheet_2024-01.pdf'])
+            # VL chargées en amont et transmises au générateur
+            self.assertEqual(archive.read('factsheet_2024-01.pdf'), b'%PDF-30')
+
+
+class DatabaseTuningTests(TransactionTestCase):
+    """Tests des réglages SQLite et du routage des lectures (fcp_app/db.py)"""
+    databases = {'default', 'readonly'}
+    
+    def test_sqlite_pragmas(self):
+        """Test PRAGMA appliqués à l'ouverture des connexions, connexion de lecture en query_only"""
+        with connections['default'].cursor() as cursor:
+            cursor.execute('PRAGMA cache_size')
+            self.assertEqual(cursor.fetchone()[0], -64000)
+            cursor.execute('PRAGMA temp_store')
+            self.assertEqual(cursor.fetchone()[0], 2)  # MEMORY
+            cursor.execute('PRAGMA query_only')
+            self.assertEqual(cursor.fetchone()[0], 0)
+        with connections['readonly'].cursor() as cursor:
+            cursor.execute('PRAGMA query_only')
+            self.assertEqual(cursor.fetchone()[0], 1)
+    
+    def test_read_only_routing(self):
+        """Test lectures des vues d'analyse sur la connexion de lecture, écritures sur 'default'"""
+        FicheSignaletique.objects.create(
+            nom="FCP TEST ROUTAGE", echelle_risque=2, type_fond="Obligataire", horizon=3,
+            benchmark_oblig=Decimal("100.00"), benchmark_brvmc=Decimal("0.00")
+        )
+        self.assertEqual(router.db_for_read(FicheSignaletique), 'default')
+        
+        with read_only():
+            self.assertEqual(router.db_for_read(FicheSignaletique), 'readonly')
+            fiche = FicheSignaletique.objects.get(nom="FCP TEST ROUTAGE")
+            self.assertEqual(fiche._state.db, 'readonly')
+            # Objet lu sur la connexion de lecture : enregistré sur 'default'
+            fiche.horizon = 4
+            fiche.save()
+            self.assertEqual(FicheSignaletique.objects.get(nom="FCP TEST ROUTAGE").horizon, 4)
+            with self.assertRaises(OperationalError):
+                FicheSignaletique.objects.using('readonly').update(horizon=5)
+            # Dans une transaction sur 'default' : lectures de ses propres écritures
+            with transaction.atomic():
+                self.assertEqual(router.db_for_read(FicheSignaletique), 'default')
+        
+        with CaptureQueriesContext(connections['readonly']) as queries:
+            response = self.client.get(reverse('fcp_app:api_scatter_data'))
+        self.assertEqual(response.status_code, 200)
+        self.assertGreater(len(queries), 0)
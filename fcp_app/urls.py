@@ -13,6 +13,8 @@ urlpatterns = [
     path('api/export-ppt/', views.api_export_ppt, name='api_export_ppt'),
     path('api/export-pdf/', views.api_export_pdf, name='api_export_pdf'),
     path('api/export-factsheet/', views.api_export_factsheet, name='api_export_factsheet'),
+    path('api/export-jobs/<uuid:job_id>/', views.api_export_job_status, name='api_export_job_status'),
+    path('api/export-jobs/<uuid:job_id>/download/', views.api_export_job_download, name='api_export_job_download'),
     path('api/factsheet-preview/', views.api_factsheet_preview, name='api_factsheet_preview'),
     path('api/scatter-data/', views.api_scatter_data, name='api_scatter_data'),
     path('api/correlation-matrix/', views.api_correlation_matrix, name='api_correlation_matrix'),
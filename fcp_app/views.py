@@ -1,12 +1,15 @@
 ﻿from django.shortcuts import render
-from django.http import JsonResponse, HttpResponse
+from django.conf import settings
+from django.http import JsonResponse, HttpResponse, FileResponse
 from django.db.models import Min, Max, Avg
 from django.views.decorators.csrf import csrf_exempt
 from decimal import Decimal
 import json
-import csv
 import io
 from datetime import datetime, timedelta
+from functools import lru_cache
+import numpy as np
+from asgiref.sync import sync_to_async
 from .data import (
     FCP_FICHE_SIGNALETIQUE, 
     get_all_fcp_names, 
@@ -15,35 +18,65 @@ from .data import (
     get_type_icon,
     get_type_color
 )
-from .models import FicheSignaletique, FCP_VL_MODELS, get_vl_model
-
-# ============================================================================
-# CONSTANTES FINANCIÈRES
-# ============================================================================
-# Nombre de jours de trading par an (standard pour les marchés financiers)
-# Le marché BRVM est ouvert ~252 jours par an (hors week-ends et jours fériés)
-TRADING_DAYS_PER_YEAR = 365
-
-# Taux sans risque annuel (en %) - Taux de référence BCEAO
-RISK_FREE_RATE_ANNUAL = 3.25
-
-# Taux sans risque journalier
-RISK_FREE_RATE_DAILY = RISK_FREE_RATE_ANNUAL / TRADING_DAYS_PER_YEAR
-
-# Facteur d'annualisation pour la volatilité
-ANNUALIZATION_FACTOR = TRADING_DAYS_PER_YEAR ** 0.5
-# ============================================================================
+from .models import FicheSignaletique, ExportJob, StatutExport, TypeExport, FCP_VL_MODELS, get_vl_model
+from .exports import (
+    XLSX_WRITE_ONLY_THRESHOLD,
+    csv_response,
+    count_vl_rows,
+    iter_vl_rows,
+    xlsx_write_only_response,
+)
+from .jobs import use_job_queue, enqueue, job_payload, artifact_path
+from .charts import ChartCache, render_vl_charts
+from .instrumentation import span
+from .conditional import conditional_api, requested_fund, all_funds
+from .db import read_only_view
+from .management.commands.build_analytics_snapshots import previous_month
+from .serialization import FastJsonResponse, response_format, date_offsets, series_columns, records_to_columns
+from .analytics import (
+    # Constantes financières (voir analytics/constants.py)
+    TRADING_DAYS_PER_YEAR,
+    RISK_FREE_RATE_ANNUAL,
+    RISK_FREE_RATE_DAILY,
+    ANNUALIZATION_FACTOR,
+    VLSeries,
+    get_series,
+    aget_series,
+    aget_many_series,
+    in_thread,
+    scatter_statistics,
+    get_many_running_stats,
+    running_scatter_statistics,
+    CORRELATION_METHODS,
+    afund_correlations,
+    risk_statistics,
+    MAX_ROLLING_WINDOW,
+    rolling_volatility,
+    rolling_sharpe,
+    rolling_beta,
+    rolling_count,
+    get_fund_analytics,
+    get_factsheet_preview,
+    MIN_POINTS,
+    lttb_indices,
+    downsample,
+)
 
 # Create your views here.
 
 
-def valeurs_liquidatives(request):
-    """Vue pour la page des Valeurs Liquidatives"""
+@read_only_view
+async def valeurs_liquidatives(request):
+    """
+    Vue pour la page des Valeurs Liquidatives.
+    Asynchrone : lectures par l'ORM asynchrone, calcul du scatter dans le
+    pool de threads (une page lente ne bloque pas les autres requêtes en ASGI).
+    """
     # Récupérer le FCP sélectionné
     selected_fcp = request.GET.get('fcp', 'FCP PLACEMENT AVANTAGE')
     
     # Liste des FCP depuis la base
-    fcp_list = list(FicheSignaletique.objects.values_list('nom', flat=True).order_by('nom'))
+    fcp_list = [nom async for nom in FicheSignaletique.objects.values_list('nom', flat=True).order_by('nom')]
     
     # Récupérer les données VL pour le FCP sélectionné
     vl_model = get_vl_model(selected_fcp)
@@ -55,336 +88,23 @@ def valeurs_liquidatives(request):
     tracking_error = {}
     
     if vl_model:
-        # Récupérer toutes les VL ordonnées par date
-        vl_queryset = vl_model.objects.all().order_by('date')
-        
-        # Convertir en liste pour JSON
-        for vl in vl_queryset:
-            vl_data.append({
-                'date': vl.date.strftime('%Y-%m-%d'),
-                'valeur': float(vl.valeur)
-            })
-        
-        # Calculer les statistiques
-        if vl_queryset.exists():
-            latest_vl = vl_queryset.last()
-            first_vl = vl_queryset.first()
-            today = latest_vl.date  # Dernière date de la base (pas la date du jour)
-            
-            # Helper pour calculer la performance
-            def calc_perf(vl_ref):
-                if vl_ref:
-                    return round(((float(latest_vl.valeur) / float(vl_ref.valeur)) - 1) * 100, 2)
-                return None
-            
-            # VL pour différentes périodes GLISSANTES (depuis la dernière date en base)
-            vl_1d = vl_queryset.filter(date__lt=today).last()
-            vl_1m = vl_queryset.filter(date__lte=today - timedelta(days=30)).last()
-            vl_3m = vl_queryset.filter(date__lte=today - timedelta(days=90)).last()
-            vl_6m = vl_queryset.filter(date__lte=today - timedelta(days=180)).last()
-            vl_1y = vl_queryset.filter(date__lte=today - timedelta(days=365)).last()
-            vl_3y = vl_queryset.filter(date__lte=today - timedelta(days=365*3)).last()
-            vl_5y = vl_queryset.filter(date__lte=today - timedelta(days=365*5)).last()
-            
-            # Performances calendaires (To-Date) - basées sur la dernière date en base
-            # WTD: dernière VL de la semaine précédente (vendredi ou avant le lundi de cette semaine)
-            start_of_week = today - timedelta(days=today.weekday())  # Lundi de la semaine
-            vl_wtd = vl_queryset.filter(date__lt=start_of_week).last()
-            
-            # MTD: dernière VL du mois précédent (dernier jour avant le 1er du mois)
-            start_of_month = today.replace(day=1)
-            vl_mtd = vl_queryset.filter(date__lt=start_of_month).last()
-            
-            # QTD: dernière VL du trimestre précédent
-            quarter_month = ((today.month - 1) // 3) * 3 + 1
-            start_of_quarter = today.replace(month=quarter_month, day=1)
-            vl_qtd = vl_queryset.filter(date__lt=start_of_quarter).last()
-            
-            # STD: dernière VL du semestre précédent
-            semester_month = 1 if today.month <= 6 else 7
-            start_of_semester = today.replace(month=semester_month, day=1)
-            vl_std = vl_queryset.filter(date__lt=start_of_semester).last()
-            
-            # YTD: dernière VL de l'année précédente (dernier jour avant le 1er janvier)
-            start_of_year = today.replace(month=1, day=1)
-            vl_ytd = vl_queryset.filter(date__lt=start_of_year).last()
-            
-            perf_calendaires = {
-                'wtd': calc_perf(vl_wtd),
-                'mtd': calc_perf(vl_mtd),
-                'qtd': calc_perf(vl_qtd),
-                'std': calc_perf(vl_std),
-                'ytd': calc_perf(vl_ytd),
-            }
-            
-            # Performances glissantes
-            perf_glissantes = {
-                'perf_1m': calc_perf(vl_1m),
-                'perf_3m': calc_perf(vl_3m),
-                'perf_6m': calc_perf(vl_6m),
-                'perf_1y': calc_perf(vl_1y),
-                'perf_3y': calc_perf(vl_3y),
-                'perf_5y': calc_perf(vl_5y),
-                'origine': calc_perf(first_vl),
-            }
-            
-            stats = {
-                'derniere_vl': float(latest_vl.valeur),
-                'derniere_date': latest_vl.date.strftime('%d/%m/%Y'),
-                'premiere_vl': float(first_vl.valeur),
-                'premiere_date': first_vl.date.strftime('%d/%m/%Y'),
-                'var_1j': calc_perf(vl_1d) or 0,
-                'var_1m': calc_perf(vl_1m) or 0,
-                'var_1y': calc_perf(vl_1y) or 0,
-                'var_ytd': perf_calendaires['ytd'] or 0,
-                'var_origine': perf_glissantes['origine'] or 0,
-                'nb_vl': vl_queryset.count(),
-            }
-            
-            # Calculer la Tracking Error (volatilité annualisée) pour différentes périodes
-            def calc_tracking_error(start_date):
-                """Calcule la tracking error (volatilité annualisée) depuis une date de référence"""
-                if start_date is None:
-                    return None
-                period_vl = list(vl_queryset.filter(date__gte=start_date).values_list('valeur', flat=True))
-                if len(period_vl) < 2:
-                    return None
-                period_valeurs = [float(v) for v in period_vl]
-                period_rendements = [(period_valeurs[i] / period_valeurs[i-1] - 1) * 100 for i in range(1, len(period_valeurs))]
-                if len(period_rendements) < 2:
-                    return None
-                moyenne = sum(period_rendements) / len(period_rendements)
-                variance = sum((r - moyenne) ** 2 for r in period_rendements) / (len(period_rendements) - 1)  # Variance non biaisée
-                ecart_type = variance ** 0.5
-                # Annualiser la volatilité
-                volatilite_ann = ecart_type * ANNUALIZATION_FACTOR
-                return round(volatilite_ann, 2)
-            
-            tracking_error = {
-                'wtd': calc_tracking_error(start_of_week),
-                'mtd': calc_tracking_error(start_of_month),
-                'qtd': calc_tracking_error(start_of_quarter),
-                'std': calc_tracking_error(start_of_semester),
-                'ytd': calc_tracking_error(start_of_year),
-                'origine': calc_tracking_error(first_vl.date if first_vl else None),
-            }
-            
-            # Calculer les statistiques pour l'onglet Analyse
-            valeurs = [float(v) for v in vl_queryset.values_list('valeur', flat=True)]
-            if len(valeurs) > 1:
-                rendements = [(valeurs[i] / valeurs[i-1] - 1) * 100 for i in range(1, len(valeurs))]
-                
-                # Statistiques descriptives
-                moyenne_rdt = sum(rendements) / len(rendements)
-                variance = sum((r - moyenne_rdt) ** 2 for r in rendements) / (len(rendements) - 1)  # Variance non biaisée
-                ecart_type = variance ** 0.5
-                volatilite_ann = ecart_type * ANNUALIZATION_FACTOR
-                
-                rendements_sorted = sorted(rendements)
-                n = len(rendements_sorted)
-                mediane = rendements_sorted[n // 2] if n % 2 == 1 else (rendements_sorted[n//2 - 1] + rendements_sorted[n//2]) / 2
-                
-                # Min/Max
-                vl_min = min(valeurs)
-                vl_max = max(valeurs)
-                rdt_min = min(rendements)
-                rdt_max = max(rendements)
-                
-                # Jours positifs/négatifs
-                jours_positifs = sum(1 for r in rendements if r > 0)
-                jours_negatifs = sum(1 for r in rendements if r < 0)
-                
-                # Drawdown max
-                peak = valeurs[0]
-                max_drawdown = 0
-                for v in valeurs:
-                    if v > peak:
-                        peak = v
-                    drawdown = (peak - v) / peak * 100
-                    if drawdown > max_drawdown:
-                        max_drawdown = drawdown
-                
-                # Ratio de Sharpe (avec taux sans risque constant)
-                sharpe = ((moyenne_rdt - RISK_FREE_RATE_DAILY) / ecart_type * ANNUALIZATION_FACTOR) if ecart_type > 0 else 0
-                
-                # Ratio de Sortino
-                rendements_negatifs = [r for r in rendements if r < 0]
-                if rendements_negatifs:
-                    downside_var = sum(r ** 2 for r in rendements_negatifs) / (len(rendements_negatifs) - 1) if len(rendements_negatifs) > 1 else sum(r ** 2 for r in rendements_negatifs)
-                    downside_std = downside_var ** 0.5
-                    sortino = ((moyenne_rdt - RISK_FREE_RATE_DAILY) / downside_std * ANNUALIZATION_FACTOR) if downside_std > 0 else 0
-                else:
-                    sortino = 0
-                
-                # Skewness (asymétrie)
-                if ecart_type > 0:
-                    skewness = sum((r - moyenne_rdt) ** 3 for r in rendements) / (n * ecart_type ** 3)
-                else:
-                    skewness = 0
-                
-                # Kurtosis (aplatissement) - excess kurtosis (0 pour normal)
-                if ecart_type > 0:
-                    kurtosis = sum((r - moyenne_rdt) ** 4 for r in rendements) / (n * ecart_type ** 4) - 3
-                else:
-                    kurtosis = 0
-                
-                # VaR Historique (Value at Risk)
-                var_95 = rendements_sorted[int(n * 0.05)]  # 5ème percentile
-                var_99 = rendements_sorted[int(n * 0.01)]  # 1er percentile
-                
-                # CVaR / Expected Shortfall (moyenne des pertes au-delà de la VaR)
-                cvar_95_values = [r for r in rendements if r <= var_95]
-                cvar_99_values = [r for r in rendements if r <= var_99]
-                cvar_95 = sum(cvar_95_values) / len(cvar_95_values) if cvar_95_values else var_95
-                cvar_99 = sum(cvar_99_values) / len(cvar_99_values) if cvar_99_values else var_99
-                
-                # Calcul des drawdowns détaillés
-                drawdowns_data = []
-                dates_list = list(vl_queryset.values_list('date', flat=True))
-                peak = valeurs[0]
-                peak_date = dates_list[0]
-                current_dd_start = None
-                current_dd_peak = valeurs[0]
-                
-                underwater_data = []  # Pour le graphique underwater
-                
-                for i, v in enumerate(valeurs):
-                    if v > peak:
-                        # Nouveau pic atteint
-                        if current_dd_start is not None:
-                            # Fin du drawdown précédent
-                            dd_depth = (current_dd_peak - min(valeurs[current_dd_start:i])) / current_dd_peak * 100
-                            dd_trough_idx = current_dd_start + valeurs[current_dd_start:i].index(min(valeurs[current_dd_start:i]))
-                            drawdowns_data.append({
-                                'start_date': dates_list[current_dd_start].strftime('%Y-%m-%d'),
-                                'trough_date': dates_list[dd_trough_idx].strftime('%Y-%m-%d'),
-                                'end_date': dates_list[i].strftime('%Y-%m-%d'),
-                                'depth': round(dd_depth, 2),
-                                'duration': i - current_dd_start,
-                                'recovery': i - dd_trough_idx
-                            })
-                            current_dd_start = None
-                        peak = v
-                        peak_date = dates_list[i]
-                        current_dd_peak = v
-                    else:
-                        if current_dd_start is None and v < peak:
-                            current_dd_start = i - 1 if i > 0 else 0
-                            current_dd_peak = peak
-                    
-                    # Calculer le drawdown courant pour underwater chart
-                    dd_current = (peak - v) / peak * 100
-                    underwater_data.append({
-                        'date': dates_list[i].strftime('%Y-%m-%d'),
-                        'drawdown': round(-dd_current, 2)  # Négatif pour l'affichage
-                    })
-                
-                # Si on est encore en drawdown à la fin
-                if current_dd_start is not None:
-                    dd_depth = (current_dd_peak - min(valeurs[current_dd_start:])) / current_dd_peak * 100
-                    dd_trough_idx = current_dd_start + valeurs[current_dd_start:].index(min(valeurs[current_dd_start:]))
-                    drawdowns_data.append({
-                        'start_date': dates_list[current_dd_start].strftime('%Y-%m-%d'),
-                        'trough_date': dates_list[dd_trough_idx].strftime('%Y-%m-%d'),
-                        'end_date': None,  # Encore en cours
-                        'depth': round(dd_depth, 2),
-                        'duration': len(valeurs) - current_dd_start,
-                        'recovery': None  # Pas encore récupéré
-                    })
-                
-                # Trier les drawdowns par profondeur (les pires en premier)
-                drawdowns_data.sort(key=lambda x: x['depth'], reverse=True)
-                
-                # Histogramme des rendements (bins)
-                hist_min = min(rendements)
-                hist_max = max(rendements)
-                nb_bins = 30
-                bin_width = (hist_max - hist_min) / nb_bins if hist_max != hist_min else 1
-                histogram_data = []
-                for i in range(nb_bins):
-                    bin_start = hist_min + i * bin_width
-                    bin_end = bin_start + bin_width
-                    count = sum(1 for r in rendements if bin_start <= r < bin_end)
-                    histogram_data.append({
-                        'bin_start': round(bin_start, 3),
-                        'bin_end': round(bin_end, 3),
-                        'count': count,
-                        'frequency': round(count / n * 100, 2)
-                    })
-                
-                stats['volatilite'] = round(volatilite_ann, 2)
-                
-                analyse_stats = {
-                    # Statistiques descriptives
-                    'nb_observations': len(rendements),
-                    'rendement_moyen': round(moyenne_rdt, 4),
-                    'rendement_moyen_ann': round(moyenne_rdt * 365, 2),
-                    'mediane': round(mediane, 4),
-                    'ecart_type': round(ecart_type, 4),
-                    'volatilite_ann': round(volatilite_ann, 2),
-                    'vl_min': round(vl_min, 2),
-                    'vl_max': round(vl_max, 2),
-                    'rdt_min': round(rdt_min, 2),
-                    'rdt_max': round(rdt_max, 2),
-                    # Profil de risque
-                    'max_drawdown': round(max_drawdown, 2),
-                    'sharpe': round(sharpe, 2),
-                    'sortino': round(sortino, 2),
-                    'jours_positifs': jours_positifs,
-                    'jours_negatifs': jours_negatifs,
-                    'ratio_positif': round(jours_positifs / len(rendements) * 100, 1) if rendements else 0,
-                    # Distribution des rendements
-                    'skewness': round(skewness, 3),
-                    'kurtosis': round(kurtosis, 3),
-                    'var_95': round(var_95, 3),
-                    'var_99': round(var_99, 3),
-                    'cvar_95': round(cvar_95, 3),
-                    'cvar_99': round(cvar_99, 3),
-                    # Données pour graphiques (JSON)
-                    'histogram_data': histogram_data,
-                    'underwater_data': underwater_data,
-                    'drawdowns_data': drawdowns_data[:10],  # Top 10 drawdowns
-                    'rendements_list': [round(r, 4) for r in rendements],  # Pour histogramme JS
-                }
-            else:
-                stats['volatilite'] = 0
-                analyse_stats = {}
+        # Série en cache (rechargée seulement si les VL du FCP ont changé)
+        with span('load series'):
+            series = await aget_series(selected_fcp)
+            vl_data = series.to_records()
+        
+        # Statistiques : instantané précalculé, ou calcul à la volée s'il est périmé
+        with span('compute stats'):
+            analytics = await sync_to_async(get_fund_analytics)(selected_fcp, series)
+        stats = analytics['stats']
+        perf_calendaires = analytics['perf_calendaires']
+        perf_glissantes = analytics['perf_glissantes']
+        tracking_error = analytics['tracking_error']
+        analyse_stats = analytics['analyse_stats']
     
     # Préparer les données pour tous les FCP (pour le scatter plot)
-    all_fcp_stats = []
-    for fcp_name in fcp_list:
-        fcp_vl_model = get_vl_model(fcp_name)
-        if fcp_vl_model:
-            fcp_vl = fcp_vl_model.objects.all().order_by('date')
-            if fcp_vl.exists() and fcp_vl.count() > 30:
-                first = fcp_vl.first()
-                last = fcp_vl.last()
-                rendement = ((float(last.valeur) / float(first.valeur)) - 1) * 100
-                
-                # Calculer volatilité
-                valeurs = list(fcp_vl.values_list('valeur', flat=True))
-                rendements = [(float(valeurs[i]) / float(valeurs[i-1]) - 1) for i in range(1, len(valeurs))]
-                if rendements and len(rendements) > 1:
-                    moyenne = sum(rendements) / len(rendements)
-                    variance = sum((r - moyenne) ** 2 for r in rendements) / (len(rendements) - 1)  # Variance non biaisée
-                    vol = (variance ** 0.5) * ANNUALIZATION_FACTOR * 100
-                else:
-                    vol = 0
-                
-                # Récupérer le type de fond depuis FicheSignaletique
-                try:
-                    fiche = FicheSignaletique.objects.get(nom=fcp_name)
-                    type_fond = fiche.type_fond
-                except FicheSignaletique.DoesNotExist:
-                    type_fond = 'Diversifié'
-                
-                all_fcp_stats.append({
-                    'nom': fcp_name,
-                    'rendement': round(rendement, 2),
-                    'volatilite': round(vol, 2),
-                    'type_fond': type_fond,
-                    'selected': fcp_name == selected_fcp
-                })
+    with span('scatter stats'):
+        all_fcp_stats, _ = await afcp_scatter_stats(selected_fcp=selected_fcp)
     
     # Extraire les données pour les graphiques (JSON)
     histogram_data_json = json.dumps(analyse_stats.get('histogram_data', []))
@@ -433,112 +153,105 @@ def valeurs_liquidatives(request):
         'selected_fcp_data': selected_fcp_data,
         'fcp_data_json': json.dumps(fcp_enriched),
     }
-    return render(request, 'fcp_app/valeurs_liquidatives.html', context)
+    with span('render'):
+        return await sync_to_async(render)(request, 'fcp_app/valeurs_liquidatives.html', context)
 
 
-def api_scatter_data(request):
-    """API pour récupérer les données du scatter plot avec filtre de période"""
-    period = request.GET.get('period', 'origin')
+async def afcp_scatter_stats(period='origin', selected_fcp=None):
+    """
+    Points du scatter plot rendement / volatilité de tous les FCP.
+    Fiches signalétiques en une requête, séries via le cache (une requête de
+    versions, séries modifiées relues ensemble) par l'ORM asynchrone, calcul
+    vectorisé dans le pool de threads.
+    Depuis l'origine, les FCP dont l'accumulateur FcpRunningStats est à jour
+    sont lus sans charger leur série.
+    Retourne (points, dernière date de la base au format JJ/MM/AAAA).
+    """
+    types_fond = {
+        nom: type_fond
+        async for nom, type_fond in FicheSignaletique.objects.order_by('nom').values_list('nom', 'type_fond')
+    }
+    running = await sync_to_async(get_many_running_stats)(types_fond) if period == 'origin' else {}
+    series_by_name = await aget_many_series([name for name in types_fond if name not in running])
+    return await in_thread(scatter_points, types_fond, running, series_by_name, period, selected_fcp)
+
+
+def scatter_points(types_fond, running, series_by_name, period='origin', selected_fcp=None):
+    """Points du scatter plot et dernière date à partir des fiches, accumulateurs et séries déjà lus"""
+    stats = scatter_statistics(series_by_name, period)
+    stats.update(running_scatter_statistics(running))
     
-    fcp_list = list(FicheSignaletique.objects.values_list('nom', flat=True).order_by('nom'))
     all_fcp_stats = []
+    for fcp_name, type_fond in types_fond.items():
+        if fcp_name not in stats:
+            continue
+        rendement, vol = stats[fcp_name]
+        point = {
+            'nom': fcp_name,
+            'rendement': round(rendement, 2),
+            'volatilite': round(vol, 2),
+            'type_fond': type_fond,
+        }
+        if selected_fcp is not None:
+            point['selected'] = fcp_name == selected_fcp
+        all_fcp_stats.append(point)
+    
+    # Dernière date de la base (premier FCP disponible)
+    last_dates = {name: series.last_date for name, series in series_by_name.items() if len(series)}
+    last_dates.update({name: accumulator.last_date for name, accumulator in running.items() if accumulator.nb_vl})
+    last_date = next((last_dates[name] for name in types_fond if name in last_dates), None)
+    last_date_str = last_date.strftime('%d/%m/%Y') if last_date else None
+    return all_fcp_stats, last_date_str
+
+
+@read_only_view
+@conditional_api(all_funds)
+async def api_scatter_data(request):
+    """API pour récupérer les données du scatter plot avec filtre de période (asynchrone)"""
+    period = request.GET.get('period', 'origin')
     
-    for fcp_name in fcp_list:
-        fcp_vl_model = get_vl_model(fcp_name)
-        if fcp_vl_model:
-            fcp_vl = fcp_vl_model.objects.all().order_by('date')
-            if fcp_vl.exists() and fcp_vl.count() > 30:
-                last = fcp_vl.last()
-                latest_date = last.date  # Dernière date disponible en base
-                
-                # Pour les calculs To-Date, on cherche la dernière VL avant le début de la période
-                if period == 'wtd':  # Week-to-Date (depuis le lundi de cette semaine)
-                    start_of_week = latest_date - timedelta(days=latest_date.weekday())
-                    ref_vl = fcp_vl.filter(date__lt=start_of_week).last()
-                elif period == 'mtd':  # Month-to-Date (depuis le début du mois)
-                    start_of_month = latest_date.replace(day=1)
-                    ref_vl = fcp_vl.filter(date__lt=start_of_month).last()
-                elif period == 'qtd':  # Quarter-to-Date (depuis le début du trimestre)
-                    quarter_month = ((latest_date.month - 1) // 3) * 3 + 1
-                    start_of_quarter = latest_date.replace(month=quarter_month, day=1)
-                    ref_vl = fcp_vl.filter(date__lt=start_of_quarter).last()
-                elif period == 'std':  # Semester-to-Date (depuis le début du semestre)
-                    semester_month = 1 if latest_date.month <= 6 else 7
-                    start_of_semester = latest_date.replace(month=semester_month, day=1)
-                    ref_vl = fcp_vl.filter(date__lt=start_of_semester).last()
-                elif period == 'ytd':  # Year-to-Date (depuis le début de l'année)
-                    start_of_year = latest_date.replace(month=1, day=1)
-                    ref_vl = fcp_vl.filter(date__lt=start_of_year).last()
-                else:  # origin - depuis le début des données
-                    ref_vl = fcp_vl.first()
-                
-                if ref_vl:
-                    # Calculer le rendement
-                    rendement = ((float(last.valeur) / float(ref_vl.valeur)) - 1) * 100
-                    
-                    # Calculer la volatilité sur la période sélectionnée
-                    if period == 'origin':
-                        filtered_vl = fcp_vl
-                    else:
-                        # Filtrer depuis la date de référence jusqu'à la dernière date
-                        filtered_vl = fcp_vl.filter(date__gte=ref_vl.date)
-                    
-                    valeurs = list(filtered_vl.values_list('valeur', flat=True))
-                    if len(valeurs) > 1:
-                        rendements = [(float(valeurs[i]) / float(valeurs[i-1]) - 1) for i in range(1, len(valeurs))]
-                        if rendements and len(rendements) > 1:
-                            moyenne = sum(rendements) / len(rendements)
-                            variance = sum((r - moyenne) ** 2 for r in rendements) / (len(rendements) - 1)  # Variance non biaisée
-                            vol = (variance ** 0.5) * ANNUALIZATION_FACTOR * 100
-                        else:
-                            vol = 0
-                    else:
-                        vol = 0
-                    
-                    # Récupérer le type de fond
-                    try:
-                        fiche = FicheSignaletique.objects.get(nom=fcp_name)
-                        type_fond = fiche.type_fond
-                    except FicheSignaletique.DoesNotExist:
-                        type_fond = 'Diversifié'
-                    
-                    all_fcp_stats.append({
-                        'nom': fcp_name,
-                        'rendement': round(rendement, 2),
-                        'volatilite': round(vol, 2),
-                        'type_fond': type_fond
-                    })
-    
-    # Récupérer la dernière date de la base (prendre la première disponible)
-    last_date_str = None
-    for fcp_name in fcp_list:
-        fcp_vl_model = get_vl_model(fcp_name)
-        if fcp_vl_model:
-            last_vl = fcp_vl_model.objects.order_by('-date').first()
-            if last_vl:
-                last_date_str = last_vl.date.strftime('%d/%m/%Y')
-                break
+    all_fcp_stats, last_date_str = await afcp_scatter_stats(period)
     
     return JsonResponse({'data': all_fcp_stats, 'last_date': last_date_str})
 
 
+@read_only_view
+@conditional_api()
 def api_vl_data(request):
-    """API pour récupérer les données VL d'un FCP"""
+    """
+    API pour récupérer les données VL d'un FCP.
+    max_points (optionnel) : courbe réduite par LTTB à au plus max_points VL.
+    format=columnar : {'dates': {'start', 'offsets'}, 'values'} au lieu d'un objet par VL.
+    """
     fcp_name = request.GET.get('fcp')
     period = request.GET.get('period', 'all')
+    fmt = response_format(request)
     
     if not fcp_name:
         return JsonResponse({'error': 'FCP non spécifié'}, status=400)
+    if fmt is None:
+        return JsonResponse({'error': f"Format inconnu: {request.GET.get('format')}"}, status=400)
     
     vl_model = get_vl_model(fcp_name)
     if not vl_model:
         return JsonResponse({'error': 'FCP non trouvé'}, status=404)
     
-    # Filtrer par période
-    vl_queryset = vl_model.objects.all().order_by('date')
+    max_points = request.GET.get('max_points')
+    if max_points is not None:
+        try:
+            max_points = int(max_points)
+        except ValueError:
+            max_points = 0
+        if max_points < MIN_POINTS:
+            return JsonResponse({'error': f'max_points doit être un entier >= {MIN_POINTS}'}, status=400)
     
-    if vl_queryset.exists():
-        latest_date = vl_queryset.last().date
+    # Série en cache (rechargée seulement si les VL du FCP ont changé)
+    with span('load series'):
+        series = get_series(fcp_name)
+    
+    # Filtrer par période
+    if len(series):
+        latest_date = series.last_date
         
         if period == '1m':
             start_date = latest_date - timedelta(days=30)
@@ -554,297 +267,45 @@ def api_vl_data(request):
             start_date = None
         
         if start_date:
-            vl_queryset = vl_queryset.filter(date__gte=start_date)
+            series = series.since(start_date)
     
-    data = []
-    for vl in vl_queryset:
-        data.append({
-            'date': vl.date.strftime('%Y-%m-%d'),
-            'valeur': float(vl.valeur)
-        })
-    
-    return JsonResponse({'data': data})
+    with span('render'):
+        series = downsample(series, max_points)
+        return FastJsonResponse({'data': series_columns(series) if fmt == 'columnar' else series.to_records()})
 
 
+@read_only_view
+@conditional_api()
 def api_fcp_full_data(request):
-    """API pour récupérer toutes les données d'un FCP (pour mise à jour dynamique)"""
+    """
+    API pour récupérer toutes les données d'un FCP (pour mise à jour dynamique).
+    format=columnar : VL, underwater et histogramme en colonnes.
+    """
     fcp_name = request.GET.get('fcp')
+    fmt = response_format(request)
     
     if not fcp_name:
         return JsonResponse({'error': 'FCP non spécifié'}, status=400)
+    if fmt is None:
+        return JsonResponse({'error': f"Format inconnu: {request.GET.get('format')}"}, status=400)
     
     vl_model = get_vl_model(fcp_name)
     if not vl_model:
         return JsonResponse({'error': 'FCP non trouvé'}, status=404)
     
-    vl_data = []
-    stats = {}
-    perf_calendaires = {}
-    perf_glissantes = {}
-    analyse_stats = {}
-    tracking_error = {}
-    
-    vl_queryset = vl_model.objects.all().order_by('date')
+    # Série en cache (rechargée seulement si les VL du FCP ont changé)
+    with span('load series'):
+        series = get_series(fcp_name)
+        vl_data = series_columns(series) if fmt == 'columnar' else series.to_records()
     
-    # Convertir en liste pour JSON
-    for vl in vl_queryset:
-        vl_data.append({
-            'date': vl.date.strftime('%Y-%m-%d'),
-            'valeur': float(vl.valeur)
-        })
-    
-    # Calculer les statistiques
-    if vl_queryset.exists():
-        latest_vl = vl_queryset.last()
-        first_vl = vl_queryset.first()
-        today = latest_vl.date
-        
-        def calc_perf(vl_ref):
-            if vl_ref:
-                return round(((float(latest_vl.valeur) / float(vl_ref.valeur)) - 1) * 100, 2)
-            return None
-        
-        # VL pour différentes périodes GLISSANTES
-        vl_1d = vl_queryset.filter(date__lt=today).last()
-        vl_1m = vl_queryset.filter(date__lte=today - timedelta(days=30)).last()
-        vl_3m = vl_queryset.filter(date__lte=today - timedelta(days=90)).last()
-        vl_6m = vl_queryset.filter(date__lte=today - timedelta(days=180)).last()
-        vl_1y = vl_queryset.filter(date__lte=today - timedelta(days=365)).last()
-        vl_3y = vl_queryset.filter(date__lte=today - timedelta(days=365*3)).last()
-        vl_5y = vl_queryset.filter(date__lte=today - timedelta(days=365*5)).last()
-        
-        # Performances calendaires (To-Date)
-        start_of_week = today - timedelta(days=today.weekday())
-        vl_wtd = vl_queryset.filter(date__lt=start_of_week).last()
-        
-        start_of_month = today.replace(day=1)
-        vl_mtd = vl_queryset.filter(date__lt=start_of_month).last()
-        
-        quarter_month = ((today.month - 1) // 3) * 3 + 1
-        start_of_quarter = today.replace(month=quarter_month, day=1)
-        vl_qtd = vl_queryset.filter(date__lt=start_of_quarter).last()
-        
-        semester_month = 1 if today.month <= 6 else 7
-        start_of_semester = today.replace(month=semester_month, day=1)
-        vl_std = vl_queryset.filter(date__lt=start_of_semester).last()
-        
-        start_of_year = today.replace(month=1, day=1)
-        vl_ytd = vl_queryset.filter(date__lt=start_of_year).last()
-        
-        perf_calendaires = {
-            'wtd': calc_perf(vl_wtd),
-            'mtd': calc_perf(vl_mtd),
-            'qtd': calc_perf(vl_qtd),
-            'std': calc_perf(vl_std),
-            'ytd': calc_perf(vl_ytd),
-        }
-        
-        perf_glissantes = {
-            'perf_1m': calc_perf(vl_1m),
-            'perf_3m': calc_perf(vl_3m),
-            'perf_6m': calc_perf(vl_6m),
-            'perf_1y': calc_perf(vl_1y),
-            'perf_3y': calc_perf(vl_3y),
-            'perf_5y': calc_perf(vl_5y),
-            'origine': calc_perf(first_vl),
-        }
-        
-        stats = {
-            'derniere_vl': float(latest_vl.valeur),
-            'derniere_date': latest_vl.date.strftime('%d/%m/%Y'),
-            'premiere_vl': float(first_vl.valeur),
-            'premiere_date': first_vl.date.strftime('%d/%m/%Y'),
-            'var_1j': calc_perf(vl_1d) or 0,
-            'var_1m': calc_perf(vl_1m) or 0,
-            'var_1y': calc_perf(vl_1y) or 0,
-            'var_ytd': perf_calendaires['ytd'] or 0,
-            'var_origine': perf_glissantes['origine'] or 0,
-            'nb_vl': vl_queryset.count(),
-        }
-        
-        # Calculer la Tracking Error pour différentes périodes
-        def calc_tracking_error(start_date):
-            if start_date is None:
-                return None
-            period_vl = list(vl_queryset.filter(date__gte=start_date).values_list('valeur', flat=True))
-            if len(period_vl) < 2:
-                return None
-            period_valeurs = [float(v) for v in period_vl]
-            period_rendements = [(period_valeurs[i] / period_valeurs[i-1] - 1) * 100 for i in range(1, len(period_valeurs))]
-            if len(period_rendements) < 2:
-                return None
-            moyenne = sum(period_rendements) / len(period_rendements)
-            variance = sum((r - moyenne) ** 2 for r in period_rendements) / (len(period_rendements) - 1)  # Variance non biaisée
-            ecart_type = variance ** 0.5
-            volatilite_ann = ecart_type * ANNUALIZATION_FACTOR
-            return round(volatilite_ann, 2)
-        
-        tracking_error = {
-            'wtd': calc_tracking_error(start_of_week),
-            'mtd': calc_tracking_error(start_of_month),
-            'qtd': calc_tracking_error(start_of_quarter),
-            'std': calc_tracking_error(start_of_semester),
-            'ytd': calc_tracking_error(start_of_year),
-            'origine': calc_tracking_error(first_vl.date if first_vl else None),
-        }
-        
-        # Calculer les statistiques pour l'analyse
-        valeurs = [float(v) for v in vl_queryset.values_list('valeur', flat=True)]
-        if len(valeurs) > 1:
-            rendements = [(valeurs[i] / valeurs[i-1] - 1) * 100 for i in range(1, len(valeurs))]
-            
-            moyenne_rdt = sum(rendements) / len(rendements)
-            variance = sum((r - moyenne_rdt) ** 2 for r in rendements) / (len(rendements) - 1)  # Variance non biaisée
-            ecart_type = variance ** 0.5
-            volatilite_ann = ecart_type * ANNUALIZATION_FACTOR
-            
-            rendements_sorted = sorted(rendements)
-            n = len(rendements_sorted)
-            mediane = rendements_sorted[n // 2] if n % 2 == 1 else (rendements_sorted[n//2 - 1] + rendements_sorted[n//2]) / 2
-            
-            vl_min = min(valeurs)
-            vl_max = max(valeurs)
-            rdt_min = min(rendements)
-            rdt_max = max(rendements)
-            
-            jours_positifs = sum(1 for r in rendements if r > 0)
-            jours_negatifs = sum(1 for r in rendements if r < 0)
-            
-            # Drawdown max
-            peak = valeurs[0]
-            max_drawdown = 0
-            for v in valeurs:
-                if v > peak:
-                    peak = v
-                drawdown = (peak - v) / peak * 100
-                if drawdown > max_drawdown:
-                    max_drawdown = drawdown
-            
-            sharpe = ((moyenne_rdt - RISK_FREE_RATE_DAILY) / ecart_type * ANNUALIZATION_FACTOR) if ecart_type > 0 else 0
-            
-            rendements_negatifs = [r for r in rendements if r < 0]
-            if rendements_negatifs:
-                downside_var = sum(r ** 2 for r in rendements_negatifs) / (len(rendements_negatifs) - 1) if len(rendements_negatifs) > 1 else sum(r ** 2 for r in rendements_negatifs)
-                downside_std = downside_var ** 0.5
-                sortino = ((moyenne_rdt - RISK_FREE_RATE_DAILY) / downside_std * ANNUALIZATION_FACTOR) if downside_std > 0 else 0
-            else:
-                sortino = 0
-            
-            # Skewness et Kurtosis
-            if ecart_type > 0:
-                skewness = sum((r - moyenne_rdt) ** 3 for r in rendements) / (n * ecart_type ** 3)
-                kurtosis = sum((r - moyenne_rdt) ** 4 for r in rendements) / (n * ecart_type ** 4) - 3
-            else:
-                skewness = 0
-                kurtosis = 0
-            
-            # VaR et CVaR
-            var_95 = rendements_sorted[int(n * 0.05)]
-            var_99 = rendements_sorted[int(n * 0.01)]
-            cvar_95_values = [r for r in rendements if r <= var_95]
-            cvar_99_values = [r for r in rendements if r <= var_99]
-            cvar_95 = sum(cvar_95_values) / len(cvar_95_values) if cvar_95_values else var_95
-            cvar_99 = sum(cvar_99_values) / len(cvar_99_values) if cvar_99_values else var_99
-            
-            # Drawdowns détaillés
-            drawdowns_data = []
-            dates_list = list(vl_queryset.values_list('date', flat=True))
-            peak = valeurs[0]
-            current_dd_start = None
-            current_dd_peak = valeurs[0]
-            underwater_data = []
-            
-            for i, v in enumerate(valeurs):
-                if v > peak:
-                    if current_dd_start is not None:
-                        dd_depth = (current_dd_peak - min(valeurs[current_dd_start:i])) / current_dd_peak * 100
-                        dd_trough_idx = current_dd_start + valeurs[current_dd_start:i].index(min(valeurs[current_dd_start:i]))
-                        drawdowns_data.append({
-                            'start_date': dates_list[current_dd_start].strftime('%Y-%m-%d'),
-                            'trough_date': dates_list[dd_trough_idx].strftime('%Y-%m-%d'),
-                            'end_date': dates_list[i].strftime('%Y-%m-%d'),
-                            'depth': round(dd_depth, 2),
-                            'duration': i - current_dd_start,
-                            'recovery': i - dd_trough_idx
-                        })
-                        current_dd_start = None
-                    peak = v
-                    current_dd_peak = v
-                else:
-                    if current_dd_start is None and v < peak:
-                        current_dd_start = i - 1 if i > 0 else 0
-                        current_dd_peak = peak
-                
-                dd_current = (peak - v) / peak * 100
-                underwater_data.append({
-                    'date': dates_list[i].strftime('%Y-%m-%d'),
-                    'drawdown': round(-dd_current, 2)
-                })
-            
-            if current_dd_start is not None:
-                dd_depth = (current_dd_peak - min(valeurs[current_dd_start:])) / current_dd_peak * 100
-                dd_trough_idx = current_dd_start + valeurs[current_dd_start:].index(min(valeurs[current_dd_start:]))
-                drawdowns_data.append({
-                    'start_date': dates_list[current_dd_start].strftime('%Y-%m-%d'),
-                    'trough_date': dates_list[dd_trough_idx].strftime('%Y-%m-%d'),
-                    'end_date': None,
-                    'depth': round(dd_depth, 2),
-                    'duration': len(valeurs) - current_dd_start,
-                    'recovery': None
-                })
-            
-            drawdowns_data.sort(key=lambda x: x['depth'], reverse=True)
-            
-            # Histogramme
-            hist_min = min(rendements)
-            hist_max = max(rendements)
-            nb_bins = 30
-            bin_width = (hist_max - hist_min) / nb_bins if hist_max != hist_min else 1
-            histogram_data = []
-            for i in range(nb_bins):
-                bin_start = hist_min + i * bin_width
-                bin_end = bin_start + bin_width
-                count = sum(1 for r in rendements if bin_start <= r < bin_end)
-                histogram_data.append({
-                    'bin_start': round(bin_start, 3),
-                    'bin_end': round(bin_end, 3),
-                    'count': count,
-                    'frequency': round(count / n * 100, 2)
-                })
-            
-            stats['volatilite'] = round(volatilite_ann, 2)
-            
-            analyse_stats = {
-                'nb_observations': len(rendements),
-                'rendement_moyen': round(moyenne_rdt, 4),
-                'rendement_moyen_ann': round(moyenne_rdt * 365, 2),
-                'mediane': round(mediane, 4),
-                'ecart_type': round(ecart_type, 4),
-                'volatilite_ann': round(volatilite_ann, 2),
-                'vl_min': round(vl_min, 2),
-                'vl_max': round(vl_max, 2),
-                'rdt_min': round(rdt_min, 2),
-                'rdt_max': round(rdt_max, 2),
-                'max_drawdown': round(max_drawdown, 2),
-                'sharpe': round(sharpe, 2),
-                'sortino': round(sortino, 2),
-                'jours_positifs': jours_positifs,
-                'jours_negatifs': jours_negatifs,
-                'ratio_positif': round(jours_positifs / len(rendements) * 100, 1) if rendements else 0,
-                'skewness': round(skewness, 3),
-                'kurtosis': round(kurtosis, 3),
-                'var_95': round(var_95, 3),
-                'var_99': round(var_99, 3),
-                'cvar_95': round(cvar_95, 3),
-                'cvar_99': round(cvar_99, 3),
-                'histogram_data': histogram_data,
-                'underwater_data': underwater_data,
-                'drawdowns_data': drawdowns_data[:10],
-                'rendements_list': [round(r, 4) for r in rendements],
-            }
-        else:
-            stats['volatilite'] = 0
-            tracking_error = {}
+    # Statistiques : instantané précalculé, ou calcul à la volée s'il est périmé
+    with span('compute stats'):
+        analytics = get_fund_analytics(fcp_name, series)
+    stats = analytics['stats']
+    perf_calendaires = analytics['perf_calendaires']
+    perf_glissantes = analytics['perf_glissantes']
+    tracking_error = analytics['tracking_error'] if analytics['analyse_stats'] else {}
+    analyse_stats = analytics['analyse_stats']
     
     # Récupérer les données de la fiche signalétique
     fiche_signaletique_data = None
@@ -868,16 +329,23 @@ def api_fcp_full_data(request):
     except FicheSignaletique.DoesNotExist:
         pass
     
-    return JsonResponse({
-        'fcp_name': fcp_name,
-        'vl_data': vl_data,
-        'stats': stats,
-        'perf_calendaires': perf_calendaires,
-        'perf_glissantes': perf_glissantes,
-        'analyse_stats': analyse_stats,
-        'tracking_error': tracking_error,
-        'fiche_signaletique': fiche_signaletique_data
-    })
+    with span('render'):
+        if fmt == 'columnar' and analyse_stats:
+            analyse_stats = {
+                **analyse_stats,
+                'underwater_data': records_to_columns(analyse_stats['underwater_data']),
+                'histogram_data': records_to_columns(analyse_stats['histogram_data']),
+            }
+        return FastJsonResponse({
+            'fcp_name': fcp_name,
+            'vl_data': vl_data,
+            'stats': stats,
+            'perf_calendaires': perf_calendaires,
+            'perf_glissantes': perf_glissantes,
+            'analyse_stats': analyse_stats,
+            'tracking_error': tracking_error,
+            'fiche_signaletique': fiche_signaletique_data
+        })
 
 
 def composition(request):
@@ -945,35 +413,13 @@ def api_export_data(request):
         start_date = datetime.strptime(start_date_str, '%Y-%m-%d').date() if start_date_str else None
         end_date = datetime.strptime(end_date_str, '%Y-%m-%d').date() if end_date_str else None
         
-        # Collecter les données
-        all_data = {}
-        
-        for fcp_name in fcps:
-            vl_model = get_vl_model(fcp_name)
-            if vl_model:
-                queryset = vl_model.objects.all().order_by('date')
-                
-                if start_date:
-                    queryset = queryset.filter(date__gte=start_date)
-                if end_date:
-                    queryset = queryset.filter(date__lte=end_date)
-                
-                vl_data = list(queryset.values('date', 'valeur'))
-                
-                # Calculer les rendements si demandé
-                if 'returns' in content_types and len(vl_data) > 1:
-                    for i in range(1, len(vl_data)):
-                        prev_val = float(vl_data[i-1]['valeur'])
-                        curr_val = float(vl_data[i]['valeur'])
-                        vl_data[i]['rendement'] = round(((curr_val / prev_val) - 1) * 100, 4) if prev_val else 0
-                    vl_data[0]['rendement'] = 0
-                
-                all_data[fcp_name] = vl_data
+        with_returns = 'returns' in content_types
         
+        # Lecture FCP par FCP avec un curseur : mémoire constante
         if export_format == 'csv':
-            return export_to_csv(all_data, content_types)
+            return csv_response(fcps, start_date, end_date, with_returns)
         else:
-            return export_to_xlsx(all_data, content_types)
+            return export_to_xlsx(fcps, start_date, end_date, with_returns)
             
     except json.JSONDecodeError:
         return JsonResponse({'error': 'Données JSON invalides'}, status=400)
@@ -981,33 +427,7 @@ def api_export_data(request):
         return JsonResponse({'error': str(e)}, status=500)
 
 
-def export_to_csv(all_data, content_types):
-    """Exporter les données en CSV"""
-    response = HttpResponse(content_type='text/csv; charset=utf-8')
-    response['Content-Disposition'] = f'attachment; filename="export_fcp_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv"'
-    response.write('\ufeff')  # BOM pour Excel
-    
-    writer = csv.writer(response, delimiter=';')
-    
-    # En-têtes
-    headers = ['FCP', 'Date', 'Valeur Liquidative']
-    if 'returns' in content_types:
-        headers.append('Rendement (%)')
-    writer.writerow(headers)
-    
-    # Données
-    for fcp_name, vl_data in all_data.items():
-        for row in vl_data:
-            line = [fcp_name, row['date'].strftime('%d/%m/%Y'), str(row['valeur']).replace('.', ',')]
-            if 'returns' in content_types:
-                rendement = row.get('rendement', 0)
-                line.append(str(rendement).replace('.', ','))
-            writer.writerow(line)
-    
-    return response
-
-
-def export_to_xlsx(all_data, content_types):
+def export_to_xlsx(fcps, start_date, end_date, with_returns):
     """Exporter les données en XLSX"""
     try:
         import openpyxl
@@ -1015,7 +435,11 @@ def export_to_xlsx(all_data, content_types):
         from openpyxl.utils import get_column_letter
     except ImportError:
         # Fallback vers CSV si openpyxl n'est pas installé
-        return export_to_csv(all_data, content_types)
+        return csv_response(fcps, start_date, end_date, with_returns)
+    
+    # Gros volumes : classeur write-only (mémoire bornée)
+    if count_vl_rows(fcps, start_date, end_date) > XLSX_WRITE_ONLY_THRESHOLD:
+        return xlsx_write_only_response(fcps, start_date, end_date, with_returns)
     
     wb = openpyxl.Workbook()
     
@@ -1032,7 +456,11 @@ def export_to_xlsx(all_data, content_types):
     
     # Créer une feuille par FCP
     first_sheet = True
-    for fcp_name, vl_data in all_data.items():
+    for fcp_name in dict.fromkeys(fcps):
+        if get_vl_model(fcp_name) is None:
+            continue
+        vl_data = iter_vl_rows(fcp_name, start_date, end_date, with_returns)
+        
         if first_sheet:
             ws = wb.active
             ws.title = fcp_name[:31]  # Max 31 caractères pour le nom de feuille
@@ -1042,7 +470,7 @@ def export_to_xlsx(all_data, content_types):
         
         # En-têtes
         headers = ['Date', 'Valeur Liquidative']
-        if 'returns' in content_types:
+        if with_returns:
             headers.append('Rendement (%)')
         
         for col, header in enumerate(headers, 1):
@@ -1053,13 +481,13 @@ def export_to_xlsx(all_data, content_types):
             cell.border = thin_border
         
         # Données
-        for row_idx, row in enumerate(vl_data, 2):
-            ws.cell(row=row_idx, column=1, value=row['date']).border = thin_border
-            ws.cell(row=row_idx, column=2, value=float(row['valeur'])).border = thin_border
+        for row_idx, (d, valeur, rendement) in enumerate(vl_data, 2):
+            ws.cell(row=row_idx, column=1, value=d).border = thin_border
+            ws.cell(row=row_idx, column=2, value=float(valeur)).border = thin_border
             ws.cell(row=row_idx, column=2).number_format = '#,##0.0000'
             
-            if 'returns' in content_types:
-                ws.cell(row=row_idx, column=3, value=row.get('rendement', 0)).border = thin_border
+            if with_returns:
+                ws.cell(row=row_idx, column=3, value=rendement).border = thin_border
                 ws.cell(row=row_idx, column=3).number_format = '0.00%'
         
         # Ajuster la largeur des colonnes
@@ -1101,6 +529,17 @@ def api_export_ppt(request):
         start_date = datetime.strptime(start_date_str, '%Y-%m-%d').date() if start_date_str else None
         end_date = datetime.strptime(end_date_str, '%Y-%m-%d').date() if end_date_str else None
         
+        # Génération en arrière-plan (run_export_worker) : réponse immédiate
+        if use_job_queue(data):
+            job = enqueue(TypeExport.PPT, {
+                'fcps': fcps,
+                'content': content_types,
+                'template': template,
+                'startDate': start_date_str,
+                'endDate': end_date_str,
+            })
+            return JsonResponse(job_payload(job), status=202)
+        
         return generate_ppt(fcps, content_types, template, start_date, end_date)
             
     except json.JSONDecodeError:
@@ -1109,8 +548,19 @@ def api_export_ppt(request):
         return JsonResponse({'error': str(e)}, status=500)
 
 
-def generate_ppt(fcps, content_types, template, start_date, end_date):
-    """Générer une présentation PowerPoint avec différents templates"""
+def get_chart_cache():
+    """Cache disque des graphiques des exports (None si désactivé dans les settings)"""
+    cache_dir = getattr(settings, 'FCP_CHART_CACHE_DIR', None)
+    if not cache_dir:
+        return None
+    return ChartCache(cache_dir, getattr(settings, 'FCP_CHART_CACHE_MAX_BYTES', 200 * 1024 * 1024))
+
+
+def generate_ppt(fcps, content_types, template, start_date, end_date, progress=None):
+    """
+    Générer une présentation PowerPoint avec différents templates
+    progress(fait, total, libellé) est appelé avant chaque FCP (travaux d'export)
+    """
     from pptx import Presentation
     from pptx.util import Inches, Pt, Emu
     from pptx.dml.color import RGBColor
@@ -1118,9 +568,6 @@ def generate_ppt(fcps, content_types, template, start_date, end_date):
     from pptx.enum.shapes import MSO_SHAPE
     from pptx.chart.data import CategoryChartData
     from pptx.enum.chart import XL_CHART_TYPE, XL_LEGEND_POSITION
-    import matplotlib
-    matplotlib.use('Agg')
-    import matplotlib.pyplot as plt
     
     prs = Presentation()
     prs.slide_width = Inches(13.333)
@@ -1395,49 +842,6 @@ def generate_ppt(fcps, content_types, template, start_date, end_date):
         p.font.bold = True
         p.font.color.rgb = value_color
     
-    def create_chart_image(vl_list, fcp_name):
-        """Créer une image de graphique avec matplotlib"""
-        fig, ax = plt.subplots(figsize=(11, 4), dpi=100)
-        
-        dates = [vl.date for vl in vl_list]
-        values = [float(vl.valeur) for vl in vl_list]
-        
-        # Style selon template
-        if template == 'moderne':
-            ax.fill_between(dates, values, alpha=0.3, color='#6633cc')
-            ax.plot(dates, values, color='#6633cc', linewidth=2.5)
-            fig.patch.set_facecolor('#f8f5ff')
-            ax.set_facecolor('#f8f5ff')
-        elif template == 'minimaliste':
-            ax.plot(dates, values, color='#212121', linewidth=2)
-            fig.patch.set_facecolor('white')
-            ax.set_facecolor('white')
-            ax.spines['top'].set_visible(False)
-            ax.spines['right'].set_visible(False)
-        else:
-            ax.fill_between(dates, values, alpha=0.2, color='#004080')
-            ax.plot(dates, values, color='#004080', linewidth=2)
-            fig.patch.set_facecolor('#f5f7fa')
-            ax.set_facecolor('#f5f7fa')
-        
-        ax.set_title(f'Évolution de la VL - {fcp_name}', fontsize=14, fontweight='bold', pad=10)
-        ax.set_xlabel('Date', fontsize=10)
-        ax.set_ylabel('Valeur Liquidative', fontsize=10)
-        ax.grid(True, alpha=0.3, linestyle='--')
-        
-        # Format des dates
-        fig.autofmt_xdate()
-        
-        plt.tight_layout()
-        
-        # Sauvegarder en buffer
-        img_buffer = io.BytesIO()
-        plt.savefig(img_buffer, format='png', bbox_inches='tight', facecolor=fig.get_facecolor())
-        img_buffer.seek(0)
-        plt.close(fig)
-        
-        return img_buffer
-    
     def add_table(slide, data, headers, x, y, col_widths=None):
         """Ajouter un tableau stylisé"""
         rows = len(data) + 1
@@ -1525,7 +929,8 @@ def generate_ppt(fcps, content_types, template, start_date, end_date):
         p.font.size = Pt(13)
         p.font.color.rgb = COLORS['primary'] if template != 'minimaliste' else COLORS['dark']
     
-    # Slides par FCP
+    # VL de chaque FCP sur la période
+    fcp_vl_lists = {}
     for fcp_name in fcps:
         vl_model = get_vl_model(fcp_name)
         if not vl_model:
@@ -1538,6 +943,30 @@ def generate_ppt(fcps, content_types, template, start_date, end_date):
             queryset = queryset.filter(date__lte=end_date)
         
         vl_list = list(queryset)
+        if vl_list:
+            fcp_vl_lists[fcp_name] = vl_list
+    
+    # Graphiques d'évolution rendus en parallèle (pool de processus), insérés ensuite dans l'ordre
+    chart_images = {}
+    if 'vl' in content_types:
+        chart_fcps = [fcp_name for fcp_name, vl_list in fcp_vl_lists.items() if len(vl_list) >= 2]
+        if progress and chart_fcps:
+            progress(0, len(fcps), 'Graphiques')
+        pngs = render_vl_charts(
+            [
+                ([vl.date for vl in fcp_vl_lists[fcp_name]], [float(vl.valeur) for vl in fcp_vl_lists[fcp_name]], fcp_name, template)
+                for fcp_name in chart_fcps
+            ],
+            max_workers=getattr(settings, 'FCP_CHART_WORKERS', None),
+            cache=get_chart_cache()
+        )
+        chart_images = dict(zip(chart_fcps, pngs))
+    
+    # Slides par FCP
+    for idx, fcp_name in enumerate(fcps):
+        if progress:
+            progress(idx, len(fcps), fcp_name)
+        vl_list = fcp_vl_lists.get(fcp_name)
         if not vl_list:
             continue
         
@@ -1564,26 +993,27 @@ def generate_ppt(fcps, content_types, template, start_date, end_date):
             add_kpi_box(vl_slide, "VL Min", f"{float(min_vl.valeur):,.4f}", 11.6, kpi_y, 1.5, 1.2)
             
             # GRAPHIQUE DE COURBE
-            if len(vl_list) >= 2:
-                chart_img = create_chart_image(vl_list, fcp_name)
+            if fcp_name in chart_images:
+                chart_img = io.BytesIO(chart_images[fcp_name])
                 vl_slide.shapes.add_picture(chart_img, Inches(0.4), Inches(2.7), width=Inches(12.5), height=Inches(4.5))
         
         # ===== SLIDE PERFORMANCES =====
         if 'perf' in content_types:
             perf_slide = add_content_slide("Analyse des Performances", fcp_name)
             
-            all_vl = vl_model.objects.all().order_by('date')
+            # Index as-of sur la série en cache pour toutes les VL de référence
             latest_date = latest_vl.date
+            all_vl = get_series(fcp_name).until(latest_date)
             
             def get_perf(days_back=None, start_of_period=None):
                 if start_of_period:
-                    ref = all_vl.filter(date__lt=start_of_period).last()
+                    ref = all_vl.value_asof(start_of_period, strict=True)
                 elif days_back:
-                    ref = all_vl.filter(date__lte=latest_date - timedelta(days=days_back)).last()
+                    ref = all_vl.value_asof(latest_date - timedelta(days=days_back))
                 else:
                     return None
-                if ref:
-                    return ((float(latest_vl.valeur) / float(ref.valeur)) - 1) * 100
+                if ref is not None:
+                    return ((float(latest_vl.valeur) / ref) - 1) * 100
                 return None
             
             # Calculs
@@ -1721,6 +1151,16 @@ def api_export_pdf(request):
         start_date = datetime.strptime(start_date_str, '%Y-%m-%d').date() if start_date_str else None
         end_date = datetime.strptime(end_date_str, '%Y-%m-%d').date() if end_date_str else None
         
+        # Génération en arrière-plan (run_export_worker) : réponse immédiate
+        if use_job_queue(data):
+            job = enqueue(TypeExport.PDF, {
+                'fcps': fcps,
+                'content': content_types,
+                'startDate': start_date_str,
+                'endDate': end_date_str,
+            })
+            return JsonResponse(job_payload(job), status=202)
+        
         return generate_pdf(fcps, content_types, start_date, end_date)
             
     except json.JSONDecodeError:
@@ -1729,8 +1169,11 @@ def api_export_pdf(request):
         return JsonResponse({'error': str(e)}, status=500)
 
 
-def generate_pdf(fcps, content_types, start_date, end_date):
-    """Générer un rapport PDF"""
+def generate_pdf(fcps, content_types, start_date, end_date, progress=None):
+    """
+    Générer un rapport PDF
+    progress(fait, total, libellé) est appelé avant chaque FCP (travaux d'export)
+    """
     from reportlab.lib import colors
     from reportlab.lib.pagesizes import A4, landscape
     from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
@@ -1801,7 +1244,9 @@ def generate_pdf(fcps, content_types, start_date, end_date):
     story.append(PageBreak())
     
     # Contenu par FCP
-    for fcp_name in fcps:
+    for idx, fcp_name in enumerate(fcps):
+        if progress:
+            progress(idx, len(fcps), fcp_name)
         vl_model = get_vl_model(fcp_name)
         if not vl_model:
             continue
@@ -1877,18 +1322,19 @@ def generate_pdf(fcps, content_types, start_date, end_date):
         if 'perf' in content_types and latest_vl:
             story.append(Paragraph("Performances", subheading_style))
             
-            all_vl = vl_model.objects.all().order_by('date')
+            # Index as-of sur la série en cache pour toutes les VL de référence
             latest_date = latest_vl.date
+            all_vl = get_series(fcp_name).until(latest_date)
             
             def get_perf(days_back=None, start_of_period=None):
                 if start_of_period:
-                    ref = all_vl.filter(date__lt=start_of_period).last()
+                    ref = all_vl.value_asof(start_of_period, strict=True)
                 elif days_back:
-                    ref = all_vl.filter(date__lte=latest_date - timedelta(days=days_back)).last()
+                    ref = all_vl.value_asof(latest_date - timedelta(days=days_back))
                 else:
                     return None
-                if ref:
-                    return ((float(latest_vl.valeur) / float(ref.valeur)) - 1) * 100
+                if ref is not None:
+                    return ((float(latest_vl.valeur) / ref) - 1) * 100
                 return None
             
             def format_perf(val):
@@ -1970,22 +1416,23 @@ def generate_pdf(fcps, content_types, start_date, end_date):
     return response
 
 
+def factsheet_month(request):
+    """Mois du factsheet demandé (paramètre month), par défaut le mois précédent"""
+    return request.GET.get('month') or previous_month()
+
+
+@read_only_view
+@conditional_api(extra=factsheet_month)
 def api_factsheet_preview(request):
     """API pour récupérer les données de prévisualisation du factsheet"""
     try:
         fcp_name = request.GET.get('fcp')
-        month = request.GET.get('month')  # Format: YYYY-MM
+        # Format YYYY-MM, même mois par défaut que celui de l'ETag
+        month = factsheet_month(request)
         
         if not fcp_name:
             return JsonResponse({'error': 'FCP non spécifié'}, status=400)
         
-        if not month:
-            today = datetime.now().date()
-            if today.month == 1:
-                month = f"{today.year - 1}-12"
-            else:
-                month = f"{today.year}-{today.month - 1:02d}"
-        
         # Obtenir le modèle VL du FCP
         vl_model = get_vl_model(fcp_name)
         if not vl_model:
@@ -1993,7 +1440,7 @@ def api_factsheet_preview(request):
         
         # Récupérer la fiche signalétique
         try:
-            fiche = FicheSignaletique.objects.get(nom_fcp=fcp_name)
+            fiche = FicheSignaletique.objects.get(nom=fcp_name)
             fiche_data = {
                 'type_fond': fiche.type_fond or 'N/A',
                 'gestionnaire': fiche.gestionnaire or 'N/A',
@@ -2014,123 +1461,13 @@ def api_factsheet_preview(request):
                 'date_creation': 'N/A',
             }
         
-        # Parsing du mois
+        # Données VL du mois : instantané précalculé, ou calcul à la volée s'il est périmé
         year, month_num = int(month.split('-')[0]), int(month.split('-')[1])
-        end_of_month = datetime(year, month_num, 1) + timedelta(days=32)
-        end_of_month = datetime(end_of_month.year, end_of_month.month, 1) - timedelta(days=1)
+        preview = get_factsheet_preview(fcp_name, month)
         
-        # Récupérer toutes les VL jusqu'à la fin du mois
-        vl_queryset = vl_model.objects.filter(date__lte=end_of_month.date()).order_by('date')
-        vl_list = list(vl_queryset.values('date', 'valeur'))
-        
-        if not vl_list:
+        if preview is None:
             return JsonResponse({'error': 'Aucune valeur liquidative disponible'}, status=404)
         
-        latest_vl = vl_list[-1]
-        
-        # Fonctions de calcul de performance
-        def get_perf(days_back=None, target_date=None):
-            if target_date:
-                filtered = [v for v in vl_list if v['date'] <= target_date]
-                if len(filtered) < 2:
-                    return None
-                return (float(filtered[-1]['valeur']) / float(filtered[0]['valeur']) - 1) * 100
-            
-            if days_back is None or len(vl_list) < 2:
-                return None
-            
-            ref_date = latest_vl['date'] - timedelta(days=days_back)
-            for v in reversed(vl_list[:-1]):
-                if v['date'] <= ref_date:
-                    return (float(latest_vl['valeur']) / float(v['valeur']) - 1) * 100
-            return None
-        
-        def get_perf_since(start_date):
-            filtered = [v for v in vl_list if v['date'] >= start_date]
-            if len(filtered) < 2:
-                return None
-            return (float(filtered[-1]['valeur']) / float(filtered[0]['valeur']) - 1) * 100
-        
-        # Calculs des performances
-        perf_1m = get_perf(30)
-        perf_3m = get_perf(91)
-        perf_6m = get_perf(182)
-        perf_1y = get_perf(365)
-        perf_3y = get_perf(365 * 3)
-        perf_5y = get_perf(365 * 5)
-        perf_origine = (float(latest_vl['valeur']) / float(vl_list[0]['valeur']) - 1) * 100 if vl_list else None
-        
-        # Performances To-Date
-        today = latest_vl['date']
-        # WTD - depuis lundi
-        days_since_monday = today.weekday()
-        start_of_week = today - timedelta(days=days_since_monday)
-        perf_wtd = get_perf_since(start_of_week)
-        
-        # MTD - depuis début du mois
-        start_of_month = today.replace(day=1)
-        perf_mtd = get_perf_since(start_of_month)
-        
-        # QTD - depuis début du trimestre
-        quarter_month = ((today.month - 1) // 3) * 3 + 1
-        start_of_quarter = today.replace(month=quarter_month, day=1)
-        perf_qtd = get_perf_since(start_of_quarter)
-        
-        # STD - depuis début du semestre
-        semester_month = 1 if today.month <= 6 else 7
-        start_of_semester = today.replace(month=semester_month, day=1)
-        perf_std = get_perf_since(start_of_semester)
-        
-        # YTD - depuis début de l'année
-        start_of_year = today.replace(month=1, day=1)
-        perf_ytd = get_perf_since(start_of_year)
-        
-        # Calcul des statistiques
-        volatilite = None
-        sharpe = None
-        max_dd = None
-        
-        if len(vl_list) > 1:
-            valeurs = [float(v['valeur']) for v in vl_list]
-            rendements = [(valeurs[i] / valeurs[i-1] - 1) * 100 for i in range(1, len(valeurs))]
-            
-            moyenne_rdt = sum(rendements) / len(rendements)
-            variance = sum((r - moyenne_rdt) ** 2 for r in rendements) / (len(rendements) - 1) if len(rendements) > 1 else sum((r - moyenne_rdt) ** 2 for r in rendements)
-            volatilite = (variance ** 0.5) * ANNUALIZATION_FACTOR
-            
-            sharpe = ((moyenne_rdt - RISK_FREE_RATE_DAILY) / (variance ** 0.5) * ANNUALIZATION_FACTOR) if variance > 0 else 0
-            
-            peak = valeurs[0]
-            max_dd = 0
-            for v in valeurs:
-                if v > peak:
-                    peak = v
-                dd = (peak - v) / peak * 100
-                if dd > max_dd:
-                    max_dd = dd
-        
-        # Formater les performances
-        def fmt_perf(val):
-            if val is None:
-                return 'N/A'
-            sign = '+' if val >= 0 else ''
-            return f'{sign}{val:.2f}%'
-        
-        # Préparer les données pour le chart (base 100)
-        chart_data = []
-        if vl_list:
-            first_val = float(vl_list[0]['valeur'])
-            # Échantillonner max 50 points
-            step = max(1, len(vl_list) // 50)
-            sampled = vl_list[::step]
-            if vl_list[-1] not in sampled:
-                sampled.append(vl_list[-1])
-            for vl in sampled:
-                chart_data.append({
-                    'date': vl['date'].strftime('%Y-%m-%d'),
-                    'value': round(float(vl['valeur']) / first_val * 100, 2)
-                })
-        
         # Mois formaté
         month_names = ['Janvier', 'Février', 'Mars', 'Avril', 'Mai', 'Juin', 
                        'Juillet', 'Août', 'Septembre', 'Octobre', 'Novembre', 'Décembre']
@@ -2140,35 +1477,7 @@ def api_factsheet_preview(request):
             'fcp_name': fcp_name,
             'month': formatted_month,
             'fiche': fiche_data,
-            'latest_vl': {
-                'date': latest_vl['date'].strftime('%d/%m/%Y'),
-                'valeur': f"{float(latest_vl['valeur']):,.4f}".replace(',', ' ')
-            },
-            'performances': {
-                'todate': {
-                    'wtd': fmt_perf(perf_wtd),
-                    'mtd': fmt_perf(perf_mtd),
-                    'qtd': fmt_perf(perf_qtd),
-                    'std': fmt_perf(perf_std),
-                    'ytd': fmt_perf(perf_ytd),
-                },
-                'glissantes': {
-                    '1m': fmt_perf(perf_1m),
-                    '3m': fmt_perf(perf_3m),
-                    '6m': fmt_perf(perf_6m),
-                    '1y': fmt_perf(perf_1y),
-                    '3y': fmt_perf(perf_3y),
-                    '5y': fmt_perf(perf_5y),
-                    'origine': fmt_perf(perf_origine),
-                }
-            },
-            'statistics': {
-                'volatilite': f"{volatilite:.2f}%" if volatilite else 'N/A',
-                'sharpe': f"{sharpe:.2f}" if sharpe else 'N/A',
-                'max_drawdown': f"-{max_dd:.2f}%" if max_dd else 'N/A',
-                'nb_observations': len(vl_list),
-            },
-            'chart_data': chart_data,
+            **preview,
         })
     except Exception as e:
         import traceback
@@ -2187,18 +1496,24 @@ def api_export_factsheet(request):
         fcp_name = data.get('fcp')
         month = data.get('month')  # Format: YYYY-MM
         commentaire = data.get('commentaire', '')
-        disclaimer = data.get('disclaimer', "Ce document est fourni à titre informatif uniquement et ne constitue pas une offre ou une sollicitation d'achat ou de vente. Les performances passées ne préjugent pas des performances futures.")
+        disclaimer = data.get('disclaimer', FACTSHEET_DISCLAIMER)
         
         if not fcp_name:
             return JsonResponse({'error': 'FCP non spécifié'}, status=400)
         
         if not month:
             # Par défaut, le mois précédent
-            today = datetime.now().date()
-            if today.month == 1:
-                month = f"{today.year - 1}-12"
-            else:
-                month = f"{today.year}-{today.month - 1:02d}"
+            month = previous_month()
+        
+        # Génération en arrière-plan (run_export_worker) : réponse immédiate
+        if use_job_queue(data):
+            job = enqueue(TypeExport.FACTSHEET, {
+                'fcp': fcp_name,
+                'month': month,
+                'commentaire': commentaire,
+                'disclaimer': disclaimer,
+            })
+            return JsonResponse(job_payload(job), status=202)
         
         return generate_factsheet_pdf(fcp_name, month, commentaire, disclaimer)
             
@@ -2210,23 +1525,52 @@ def api_export_factsheet(request):
         return JsonResponse({'error': str(e)}, status=500)
 
 
-def generate_factsheet_pdf(fcp_name, month, commentaire, disclaimer):
-    """Générer un Factsheet PDF d'une page A4 paysage"""
-    from reportlab.lib import colors
-    from reportlab.lib.pagesizes import A4, landscape
-    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-    from reportlab.lib.units import cm, mm
-    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, Image, KeepTogether, BaseDocTemplate, Frame, PageTemplate
-    from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_RIGHT, TA_JUSTIFY
-    from reportlab.graphics.shapes import Drawing, Rect, String, Line, Circle
-    from reportlab.graphics.charts.lineplots import LinePlot
-    from reportlab.graphics.charts.piecharts import Pie
-    from reportlab.graphics.charts.barcharts import VerticalBarChart
+def api_export_job_status(request, job_id):
+    """API de suivi d'un travail d'export (statut, progression, lien de téléchargement)"""
+    try:
+        job = ExportJob.objects.get(pk=job_id)
+    except ExportJob.DoesNotExist:
+        return JsonResponse({'error': 'Travail d\'export non trouvé'}, status=404)
+    return JsonResponse(job_payload(job))
+
+
+def api_export_job_download(request, job_id):
+    """Téléchargement du fichier généré par un travail d'export terminé"""
+    try:
+        job = ExportJob.objects.get(pk=job_id)
+    except ExportJob.DoesNotExist:
+        return JsonResponse({'error': 'Travail d\'export non trouvé'}, status=404)
+    
+    if job.statut != StatutExport.TERMINE:
+        return JsonResponse({'error': 'Export non disponible', **job_payload(job)}, status=409)
+    
+    path = artifact_path(job)
+    if not path.exists():
+        return JsonResponse({'error': 'Fichier d\'export supprimé'}, status=404)
+    return FileResponse(
+        open(path, 'rb'),
+        as_attachment=True,
+        filename=job.nom_fichier,
+        content_type=job.content_type
+    )
+
+
+# Nombre maximum de points de la courbe de performance du factsheet
+FACTSHEET_CHART_POINTS = 80
+
+FACTSHEET_DISCLAIMER = "Ce document est fourni à titre informatif uniquement et ne constitue pas une offre ou une sollicitation d'achat ou de vente. Les performances passées ne préjugent pas des performances futures."
+
+
+@lru_cache(maxsize=None)
+def register_factsheet_fonts():
+    """
+    Enregistre la police Aptos Narrow si elle est installée.
+    Retourne (police, police grasse) ; Helvetica par défaut.
+    """
     from reportlab.pdfbase import pdfmetrics
     from reportlab.pdfbase.ttfonts import TTFont
     import os
     
-    # Essayer d'enregistrer la police Aptos Narrow
     FONT_NAME = 'Helvetica'
     FONT_NAME_BOLD = 'Helvetica-Bold'
     try:
@@ -2254,6 +1598,28 @@ def generate_factsheet_pdf(fcp_name, month, commentaire, disclaimer):
                 break
     except Exception:
         pass  # Utiliser Helvetica par défaut
+    return FONT_NAME, FONT_NAME_BOLD
+
+
+def generate_factsheet_pdf(fcp_name, month, commentaire, disclaimer, vl_list=None):
+    """
+    Générer un Factsheet PDF d'une page A4 paysage
+    vl_list : VL du FCP déjà chargées ([{'date', 'valeur'}] triées par date),
+    sinon lues dans la table du FCP
+    """
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import A4, landscape
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+    from reportlab.lib.units import cm, mm
+    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, Image, KeepTogether, BaseDocTemplate, Frame, PageTemplate
+    from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_RIGHT, TA_JUSTIFY
+    from reportlab.graphics.shapes import Drawing, Rect, String, Line, Circle
+    from reportlab.graphics.charts.lineplots import LinePlot
+    from reportlab.graphics.charts.piecharts import Pie
+    from reportlab.graphics.charts.barcharts import VerticalBarChart
+    
+    # Police Aptos Narrow si disponible (enregistrée une fois par processus)
+    FONT_NAME, FONT_NAME_BOLD = register_factsheet_fonts()
     
     # Récupérer les informations du FCP
     try:
@@ -2271,8 +1637,9 @@ def generate_factsheet_pdf(fcp_name, month, commentaire, disclaimer):
                7: 'Juillet', 8: 'Août', 9: 'Septembre', 10: 'Octobre', 11: 'Novembre', 12: 'Décembre'}
     
     # Récupérer les VL
-    vl_queryset = vl_model.objects.all().order_by('date')
-    vl_list = list(vl_queryset.values('date', 'valeur'))
+    if vl_list is None:
+        vl_queryset = vl_model.objects.all().order_by('date')
+        vl_list = list(vl_queryset.values('date', 'valeur'))
     
     if not vl_list:
         return JsonResponse({'error': 'Aucune donnée VL disponible'}, status=400)
@@ -2342,56 +1709,12 @@ def generate_factsheet_pdf(fcp_name, month, commentaire, disclaimer):
     perf_3m = calc_perf_from_vl(get_vl_at_date(latest_date - timedelta(days=90)))
     perf_6m = calc_perf_from_vl(get_vl_at_date(latest_date - timedelta(days=180)))
     
-    # Calculer les statistiques de risque
-    valeurs = [float(v['valeur']) for v in vl_list]
-    rendements = [(valeurs[i] / valeurs[i-1] - 1) * 100 for i in range(1, len(valeurs))]
+    # Calculer les statistiques de risque (série chargée une fois, calculs vectorisés)
+    series = VLSeries([v['date'] for v in vl_list], [v['valeur'] for v in vl_list])
     
     def calc_stats_for_period(start_date):
         """Calcule les stats pour une période donnée"""
-        period_vls = [v for v in vl_list if v['date'] >= start_date]
-        if len(period_vls) < 2:
-            return {'vol': None, 'max_dd': None, 'var95': None, 'te': None, 'sharpe': None, 'sortino': None}
-        
-        vals = [float(v['valeur']) for v in period_vls]
-        rets = [(vals[i] / vals[i-1] - 1) * 100 for i in range(1, len(vals))]
-        
-        if not rets:
-            return {'vol': None, 'max_dd': None, 'var95': None, 'te': None, 'sharpe': None, 'sortino': None}
-        
-        mean_ret = sum(rets) / len(rets)
-        variance = sum((r - mean_ret) ** 2 for r in rets) / (len(rets) - 1) if len(rets) > 1 else sum((r - mean_ret) ** 2 for r in rets)  # Variance non biaisée
-        vol = (variance ** 0.5) * ANNUALIZATION_FACTOR if variance > 0 else 0
-        
-        # Max Drawdown
-        peak = vals[0]
-        max_dd = 0
-        for v in vals:
-            if v > peak:
-                peak = v
-            dd = (peak - v) / peak * 100
-            if dd > max_dd:
-                max_dd = dd
-        
-        # VaR 95%
-        sorted_rets = sorted(rets)
-        var95_idx = int(len(sorted_rets) * 0.05)
-        var95 = sorted_rets[var95_idx] if var95_idx < len(sorted_rets) else sorted_rets[0]
-        
-        # Tracking Error (volatilité)
-        te = vol
-        
-        # Sharpe (utiliser constantes)
-        sharpe = ((mean_ret - RISK_FREE_RATE_DAILY) / (variance ** 0.5) * ANNUALIZATION_FACTOR) if variance > 0 else 0
-        
-        # Sortino
-        neg_rets = [r for r in rets if r < 0]
-        if neg_rets:
-            downside_var = sum(r ** 2 for r in neg_rets) / (len(neg_rets) - 1) if len(neg_rets) > 1 else sum(r ** 2 for r in neg_rets)
-            sortino = ((mean_ret - RISK_FREE_RATE_DAILY) / (downside_var ** 0.5) * ANNUALIZATION_FACTOR) if downside_var > 0 else 0
-        else:
-            sortino = 0
-        
-        return {'vol': vol, 'max_dd': max_dd, 'var95': abs(var95), 'te': te, 'sharpe': sharpe, 'sortino': sortino}
+        return risk_statistics(series.since(start_date))
     
     stats_ytd = calc_stats_for_period(start_of_year)
     stats_1y = calc_stats_for_period(latest_date - timedelta(days=365))
@@ -2470,22 +1793,18 @@ def generate_factsheet_pdf(fcp_name, month, commentaire, disclaimer):
         """Graphique performance base 100 compact"""
         drawing = Drawing(LEFT_COL_WIDTH - 10, 75)
         
-        base_100_data = []
-        first_val = float(vl_list[0]['valeur'])
-        step = max(1, len(vl_list) // 80)
-        sampled = vl_list[::step]
-        if vl_list[-1] not in sampled:
-            sampled.append(vl_list[-1])
-        
-        for i, vl in enumerate(sampled):
-            base_100_data.append(float(vl['valeur']) / first_val * 100)
+        valeurs = [float(vl['valeur']) for vl in vl_list]
+        first_val = valeurs[0]
+        # Courbe réduite par LTTB (pics et creux conservés), abscisse : rang de la VL
+        indices = lttb_indices(np.arange(len(valeurs)), valeurs, FACTSHEET_CHART_POINTS).tolist()
+        base_100_data = [(i, valeurs[i] / first_val * 100) for i in indices]
         
         lp = LinePlot()
         lp.x = 25
         lp.y = 10
         lp.height = 55
         lp.width = LEFT_COL_WIDTH - 50
-        lp.data = [[(i, v) for i, v in enumerate(base_100_data)]]
+        lp.data = [base_100_data]
         lp.lines[0].strokeColor = BLEU
         lp.lines[0].strokeWidth = 1
         lp.xValueAxis.visibleLabels = 0
@@ -2761,145 +2080,75 @@ def generate_factsheet_pdf(fcp_name, month, commentaire, disclaimer):
     return response
 
 
-def api_correlation_matrix(request):
-    """API pour calculer la matrice de corrélation entre les FCP"""
+@read_only_view
+@conditional_api(all_funds)
+async def api_correlation_matrix(request):
+    """
+    API pour calculer la matrice de corrélation entre les FCP (asynchrone)
+    - period : origin, wtd, mtd, qtd, std, ytd
+    - method : pearson (défaut) ou spearman
+    - alignment : intersection (dates communes à tous les FCP, défaut) ou pairwise (dates communes de chaque paire)
+    """
     period = request.GET.get('period', 'origin')
+    method = request.GET.get('method', 'pearson')
+    alignment = request.GET.get('alignment', 'intersection')
     
-    fcp_list = list(FicheSignaletique.objects.values_list('nom', flat=True).order_by('nom'))
+    if method not in CORRELATION_METHODS:
+        return JsonResponse({'error': f'Méthode inconnue: {method}'}, status=400)
+    if alignment not in ('intersection', 'pairwise'):
+        return JsonResponse({'error': f'Alignement inconnu: {alignment}'}, status=400)
     
-    # Récupérer les rendements de chaque FCP pour la période sélectionnée
-    fcp_returns = {}
-    fcp_dates = {}
-    
-    for fcp_name in fcp_list:
-        fcp_vl_model = get_vl_model(fcp_name)
-        if fcp_vl_model:
-            fcp_vl = fcp_vl_model.objects.all().order_by('date')
-            if fcp_vl.exists() and fcp_vl.count() > 10:
-                last = fcp_vl.last()
-                latest_date = last.date
-                
-                # Déterminer la date de début selon la période
-                if period == 'wtd':
-                    start_of_period = latest_date - timedelta(days=latest_date.weekday())
-                    ref_vl = fcp_vl.filter(date__lt=start_of_period).last()
-                elif period == 'mtd':
-                    start_of_period = latest_date.replace(day=1)
-                    ref_vl = fcp_vl.filter(date__lt=start_of_period).last()
-                elif period == 'qtd':
-                    quarter_month = ((latest_date.month - 1) // 3) * 3 + 1
-                    start_of_period = latest_date.replace(month=quarter_month, day=1)
-                    ref_vl = fcp_vl.filter(date__lt=start_of_period).last()
-                elif period == 'std':
-                    semester_month = 1 if latest_date.month <= 6 else 7
-                    start_of_period = latest_date.replace(month=semester_month, day=1)
-                    ref_vl = fcp_vl.filter(date__lt=start_of_period).last()
-                elif period == 'ytd':
-                    start_of_period = latest_date.replace(month=1, day=1)
-                    ref_vl = fcp_vl.filter(date__lt=start_of_period).last()
-                else:  # origin
-                    ref_vl = fcp_vl.first()
-                    start_of_period = ref_vl.date if ref_vl else None
-                
-                if ref_vl:
-                    # Filtrer les VL depuis le début de la période
-                    filtered_vl = fcp_vl.filter(date__gte=ref_vl.date)
-                    
-                    # Calculer les rendements quotidiens
-                    vl_list = list(filtered_vl.values('date', 'valeur'))
-                    if len(vl_list) > 1:
-                        returns = {}
-                        for i in range(1, len(vl_list)):
-                            date_str = vl_list[i]['date'].strftime('%Y-%m-%d')
-                            ret = (float(vl_list[i]['valeur']) / float(vl_list[i-1]['valeur']) - 1) * 100
-                            returns[date_str] = ret
-                        fcp_returns[fcp_name] = returns
-                        fcp_dates[fcp_name] = set(returns.keys())
-    
-    # Trouver les dates communes à tous les FCP
-    if fcp_dates:
-        common_dates = set.intersection(*fcp_dates.values()) if len(fcp_dates) > 1 else set()
-        common_dates = sorted(common_dates)
-    else:
-        common_dates = []
-    
-    # Calculer la matrice de corrélation
-    fcp_names = list(fcp_returns.keys())
-    n = len(fcp_names)
-    correlation_matrix = []
-    
-    if len(common_dates) > 5:  # Au moins 5 observations communes
-        for i, fcp1 in enumerate(fcp_names):
-            row = []
-            returns1 = [fcp_returns[fcp1].get(d, 0) for d in common_dates]
-            mean1 = sum(returns1) / len(returns1)
-            std1 = (sum((r - mean1) ** 2 for r in returns1) / len(returns1)) ** 0.5
-            
-            for j, fcp2 in enumerate(fcp_names):
-                if i == j:
-                    row.append(1.0)
-                else:
-                    returns2 = [fcp_returns[fcp2].get(d, 0) for d in common_dates]
-                    mean2 = sum(returns2) / len(returns2)
-                    std2 = (sum((r - mean2) ** 2 for r in returns2) / len(returns2)) ** 0.5
-                    
-                    if std1 > 0 and std2 > 0:
-                        covariance = sum((returns1[k] - mean1) * (returns2[k] - mean2) for k in range(len(common_dates))) / len(common_dates)
-                        corr = covariance / (std1 * std2)
-                        row.append(round(corr, 3))
-                    else:
-                        row.append(0)
-            correlation_matrix.append(row)
+    fcp_list = [nom async for nom in FicheSignaletique.objects.values_list('nom', flat=True).order_by('nom')]
+    
+    # Panel des rendements alignés et matrice calculée en une fois (mise en cache par période)
+    with span('compute stats'):
+        correlations = await afund_correlations(fcp_list, period, method, pairwise=alignment == 'pairwise')
     
     return JsonResponse({
-        'fcp_names': fcp_names,
-        'matrix': correlation_matrix,
-        'nb_observations': len(common_dates),
-        'period': period
+        'fcp_names': correlations['fcp_names'],
+        'matrix': correlations['matrix'],
+        'nb_observations': correlations['nb_observations'],
+        'period': period,
+        'method': method,
+        'alignment': alignment,
     })
 
 
+@read_only_view
+@conditional_api()
 def api_volatility_clustering(request):
-    """API pour le clustering de volatilité"""
+    """
+    API pour le clustering de volatilité.
+    format=columnar : chart_data en colonnes (dates, volatility, regime).
+    """
     fcp_name = request.GET.get('fcp')
     window = int(request.GET.get('window', 20))  # Fenêtre glissante par défaut 20 jours
+    fmt = response_format(request)
     
-    # Limiter la fenêtre entre 5 et 30
-    window = max(5, min(30, window))
+    # Limiter la fenêtre entre 5 et 252 (calcul glissant en O(n))
+    window = max(5, min(MAX_ROLLING_WINDOW, window))
     
     if not fcp_name:
         return JsonResponse({'error': 'FCP non spécifié'}, status=400)
+    if fmt is None:
+        return JsonResponse({'error': f"Format inconnu: {request.GET.get('format')}"}, status=400)
     
     vl_model = get_vl_model(fcp_name)
     if not vl_model:
         return JsonResponse({'error': 'FCP non trouvé'}, status=404)
     
-    vl_queryset = vl_model.objects.all().order_by('date')
+    series = get_series(fcp_name)
     
-    if not vl_queryset.exists() or vl_queryset.count() < window + 10:
+    if len(series) < window + 10:
         return JsonResponse({'error': 'Données insuffisantes'}, status=400)
     
     # Calculer les rendements quotidiens
-    vl_list = list(vl_queryset.values('date', 'valeur'))
-    rendements = []
-    dates = []
-    
-    for i in range(1, len(vl_list)):
-        ret = (float(vl_list[i]['valeur']) / float(vl_list[i-1]['valeur']) - 1) * 100
-        rendements.append(ret)
-        dates.append(vl_list[i]['date'].strftime('%Y-%m-%d'))
-    
-    # Calculer la volatilité glissante (annualisée)
-    volatilites = []
-    vol_dates = []
-    
-    for i in range(window - 1, len(rendements)):
-        window_returns = rendements[i - window + 1:i + 1]
-        mean_ret = sum(window_returns) / len(window_returns)
-        variance = sum((r - mean_ret) ** 2 for r in window_returns) / (len(window_returns) - 1) if len(window_returns) > 1 else sum((r - mean_ret) ** 2 for r in window_returns)
-        vol = (variance ** 0.5) * ANNUALIZATION_FACTOR  # Volatilité annualisée
-        volatilites.append(vol)
-        vol_dates.append(dates[i])
+    rendements = series.returns()
+    dates = series.date_strings()[1:]
+    
+    # Volatilité glissante (annualisée)
+    volatilites = rolling_volatility(rendements, window).tolist()
+    vol_dates = dates[window - 1:]
     
     if len(volatilites) < 10:
         return JsonResponse({'error': 'Données insuffisantes pour le clustering'}, status=400)
@@ -2968,15 +2217,20 @@ def api_volatility_clustering(request):
     current_volatility = round(volatilites[-1], 2) if volatilites else 0
     
     # Données pour le graphique
-    chart_data = []
-    for i in range(len(volatilites)):
-        chart_data.append({
-            'date': vol_dates[i],
-            'volatility': round(volatilites[i], 2),
-            'regime': regimes[i]
-        })
+    volatilites_arrondies = [round(vol, 2) for vol in volatilites]
+    if fmt == 'columnar':
+        chart_data = {
+            'dates': date_offsets(series.date_index[window:]),
+            'volatility': volatilites_arrondies,
+            'regime': regimes,
+        }
+    else:
+        chart_data = [
+            {'date': d, 'volatility': vol, 'regime': regime}
+            for d, vol, regime in zip(vol_dates, volatilites_arrondies, regimes)
+        ]
     
-    return JsonResponse({
+    return FastJsonResponse({
         'fcp_name': fcp_name,
         'window': window,
         'chart_data': chart_data,
@@ -2992,107 +2246,84 @@ def api_volatility_clustering(request):
     })
 
 
+def rolling_funds(request):
+    """FCP et indice de référence des métriques glissantes"""
+    return requested_fund(request) + [request.GET.get('benchmark', 'FCP ACTIONS PERFORMANCES')]
+
+
+@read_only_view
+@conditional_api(rolling_funds)
 def api_rolling_metrics(request):
-    """API pour les métriques glissantes (Sharpe et Beta)"""
+    """
+    API pour les métriques glissantes (Sharpe et Beta).
+    format=columnar : dates encodées par date de départ et écarts en jours.
+    """
     fcp_name = request.GET.get('fcp')
     window = int(request.GET.get('window', 20))
     benchmark = request.GET.get('benchmark', 'FCP ACTIONS PERFORMANCES')
+    fmt = response_format(request)
     
-    # Limiter la fenêtre entre 10 et 60
-    window = max(10, min(60, window))
+    # Limiter la fenêtre entre 10 et 252 (calcul glissant en O(n))
+    window = max(10, min(MAX_ROLLING_WINDOW, window))
     
     if not fcp_name:
         return JsonResponse({'error': 'FCP non spécifié'}, status=400)
+    if fmt is None:
+        return JsonResponse({'error': f"Format inconnu: {request.GET.get('format')}"}, status=400)
     
     vl_model = get_vl_model(fcp_name)
     if not vl_model:
         return JsonResponse({'error': 'FCP non trouvé'}, status=404)
     
-    vl_queryset = vl_model.objects.all().order_by('date')
+    series = get_series(fcp_name)
     
-    if not vl_queryset.exists() or vl_queryset.count() < window + 10:
+    if len(series) < window + 10:
         return JsonResponse({'error': 'Données insuffisantes'}, status=400)
     
     # Calculer les rendements quotidiens du FCP
-    vl_list = list(vl_queryset.values('date', 'valeur'))
-    rendements = []
-    dates = []
-    
-    for i in range(1, len(vl_list)):
-        ret = (float(vl_list[i]['valeur']) / float(vl_list[i-1]['valeur']) - 1) * 100
-        rendements.append(ret)
-        dates.append(vl_list[i]['date'])
+    rendements = series.returns()
+    dates = series.dates[1:]
     
     # Calculer les rendements du benchmark
     benchmark_returns = {}
     benchmark_model = get_vl_model(benchmark)
     if benchmark_model and benchmark != fcp_name:
-        bench_vl = list(benchmark_model.objects.all().order_by('date').values('date', 'valeur'))
-        for i in range(1, len(bench_vl)):
-            ret = (float(bench_vl[i]['valeur']) / float(bench_vl[i-1]['valeur']) - 1) * 100
-            benchmark_returns[bench_vl[i]['date']] = ret
-    
-    # Taux sans risque journalier (utiliser la constante)
-    # Note: rf_daily est déjà défini en constante globale RISK_FREE_RATE_DAILY
-    
-    # Calculer les métriques glissantes
-    rolling_sharpe = []
-    rolling_beta = []
-    rolling_dates = []
-    
-    for i in range(window - 1, len(rendements)):
-        window_returns = rendements[i - window + 1:i + 1]
-        window_dates_list = dates[i - window + 1:i + 1]
-        
-        # Sharpe Ratio glissant
-        mean_ret = sum(window_returns) / len(window_returns)
-        variance = sum((r - mean_ret) ** 2 for r in window_returns) / (len(window_returns) - 1) if len(window_returns) > 1 else sum((r - mean_ret) ** 2 for r in window_returns)
-        std_ret = variance ** 0.5
-        
-        if std_ret > 0:
-            sharpe = ((mean_ret - RISK_FREE_RATE_DAILY) / std_ret) * ANNUALIZATION_FACTOR
-        else:
-            sharpe = 0
-        
-        rolling_sharpe.append(round(sharpe, 3))
-        rolling_dates.append(dates[i].strftime('%Y-%m-%d'))
-        
-        # Beta glissant (si benchmark disponible)
-        if benchmark_returns:
-            bench_window = [benchmark_returns.get(d, 0) for d in window_dates_list]
-            
-            # Vérifier qu'on a assez de données benchmark
-            if sum(1 for b in bench_window if b != 0) > window * 0.5:
-                mean_bench = sum(bench_window) / len(bench_window)
-                
-                # Covariance et variance du benchmark
-                covariance = sum((window_returns[k] - mean_ret) * (bench_window[k] - mean_bench) 
-                                for k in range(len(window_returns))) / len(window_returns)
-                var_bench = sum((b - mean_bench) ** 2 for b in bench_window) / len(bench_window)
-                
-                if var_bench > 0:
-                    beta = covariance / var_bench
-                else:
-                    beta = 1
-                
-                rolling_beta.append(round(beta, 3))
-            else:
-                rolling_beta.append(None)
-        else:
-            rolling_beta.append(None)
+        bench_series = get_series(benchmark)
+        benchmark_returns = dict(zip(bench_series.dates[1:], bench_series.returns().tolist()))
     
-    return JsonResponse({
+    # Sharpe Ratio glissant
+    if fmt == 'columnar':
+        rolling_dates = date_offsets(series.date_index[window:])
+    else:
+        rolling_dates = series.date_strings()[window:]
+    rolling_sharpe_values = [round(v, 3) for v in rolling_sharpe(rendements, window).tolist()]
+    
+    # Beta glissant (si benchmark disponible), benchmark aligné sur les dates du FCP
+    rolling_beta_values = [None] * len(rolling_sharpe_values)
+    if benchmark_returns:
+        bench = np.array([benchmark_returns.get(d, 0) for d in dates], dtype=np.float64)
+        betas = rolling_beta(rendements, bench, window).tolist()
+        # Vérifier qu'on a assez de données benchmark dans chaque fenêtre
+        couverture = rolling_count(bench != 0, window).tolist()
+        rolling_beta_values = [
+            round(beta, 3) if nb > window * 0.5 else None
+            for beta, nb in zip(betas, couverture)
+        ]
+    
+    return FastJsonResponse({
         'fcp_name': fcp_name,
         'window': window,
         'benchmark': benchmark if benchmark_returns else None,
         'dates': rolling_dates,
-        'sharpe': rolling_sharpe,
-        'beta': rolling_beta,
-        'current_sharpe': rolling_sharpe[-1] if rolling_sharpe else None,
-        'current_beta': rolling_beta[-1] if rolling_beta and rolling_beta[-1] is not None else None
+        'sharpe': rolling_sharpe_values,
+        'beta': rolling_beta_values,
+        'current_sharpe': rolling_sharpe_values[-1] if rolling_sharpe_values else None,
+        'current_beta': rolling_beta_values[-1] if rolling_beta_values and rolling_beta_values[-1] is not None else None
     })
 
 
+@read_only_view
+@conditional_api()
 def api_tail_risk(request):
     """API pour l'analyse du Tail Risk (événements extrêmes)"""
     fcp_name = request.GET.get('fcp')
@@ -3110,41 +2341,33 @@ def api_tail_risk(request):
         return JsonResponse({'error': 'Données insuffisantes'}, status=400)
     
     # Calculer les rendements quotidiens
-    vl_list = list(vl_queryset.values('date', 'valeur'))
-    rendements = []
-    dates = []
+    series = get_series(fcp_name)
+    rendements = series.returns()
+    dates = np.array(series.date_strings()[1:])
     
-    for i in range(1, len(vl_list)):
-        ret = (float(vl_list[i]['valeur']) / float(vl_list[i-1]['valeur']) - 1) * 100
-        rendements.append(ret)
-        dates.append(vl_list[i]['date'].strftime('%Y-%m-%d'))
-    
-    # Calculer moyenne et écart-type
-    n = len(rendements)
-    mean_ret = sum(rendements) / n
-    variance = sum((r - mean_ret) ** 2 for r in rendements) / n
-    std_ret = variance ** 0.5
+    # Calculer moyenne et écart-type (population)
+    mean_ret = float(rendements.mean())
+    std_ret = float(rendements.std())
     
     # Seuils sigma
     sigma_1 = mean_ret - std_ret
     sigma_2 = mean_ret - 2 * std_ret
     sigma_3 = mean_ret - 3 * std_ret
     
-    # Compteurs d'événements extrêmes (pertes)
-    losses_1_sigma = []  # Pertes > 1σ
-    losses_2_sigma = []  # Pertes > 2σ
-    losses_3_sigma = []  # Pertes > 3σ
+    def events(mask):
+        """Événements (date, rendement) sélectionnés par un masque"""
+        return [
+            {'date': d, 'return': round(r, 3)}
+            for d, r in zip(dates[mask].tolist(), rendements[mask].tolist())
+        ]
     
-    for i, ret in enumerate(rendements):
-        if ret < sigma_1:
-            losses_1_sigma.append({'date': dates[i], 'return': round(ret, 3)})
-            if ret < sigma_2:
-                losses_2_sigma.append({'date': dates[i], 'return': round(ret, 3)})
-                if ret < sigma_3:
-                    losses_3_sigma.append({'date': dates[i], 'return': round(ret, 3)})
+    # Événements extrêmes (pertes)
+    losses_1_sigma = events(rendements < sigma_1)  # Pertes > 1σ
+    losses_2_sigma = events(rendements < sigma_2)  # Pertes > 2σ
+    losses_3_sigma = events(rendements < sigma_3)  # Pertes > 3σ
     
     # Statistiques
-    total_days = len(rendements)
+    total_days = int(rendements.size)
     
     # Distribution théorique vs réelle (règle empirique: 68-95-99.7)
     theoretical_1_sigma = 15.87  # % attendu au-delà de 1σ (en dessous de la moyenne)
@@ -3155,20 +2378,17 @@ def api_tail_risk(request):
     actual_2_sigma = (len(losses_2_sigma) / total_days) * 100
     actual_3_sigma = (len(losses_3_sigma) / total_days) * 100
     
-    # Top 10 pires jours
-    worst_days = sorted(zip(dates, rendements), key=lambda x: x[1])[:10]
-    worst_days_list = [{'date': d, 'return': round(r, 3)} for d, r in worst_days]
-    
-    # Top 10 meilleurs jours
-    best_days = sorted(zip(dates, rendements), key=lambda x: x[1], reverse=True)[:10]
-    best_days_list = [{'date': d, 'return': round(r, 3)} for d, r in best_days]
+    # Top 10 pires / meilleurs jours (tri stable comme sorted())
+    order = np.argsort(rendements, kind='stable')
+    worst_days_list = events(order[:10])
+    best_days_list = events(np.argsort(-rendements, kind='stable')[:10])
     
     # Calculer le rapport gain/perte des événements extrêmes
-    extreme_losses = [r for r in rendements if r < sigma_2]
-    extreme_gains = [r for r in rendements if r > mean_ret + 2 * std_ret]
+    extreme_losses = rendements[rendements < sigma_2]
+    extreme_gains = rendements[rendements > mean_ret + 2 * std_ret]
     
-    avg_extreme_loss = sum(extreme_losses) / len(extreme_losses) if extreme_losses else 0
-    avg_extreme_gain = sum(extreme_gains) / len(extreme_gains) if extreme_gains else 0
+    avg_extreme_loss = float(extreme_losses.mean()) if extreme_losses.size else 0
+    avg_extreme_gain = float(extreme_gains.mean()) if extreme_gains.size else 0
     
     return JsonResponse({
         'fcp_name': fcp_name,
@@ -3208,12 +2428,14 @@ def api_tail_risk(request):
         'extreme_stats': {
             'avg_extreme_loss': round(avg_extreme_loss, 3),
             'avg_extreme_gain': round(avg_extreme_gain, 3),
-            'extreme_losses_count': len(extreme_losses),
-            'extreme_gains_count': len(extreme_gains)
+            'extreme_losses_count': int(extreme_losses.size),
+            'extreme_gains_count': int(extreme_gains.size)
         }
     })
 
 
+@read_only_view
+@conditional_api()
 def api_calendar_data(request):
     """API pour les données du calendrier de performance"""
     fcp_name = request.GET.get('fcp')
@@ -3231,99 +2453,66 @@ def api_calendar_data(request):
         return JsonResponse({'error': 'Données insuffisantes'}, status=400)
     
     # Calculer les rendements quotidiens
-    vl_list = list(vl_queryset.values('date', 'valeur'))
-    daily_returns = {}
-    
-    for i in range(1, len(vl_list)):
-        date = vl_list[i]['date']
-        ret = (float(vl_list[i]['valeur']) / float(vl_list[i-1]['valeur']) - 1) * 100
-        daily_returns[date] = ret
-    
-    # 1. Heatmap mensuelle (performance par mois)
-    monthly_data = {}
-    monthly_vl_start = {}
-    
-    for vl in vl_list:
-        date = vl['date']
-        year = date.year
-        month = date.month
-        key = f"{year}-{month:02d}"
-        
-        if key not in monthly_vl_start:
-            monthly_vl_start[key] = float(vl['valeur'])
-        monthly_data[key] = float(vl['valeur'])
-    
-    # Calculer les rendements mensuels
-    monthly_returns = {}
-    prev_month_end = None
-    for key in sorted(monthly_data.keys()):
-        if prev_month_end is not None:
-            monthly_returns[key] = ((monthly_data[key] / prev_month_end) - 1) * 100
-        prev_month_end = monthly_data[key]
+    series = get_series(fcp_name)
+    rendements = series.returns()
+    return_dates = series.date_index[1:]
+    
+    # 1. Heatmap mensuelle (performance par mois) à partir de la dernière VL de chaque mois
+    months = series.date_index.astype('datetime64[M]')
+    month_ends = np.flatnonzero(np.append(months[1:] != months[:-1], True))
+    month_end_values = series.values[month_ends]
+    monthly_returns = (month_end_values[1:] / month_end_values[:-1] - 1) * 100
+    monthly_keys = months[month_ends][1:].astype('int64')  # Mois écoulés depuis 1970-01
+    monthly_years = monthly_keys // 12 + 1970
+    monthly_months = monthly_keys % 12 + 1
     
     # Format heatmap
-    heatmap_data = []
-    for key, ret in monthly_returns.items():
-        year, month = key.split('-')
-        heatmap_data.append({
-            'year': int(year),
-            'month': int(month),
-            'return': round(ret, 2)
-        })
+    heatmap_data = [
+        {'year': year, 'month': month, 'return': round(ret, 2)}
+        for year, month, ret in zip(monthly_years.tolist(), monthly_months.tolist(), monthly_returns.tolist())
+    ]
     
     # 2. Performance par jour de la semaine
-    weekday_stats = {i: [] for i in range(5)}  # 0=Lundi, 4=Vendredi
-    weekday_names = ['Lundi', 'Mardi', 'Mercredi', 'Jeudi', 'Vendredi']
-    
-    for date, ret in daily_returns.items():
-        weekday = date.weekday()
-        if weekday < 5:  # Exclure weekends
-            weekday_stats[weekday].append(ret)
+    weekday_names = ['Lundi', 'Mardi', 'Mercredi', 'Jeudi', 'Vendredi']  # 0=Lundi, 4=Vendredi
+    weekdays = (return_dates.astype('int64') + 3) % 7  # Le 1970-01-01 était un jeudi
     
     weekday_analysis = []
-    for i in range(5):
-        if weekday_stats[i]:
-            returns = weekday_stats[i]
-            mean = sum(returns) / len(returns)
-            positive = sum(1 for r in returns if r > 0)
-            negative = sum(1 for r in returns if r < 0)
+    for i in range(5):  # Exclure weekends
+        returns = rendements[weekdays == i]
+        if returns.size:
+            positive = int(np.count_nonzero(returns > 0))
+            negative = int(np.count_nonzero(returns < 0))
             weekday_analysis.append({
                 'day': weekday_names[i],
                 'dayIndex': i,
-                'mean': round(mean, 4),
-                'count': len(returns),
+                'mean': round(float(returns.mean()), 4),
+                'count': int(returns.size),
                 'positive': positive,
                 'negative': negative,
-                'win_rate': round(positive / len(returns) * 100, 1),
-                'best': round(max(returns), 2),
-                'worst': round(min(returns), 2)
+                'win_rate': round(positive / returns.size * 100, 1),
+                'best': round(float(returns.max()), 2),
+                'worst': round(float(returns.min()), 2)
             })
     
     # 3. Saisonnalité - Performance par mois (historique tous les mois)
-    month_stats = {i: [] for i in range(1, 13)}
     month_names = ['Janvier', 'Février', 'Mars', 'Avril', 'Mai', 'Juin',
                    'Juillet', 'Août', 'Septembre', 'Octobre', 'Novembre', 'Décembre']
     
-    for key, ret in monthly_returns.items():
-        month = int(key.split('-')[1])
-        month_stats[month].append(ret)
-    
     seasonality = []
     for month in range(1, 13):
-        if month_stats[month]:
-            returns = month_stats[month]
-            mean = sum(returns) / len(returns)
-            positive = sum(1 for r in returns if r > 0)
+        returns = monthly_returns[monthly_months == month]
+        if returns.size:
+            positive = int(np.count_nonzero(returns > 0))
             seasonality.append({
                 'month': month_names[month - 1],
                 'monthIndex': month,
-                'mean': round(mean, 2),
-                'count': len(returns),
+                'mean': round(float(returns.mean()), 2),
+                'count': int(returns.size),
                 'positive': positive,
-                'negative': len(returns) - positive,
-                'win_rate': round(positive / len(returns) * 100, 1),
-                'best': round(max(returns), 2),
-                'worst': round(min(returns), 2)
+                'negative': int(returns.size) - positive,
+                'win_rate': round(positive / returns.size * 100, 1),
+                'best': round(float(returns.max()), 2),
+                'worst': round(float(returns.min()), 2)
             })
     
     # Trier pour trouver les meilleurs/pires mois
@@ -3332,21 +2521,18 @@ def api_calendar_data(request):
     worst_months = sorted_seasonality[-3:]
     
     # 4. Données pour heatmap quotidienne (dernières 52 semaines)
-    from datetime import timedelta
-    if vl_list:
-        last_date = vl_list[-1]['date']
-        start_date = last_date - timedelta(days=365)
-        
-        daily_heatmap = []
-        for date, ret in daily_returns.items():
-            if date >= start_date:
-                daily_heatmap.append({
-                    'date': date.strftime('%Y-%m-%d'),
-                    'weekday': date.weekday(),
-                    'week': date.isocalendar()[1],
-                    'year': date.year,
-                    'return': round(ret, 3)
-                })
+    start_date = series.last_date - timedelta(days=365)
+    start = int(np.searchsorted(return_dates, np.datetime64(start_date, 'D')))
+    
+    daily_heatmap = []
+    for date, ret in zip(series.dates[1 + start:], rendements[start:].tolist()):
+        daily_heatmap.append({
+            'date': date.strftime('%Y-%m-%d'),
+            'weekday': date.weekday(),
+            'week': date.isocalendar()[1],
+            'year': date.year,
+            'return': round(ret, 3)
+        })
     
     return JsonResponse({
         'fcp_name': fcp_name,
@@ -41,6 +41,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'fcp_app.instrumentation.TimingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -77,9 +78,17 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
-    }
+    },
+    # Même fichier en lecture seule (PRAGMA query_only) pour les vues d'analyse (fcp_app/db.py)
+    'readonly': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / 'db.sqlite3',
+        'TEST': {'MIRROR': 'default'},
+    },
 }
 
+DATABASE_ROUTERS = ['fcp_app.db.ReadReplicaRouter']
+
 
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
@@ -121,3 +130,46 @@ STATIC_URL = 'static/'
 # https://docs.djangoproject.com/en/6.0/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+# Exports PPT / PDF / factsheet en arrière-plan (fcp_app/jobs.py)
+# True : les API d'export mettent le travail en file d'attente et renvoient
+# son identifiant (nécessite `python manage.py run_export_worker`)
+
+FCP_EXPORT_ASYNC = False
+FCP_EXPORT_DIR = BASE_DIR / 'exports'
+
+# Travail « en cours » remis en attente au démarrage d'un worker si le worker
+# qui l'exécute ne l'a pas signalé depuis ce délai (secondes)
+FCP_EXPORT_STALE_AFTER = 300
+
+# Processus du pool de rendu des graphiques des exports PPT, partagé par les
+# requêtes et borné au nombre de cœurs (1 : rendu séquentiel)
+FCP_CHART_WORKERS = 2
+
+# Cache disque des graphiques des exports PPT (None : désactivé), plafonné en octets (LRU)
+FCP_CHART_CACHE_DIR = BASE_DIR / 'cache' / 'charts'
+FCP_CHART_CACHE_MAX_BYTES = 200 * 1024 * 1024
+
+# Instrumentation des requêtes (fcp_app/instrumentation.py) : en-tête Server-Timing
+# et journal JSON à rotation (None : pas de journal)
+FCP_TIMING_ENABLED = True
+FCP_TIMING_LOG = BASE_DIR / 'logs' / 'requests.log'
+FCP_TIMING_LOG_MAX_BYTES = 5 * 1024 * 1024
+FCP_TIMING_LOG_BACKUPS = 5
+
+# Réponses conditionnelles des API de lecture (fcp_app/conditional.py) :
+# durée (s) du Cache-Control public (0 : revalidation à chaque requête) et
+# version des ETag, à incrémenter si le format des réponses change
+FCP_API_CACHE_MAX_AGE = 60
+FCP_API_CACHE_VERSION = 1
+
+# Réglages SQLite appliqués à chaque connexion (fcp_app/db.py, None : réglages par défaut de SQLite)
+# et alias de la connexion de lecture des vues d'analyse (None : tout sur 'default')
+FCP_SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'cache_size': -64000,
+    'mmap_size': 256 * 1024 * 1024,
+    'temp_store': 'MEMORY',
+}
+FCP_READ_DATABASE = 'readonly'